@@ -5,15 +5,24 @@ Aplicación principal Flask
 """
 
 import os
+import csv
+import click
 from flask import Flask, render_template, jsonify
-from backend.app import create_app, db, make_celery
-from backend.app.models import Usuario, Categoria, Producto, Movimiento, Alerta
+from backend.app import create_app, db
+from backend.app.models import Usuario, Categoria, Producto, Movimiento, Alerta, Lote, Almacen
+from backend.app.services.vencimientos import reconstruir_lotes
+from backend.app.services.almacenes import reconstruir_stock_almacenes
+from backend.app.services.movimientos_diarios import reconstruir_movimientos_diarios
+from backend.app.services.conciliacion import conciliar_stock
+from backend.app.services.correo import enviar_notificaciones
+from backend.app.utils.bloqueos import Bloqueo, ejecuciones
+from backend.config.config import TAREAS_CELERY
 
 # Crear aplicación Flask
 app = create_app(os.getenv('FLASK_ENV', 'development'))
 
-# Crear instancia de Celery
-celery = make_celery(app)
+# Instancia de Celery creada por create_app
+celery = app.extensions['celery']
 
 @app.route('/')
 def index():
@@ -78,7 +87,9 @@ def make_shell_context():
         'Categoria': Categoria,
         'Producto': Producto,
         'Movimiento': Movimiento,
-        'Alerta': Alerta
+        'Alerta': Alerta,
+        'Lote': Lote,
+        'Almacen': Almacen
     }
 
 @app.cli.command()
@@ -106,5 +117,103 @@ def create_admin():
     else:
         print("Usuario administrador ya existe")
 
+@app.cli.command()
+def sincronizar_lotes():
+    """Crear el lote principal de los productos que no tienen lotes"""
+    creados = reconstruir_lotes()
+    print(f"Lotes creados: {creados}")
+
+@app.cli.command()
+def sincronizar_almacenes():
+    """Asignar al almacén predeterminado el stock sin almacén y recalcular totales"""
+    creados = reconstruir_stock_almacenes()
+    print(f"Filas de stock por almacén creadas: {creados}")
+
+@app.cli.command('reconstruir-movimientos-diarios')
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Recalcular solo desde esta fecha (YYYY-MM-DD)')
+def reconstruir_movimientos_diarios_cmd(desde):
+    """Recalcular los totales diarios de movimientos desde la tabla de movimientos"""
+    creados = reconstruir_movimientos_diarios(desde.date() if desde else None)
+    print(f"Totales diarios creados: {creados}")
+
+@app.cli.command('probar-correo')
+@click.argument('destinatario')
+@click.option('--cantidad', type=int, default=3, help='Notificaciones de prueba a agrupar en el resumen')
+def probar_correo(destinatario, cantidad):
+    """Enviar un resumen de notificaciones de prueba (p. ej. a un servidor SMTP local)"""
+    resultado = enviar_notificaciones([
+        {'destinatario': destinatario, 'asunto': f'Notificación de prueba {i + 1}',
+         'mensaje': 'Mensaje de prueba del Sistema de Inventario'}
+        for i in range(cantidad)
+    ])
+    print(f"Correos enviados: {len(resultado['enviados'])}, fallidos: {len(resultado['fallidos'])}")
+    for destino, error in resultado['fallidos']:
+        print(f"  {destino}: {error}")
+
+@app.cli.command('estado-tareas')
+def estado_tareas():
+    """Mostrar si cada tarea de Celery está en curso y la duración de sus últimas ejecuciones"""
+    for tarea in TAREAS_CELERY:
+        nombre = tarea.rsplit('.', 1)[1]
+        historial = ejecuciones(nombre)
+        en_curso = Bloqueo(nombre).tomado()
+        if not historial and not en_curso:
+            continue
+        print(f"{nombre}{' (en curso)' if en_curso else ''}")
+        for ejecucion in historial[-5:]:
+            estado = 'ok' if ejecucion['success'] else 'error'
+            print(f"  {ejecucion['inicio']}  {ejecucion['duracion']:.1f} s  {estado}")
+
+@app.cli.command('conciliar-stock')
+@click.option('--aplicar', is_flag=True, help='Corregir las diferencias de saldo con movimientos de ajuste')
+@click.option('--workers', type=int, default=None, help='Hilos para revisar rangos en paralelo')
+@click.option('--desde', type=int, default=None, help='Primer id de producto a revisar')
+@click.option('--hasta', type=int, default=None, help='Id de producto final (excluido)')
+@click.option('--salida', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Archivo CSV con el detalle de las diferencias')
+@click.option('--usuario', default='admin', help='Usuario a nombre del cual se registran los ajustes')
+def conciliar_stock_cmd(aplicar, workers, desde, hasta, salida, usuario):
+    """Verificar el libro de movimientos contra el stock de los productos"""
+    usuario_id = None
+    if aplicar:
+        responsable = Usuario.query.filter_by(username=usuario).first()
+        if not responsable:
+            raise click.ClickException(f"Usuario no encontrado: {usuario}")
+        usuario_id = responsable.id
+
+    reporte = conciliar_stock(
+        tamano_rango=app.config['CONCILIACION_TAMANO_RANGO'],
+        workers=workers or app.config['CONCILIACION_WORKERS'],
+        desde=desde,
+        hasta=hasta,
+        aplicar=aplicar,
+        usuario_id=usuario_id,
+        tamano_lote=app.config['CONCILIACION_TAMANO_LOTE']
+    )
+
+    print(f"Rangos revisados: {reporte['rangos']}")
+    print(f"Diferencias de saldo: {len(reporte['diferencias_saldo'])}")
+    print(f"Saltos en la cadena de movimientos: {len(reporte['saltos_cadena'])}")
+    for fila in reporte['diferencias_saldo'][:20]:
+        print(f"  {fila['codigo']}: stock {fila['stock_actual']}, según movimientos {fila['stock_libro']}")
+    if aplicar:
+        print(f"Ajustes aplicados: {reporte['ajustes_aplicados']}")
+        for producto_id, error in reporte['errores']:
+            print(f"  Producto {producto_id} sin ajustar: {error}")
+
+    if salida:
+        columnas = ['tipo', 'producto_id', 'codigo', 'movimiento_id', 'fecha_movimiento',
+                    'stock_actual', 'stock_libro', 'stock_anterior', 'posterior_previo',
+                    'stock_posterior', 'posterior_calculado']
+        with open(salida, 'w', newline='', encoding='utf-8') as archivo:
+            escritor = csv.DictWriter(archivo, fieldnames=columnas, extrasaction='ignore')
+            escritor.writeheader()
+            for fila in reporte['diferencias_saldo']:
+                escritor.writerow({'tipo': 'saldo', **fila})
+            for fila in reporte['saltos_cadena']:
+                escritor.writerow({'tipo': 'cadena', **fila})
+        print(f"Detalle guardado en {salida}")
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -5,6 +5,9 @@ from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_mail import Mail
 from celery import Celery
+from backend.app.utils.cache import Cache
+from backend.app.utils.compresion import Compresion
+from backend.app.utils.eventos import Eventos
 import os
 
 # Inicialización de extensiones
@@ -12,15 +15,25 @@ db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
 mail = Mail()
+cache = Cache()
+compresion = Compresion()
+eventos = Eventos()
 
 def make_celery(app):
-    """Crear instancia de Celery configurada con Flask"""
+    """
+    Crear la instancia de Celery de la aplicación y dejarla como la actual
+    del proceso: las tareas (shared_task) se enlazan a ella al usarse y
+    corren dentro del contexto de app. Los módulos de tareas se importan
+    recién al arrancar el worker.
+    """
+    from backend.config.config import TAREAS_CELERY
+    
     celery = Celery(
         app.import_name,
-        backend=app.config['CELERY_RESULT_BACKEND'],
-        broker=app.config['CELERY_BROKER_URL']
+        include=sorted({tarea.rsplit('.', 1)[0] for tarea in TAREAS_CELERY})
     )
-    celery.conf.update(app.config)
+    # Solo la configuración de Celery: app.config mezclaría nombres de otras extensiones
+    celery.config_from_object(app.config['CELERY'])
     
     class ContextTask(celery.Task):
         """Tarea que mantiene el contexto de la aplicación Flask"""
@@ -29,6 +42,8 @@ def make_celery(app):
                 return self.run(*args, **kwargs)
     
     celery.Task = ContextTask
+    celery.set_default()
+    app.extensions['celery'] = celery
     return celery
 
 def create_app(config_name='development'):
@@ -52,7 +67,27 @@ def create_app(config_name='development'):
     migrate.init_app(app, db)
     jwt.init_app(app)
     mail.init_app(app)
+    cache.init_app(app)
+    compresion.init_app(app)
+    eventos.init_app(app)
     CORS(app)
+    make_celery(app)
+    
+    # Serialización JSON rápida (orjson si está disponible)
+    from backend.app.utils.json_rapido import configurar_json
+    configurar_json(app)
+    
+    # Versionado de tablas para GET condicionales (ETag)
+    from backend.app.utils.versiones import registrar_eventos
+    registrar_eventos()
+    
+    # Publicación de alertas nuevas en el canal de eventos (SSE)
+    from backend.app.utils.eventos import registrar_publicacion
+    registrar_publicacion()
+    
+    # Contador de alertas no leídas en la caché
+    from backend.app.utils.contadores import registrar_contadores
+    registrar_contadores()
     
     # Registrar blueprints
     from backend.app.resources.auth import auth_bp
@@ -61,6 +96,8 @@ def create_app(config_name='development'):
     from backend.app.resources.movimientos import movimientos_bp
     from backend.app.resources.reportes import reportes_bp
     from backend.app.resources.alertas import alertas_bp
+    from backend.app.resources.almacenes import almacenes_bp
+    from backend.app.resources.dashboard import dashboard_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(productos_bp, url_prefix='/api/productos')
@@ -68,5 +105,7 @@ def create_app(config_name='development'):
     app.register_blueprint(movimientos_bp, url_prefix='/api/movimientos')
     app.register_blueprint(reportes_bp, url_prefix='/api/reportes')
     app.register_blueprint(alertas_bp, url_prefix='/api/alertas')
+    app.register_blueprint(almacenes_bp, url_prefix='/api/almacenes')
+    app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
     
     return app
@@ -3,5 +3,12 @@ from .categoria import Categoria
 from .producto import Producto
 from .movimiento import Movimiento
 from .alerta import Alerta
+from .lote import Lote
+from .movimiento_lote import MovimientoLote
+from .almacen import Almacen
+from .stock_almacen import StockAlmacen
+from .movimiento_diario import MovimientoDiario
+from .notificacion import Notificacion
 
-__all__ = ['Usuario', 'Categoria', 'Producto', 'Movimiento', 'Alerta']
+__all__ = ['Usuario', 'Categoria', 'Producto', 'Movimiento', 'Alerta', 'Lote', 'MovimientoLote',
+           'Almacen', 'StockAlmacen', 'MovimientoDiario', 'Notificacion']
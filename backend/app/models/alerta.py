@@ -1,5 +1,6 @@
 from datetime import datetime
 from backend.app import db
+from backend.app.utils.campos import serializar
 
 class Alerta(db.Model):
     __tablename__ = 'alertas'
@@ -44,26 +45,35 @@ class Alerta(db.Model):
         self.activa = False
         self.fecha_resolucion = datetime.utcnow()
     
-    def to_dict(self):
-        """Convertir a diccionario para JSON"""
-        return {
-            'id': self.id,
-            'producto_id': self.producto_id,
-            'producto_codigo': self.producto.codigo if self.producto else None,
-            'producto_nombre': self.producto.nombre if self.producto else None,
-            'usuario_id': self.usuario_id,
-            'creado_por': f"{self.creado_por.nombre} {self.creado_por.apellido}" if self.creado_por else None,
-            'tipo': self.tipo,
-            'titulo': self.titulo,
-            'mensaje': self.mensaje,
-            'activa': self.activa,
-            'leida': self.leida,
-            'resuelta': self.resuelta,
-            'prioridad': self.prioridad,
-            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None,
-            'fecha_lectura': self.fecha_lectura.isoformat() if self.fecha_lectura else None,
-            'fecha_resolucion': self.fecha_resolucion.isoformat() if self.fecha_resolucion else None
-        }
+    def to_dict(self, fields=None):
+        """Convertir a diccionario para JSON (opcionalmente solo algunos campos)"""
+        return serializar(self, fields)
+    
+    # Campos serializables: (columnas/relaciones que requiere, valor)
+    CAMPOS = {
+        'id': (('id',), lambda a: a.id),
+        'producto_id': (('producto_id',), lambda a: a.producto_id),
+        'producto_codigo': (('producto_id', 'producto.codigo'),
+                            lambda a: a.producto.codigo if a.producto else None),
+        'producto_nombre': (('producto_id', 'producto.nombre'),
+                            lambda a: a.producto.nombre if a.producto else None),
+        'usuario_id': (('usuario_id',), lambda a: a.usuario_id),
+        'creado_por': (('usuario_id', 'creado_por.nombre', 'creado_por.apellido'),
+                       lambda a: f"{a.creado_por.nombre} {a.creado_por.apellido}" if a.creado_por else None),
+        'tipo': (('tipo',), lambda a: a.tipo),
+        'titulo': (('titulo',), lambda a: a.titulo),
+        'mensaje': (('mensaje',), lambda a: a.mensaje),
+        'activa': (('activa',), lambda a: a.activa),
+        'leida': (('leida',), lambda a: a.leida),
+        'resuelta': (('resuelta',), lambda a: a.resuelta),
+        'prioridad': (('prioridad',), lambda a: a.prioridad),
+        'fecha_creacion': (('fecha_creacion',),
+                           lambda a: a.fecha_creacion.isoformat() if a.fecha_creacion else None),
+        'fecha_lectura': (('fecha_lectura',),
+                          lambda a: a.fecha_lectura.isoformat() if a.fecha_lectura else None),
+        'fecha_resolucion': (('fecha_resolucion',),
+                             lambda a: a.fecha_resolucion.isoformat() if a.fecha_resolucion else None)
+    }
     
     def __repr__(self):
         return f'<Alerta {self.tipo} - {self.titulo}>'
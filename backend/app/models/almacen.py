@@ -0,0 +1,44 @@
+from datetime import datetime
+from backend.app import db
+
+class Almacen(db.Model):
+    __tablename__ = 'almacenes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    codigo = db.Column(db.String(20), unique=True, nullable=False)
+    nombre = db.Column(db.String(100), nullable=False)
+    direccion = db.Column(db.String(200))
+    activo = db.Column(db.Boolean, default=True)
+    
+    # Totales mantenidos incrementalmente con cada movimiento
+    total_unidades = db.Column(db.Integer, nullable=False, default=0)
+    productos_con_stock = db.Column(db.Integer, nullable=False, default=0)
+    
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relaciones
+    existencias = db.relationship('StockAlmacen', backref='almacen', lazy=True)
+    movimientos = db.relationship('Movimiento', backref='almacen', lazy=True)
+    
+    def __init__(self, codigo, nombre, direccion=None):
+        self.codigo = codigo
+        self.nombre = nombre
+        self.direccion = direccion
+        self.total_unidades = 0
+        self.productos_con_stock = 0
+    
+    def to_dict(self):
+        """Convertir a diccionario para JSON"""
+        return {
+            'id': self.id,
+            'codigo': self.codigo,
+            'nombre': self.nombre,
+            'direccion': self.direccion,
+            'activo': self.activo,
+            'total_unidades': self.total_unidades,
+            'productos_con_stock': self.productos_con_stock,
+            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None
+        }
+    
+    def __repr__(self):
+        return f'<Almacen {self.codigo}>'
@@ -1,5 +1,6 @@
 from datetime import datetime
 from backend.app import db
+from backend.app.utils.campos import serializar
 
 class Categoria(db.Model):
     __tablename__ = 'categorias'
@@ -17,16 +18,20 @@ class Categoria(db.Model):
         self.nombre = nombre
         self.descripcion = descripcion
     
-    def to_dict(self):
-        """Convertir a diccionario para JSON"""
-        return {
-            'id': self.id,
-            'nombre': self.nombre,
-            'descripcion': self.descripcion,
-            'activa': self.activa,
-            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None,
-            'total_productos': len(self.productos) if self.productos else 0
-        }
+    def to_dict(self, fields=None):
+        """Convertir a diccionario para JSON (opcionalmente solo algunos campos)"""
+        return serializar(self, fields)
+    
+    # Campos serializables: (columnas/relaciones que requiere, valor)
+    CAMPOS = {
+        'id': (('id',), lambda c: c.id),
+        'nombre': (('nombre',), lambda c: c.nombre),
+        'descripcion': (('descripcion',), lambda c: c.descripcion),
+        'activa': (('activa',), lambda c: c.activa),
+        'fecha_creacion': (('fecha_creacion',),
+                           lambda c: c.fecha_creacion.isoformat() if c.fecha_creacion else None),
+        'total_productos': (('productos.id',), lambda c: len(c.productos) if c.productos else 0)
+    }
     
     def __repr__(self):
         return f'<Categoria {self.nombre}>'
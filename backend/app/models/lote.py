@@ -0,0 +1,44 @@
+from datetime import datetime
+from backend.app import db
+
+class Lote(db.Model):
+    __tablename__ = 'lotes'
+    
+    # Código del lote para el stock sin lote ni vencimiento informados
+    LOTE_GENERAL = 'GENERAL'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
+    codigo = db.Column(db.String(50), nullable=False)
+    fecha_vencimiento = db.Column(db.Date)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('producto_id', 'codigo', name='uq_lotes_producto_codigo'),
+        # Calendario de vencimientos: consultas por ventana de fechas
+        db.Index('ix_lotes_vencimiento', 'fecha_vencimiento'),
+        # Orden FEFO dentro de cada producto
+        db.Index('ix_lotes_producto_vencimiento', 'producto_id', 'fecha_vencimiento'),
+    )
+    
+    def __init__(self, producto_id, codigo, fecha_vencimiento=None, cantidad=0):
+        self.producto_id = producto_id
+        self.codigo = codigo
+        self.fecha_vencimiento = fecha_vencimiento
+        self.cantidad = cantidad
+    
+    def to_dict(self):
+        """Convertir a diccionario para JSON"""
+        return {
+            'id': self.id,
+            'producto_id': self.producto_id,
+            'codigo': self.codigo,
+            'fecha_vencimiento': self.fecha_vencimiento.isoformat() if self.fecha_vencimiento else None,
+            'cantidad': self.cantidad,
+            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None
+        }
+    
+    def __repr__(self):
+        return f'<Lote {self.codigo} - producto {self.producto_id}>'
@@ -1,6 +1,7 @@
 from datetime import datetime
 from sqlalchemy import Numeric
 from backend.app import db
+from backend.app.utils.campos import serializar
 
 class Movimiento(db.Model):
     __tablename__ = 'movimientos'
@@ -8,8 +9,11 @@ class Movimiento(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    almacen_id = db.Column(db.Integer, db.ForeignKey('almacenes.id'), index=True)
     
     tipo = db.Column(db.Enum('entrada', 'salida', 'ajuste'), nullable=False)
+    # Mitad de una transferencia entre almacenes: no es consumo ni compra
+    transferencia = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     cantidad = db.Column(db.Integer, nullable=False)
     precio_unitario = db.Column(Numeric(10, 2))
     
@@ -24,11 +28,22 @@ class Movimiento(db.Model):
     
     fecha_movimiento = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Reparto del movimiento entre lotes
+    asignaciones = db.relationship('MovimientoLote', backref='movimiento', lazy=True)
+    
+    __table_args__ = (
+        # Historial por producto en orden cronológico (libro de movimientos)
+        db.Index('ix_movimientos_producto_fecha', 'producto_id', 'fecha_movimiento'),
+    )
+    
     def __init__(self, producto_id, usuario_id, tipo, cantidad, stock_anterior, 
-                 precio_unitario=None, motivo=None, referencia=None, observaciones=None):
+                 precio_unitario=None, motivo=None, referencia=None, observaciones=None,
+                 almacen_id=None, transferencia=False):
         self.producto_id = producto_id
         self.usuario_id = usuario_id
+        self.almacen_id = almacen_id
         self.tipo = tipo
+        self.transferencia = transferencia
         self.cantidad = cantidad
         self.stock_anterior = stock_anterior
         self.precio_unitario = precio_unitario
@@ -51,26 +66,36 @@ class Movimiento(db.Model):
             return float(self.precio_unitario) * self.cantidad
         return 0
     
-    def to_dict(self):
-        """Convertir a diccionario para JSON"""
-        return {
-            'id': self.id,
-            'producto_id': self.producto_id,
-            'producto_codigo': self.producto.codigo if self.producto else None,
-            'producto_nombre': self.producto.nombre if self.producto else None,
-            'usuario_id': self.usuario_id,
-            'usuario_nombre': f"{self.usuario.nombre} {self.usuario.apellido}" if self.usuario else None,
-            'tipo': self.tipo,
-            'cantidad': self.cantidad,
-            'precio_unitario': float(self.precio_unitario) if self.precio_unitario else None,
-            'valor_total': self.valor_total,
-            'motivo': self.motivo,
-            'referencia': self.referencia,
-            'observaciones': self.observaciones,
-            'stock_anterior': self.stock_anterior,
-            'stock_posterior': self.stock_posterior,
-            'fecha_movimiento': self.fecha_movimiento.isoformat() if self.fecha_movimiento else None
-        }
+    def to_dict(self, fields=None):
+        """Convertir a diccionario para JSON (opcionalmente solo algunos campos)"""
+        return serializar(self, fields)
+    
+    # Campos serializables: (columnas/relaciones que requiere, valor)
+    CAMPOS = {
+        'id': (('id',), lambda m: m.id),
+        'producto_id': (('producto_id',), lambda m: m.producto_id),
+        'producto_codigo': (('producto_id', 'producto.codigo'),
+                            lambda m: m.producto.codigo if m.producto else None),
+        'producto_nombre': (('producto_id', 'producto.nombre'),
+                            lambda m: m.producto.nombre if m.producto else None),
+        'usuario_id': (('usuario_id',), lambda m: m.usuario_id),
+        'usuario_nombre': (('usuario_id', 'usuario.nombre', 'usuario.apellido'),
+                           lambda m: f"{m.usuario.nombre} {m.usuario.apellido}" if m.usuario else None),
+        'almacen_id': (('almacen_id',), lambda m: m.almacen_id),
+        'tipo': (('tipo',), lambda m: m.tipo),
+        'transferencia': (('transferencia',), lambda m: m.transferencia),
+        'cantidad': (('cantidad',), lambda m: m.cantidad),
+        'precio_unitario': (('precio_unitario',),
+                            lambda m: float(m.precio_unitario) if m.precio_unitario else None),
+        'valor_total': (('precio_unitario', 'cantidad'), lambda m: m.valor_total),
+        'motivo': (('motivo',), lambda m: m.motivo),
+        'referencia': (('referencia',), lambda m: m.referencia),
+        'observaciones': (('observaciones',), lambda m: m.observaciones),
+        'stock_anterior': (('stock_anterior',), lambda m: m.stock_anterior),
+        'stock_posterior': (('stock_posterior',), lambda m: m.stock_posterior),
+        'fecha_movimiento': (('fecha_movimiento',),
+                             lambda m: m.fecha_movimiento.isoformat() if m.fecha_movimiento else None)
+    }
     
     def __repr__(self):
         return f'<Movimiento {self.tipo} - {self.cantidad} - {self.producto.codigo if self.producto else "N/A"}>'
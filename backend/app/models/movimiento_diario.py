@@ -0,0 +1,43 @@
+from sqlalchemy import Numeric
+from backend.app import db
+
+class MovimientoDiario(db.Model):
+    """Totales de los movimientos de un producto en un día, por tipo"""
+    __tablename__ = 'movimientos_diarios'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.Date, nullable=False)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
+    tipo = db.Column(db.Enum('entrada', 'salida', 'ajuste'), nullable=False)
+    
+    movimientos = db.Column(db.Integer, nullable=False, default=0)
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    valor = db.Column(Numeric(14, 2), nullable=False, default=0)
+    
+    __table_args__ = (
+        # Rangos de fechas (estadísticas, reportes, series) y un producto en el tiempo
+        db.UniqueConstraint('fecha', 'producto_id', 'tipo', name='uq_movimientos_diarios'),
+        db.Index('ix_movimientos_diarios_producto_fecha', 'producto_id', 'fecha'),
+    )
+    
+    def __init__(self, fecha, producto_id, tipo, movimientos=0, unidades=0, valor=0):
+        self.fecha = fecha
+        self.producto_id = producto_id
+        self.tipo = tipo
+        self.movimientos = movimientos
+        self.unidades = unidades
+        self.valor = valor
+    
+    def to_dict(self):
+        """Convertir a diccionario para JSON"""
+        return {
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'producto_id': self.producto_id,
+            'tipo': self.tipo,
+            'movimientos': self.movimientos,
+            'unidades': self.unidades,
+            'valor': float(self.valor) if self.valor is not None else 0.0
+        }
+    
+    def __repr__(self):
+        return f'<MovimientoDiario {self.fecha} - producto {self.producto_id} - {self.tipo}>'
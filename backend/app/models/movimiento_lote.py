@@ -0,0 +1,33 @@
+from backend.app import db
+
+class MovimientoLote(db.Model):
+    """Parte de un movimiento asignada a un lote (cantidad con signo)"""
+    __tablename__ = 'movimientos_lotes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    movimiento_id = db.Column(db.Integer, db.ForeignKey('movimientos.id'), nullable=False, index=True)
+    lote_id = db.Column(db.Integer, db.ForeignKey('lotes.id'), nullable=False, index=True)
+    
+    # Positiva para ingresos al lote, negativa para egresos
+    cantidad = db.Column(db.Integer, nullable=False)
+    
+    lote = db.relationship('Lote', lazy='joined')
+    
+    def __init__(self, lote, cantidad, movimiento=None):
+        self.lote = lote
+        self.cantidad = cantidad
+        if movimiento is not None:
+            self.movimiento = movimiento
+    
+    def to_dict(self):
+        """Convertir a diccionario para JSON"""
+        return {
+            'lote_id': self.lote_id,
+            'lote': self.lote.codigo if self.lote else None,
+            'fecha_vencimiento': self.lote.fecha_vencimiento.isoformat()
+                                 if self.lote and self.lote.fecha_vencimiento else None,
+            'cantidad': self.cantidad
+        }
+    
+    def __repr__(self):
+        return f'<MovimientoLote movimiento {self.movimiento_id} - lote {self.lote_id} ({self.cantidad})>'
@@ -0,0 +1,55 @@
+from datetime import datetime
+from backend.app import db
+
+class Notificacion(db.Model):
+    """Aviso de una alerta para un usuario, pendiente hasta enviarse en un resumen"""
+    __tablename__ = 'notificaciones'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    alerta_id = db.Column(db.Integer, db.ForeignKey('alertas.id', ondelete='CASCADE'), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    
+    # Deduplicación: un aviso por (usuario, producto, tipo) dentro de la ventana
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
+    tipo = db.Column(db.Enum('stock_bajo', 'vencimiento', 'vencido', 'sin_stock'), nullable=False)
+    
+    estado = db.Column(db.Enum('pendiente', 'enviada', 'fallida'), nullable=False, default='pendiente')
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha_envio = db.Column(db.DateTime)
+    
+    alerta = db.relationship('Alerta', lazy=True)
+    usuario = db.relationship('Usuario', lazy=True)
+    
+    __table_args__ = (
+        # Pendientes a enviar y avisos recientes (deduplicación)
+        db.Index('ix_notificaciones_estado', 'estado', 'usuario_id'),
+        db.Index('ix_notificaciones_fecha', 'fecha_creacion'),
+    )
+    
+    def __init__(self, alerta_id, usuario_id, producto_id, tipo, fecha_creacion=None):
+        self.alerta_id = alerta_id
+        self.usuario_id = usuario_id
+        self.producto_id = producto_id
+        self.tipo = tipo
+        self.estado = 'pendiente'
+        self.intentos = 0
+        self.fecha_creacion = fecha_creacion or datetime.utcnow()
+    
+    def to_dict(self):
+        """Convertir a diccionario para JSON"""
+        return {
+            'id': self.id,
+            'alerta_id': self.alerta_id,
+            'usuario_id': self.usuario_id,
+            'producto_id': self.producto_id,
+            'tipo': self.tipo,
+            'estado': self.estado,
+            'intentos': self.intentos,
+            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None,
+            'fecha_envio': self.fecha_envio.isoformat() if self.fecha_envio else None
+        }
+    
+    def __repr__(self):
+        return f'<Notificacion {self.tipo} - producto {self.producto_id} - usuario {self.usuario_id}>'
@@ -1,7 +1,10 @@
 from datetime import datetime, date
 from decimal import Decimal
-from sqlalchemy import Numeric
+from sqlalchemy import Numeric, func
+from sqlalchemy.ext.hybrid import hybrid_property
 from backend.app import db
+from backend.app.utils.campos import serializar
+from backend.app.utils.fechas import hoy
 
 class Producto(db.Model):
     __tablename__ = 'productos'
@@ -18,6 +21,12 @@ class Producto(db.Model):
     precio_compra = db.Column(Numeric(10, 2))
     precio_venta = db.Column(Numeric(10, 2))
     
+    # Pronóstico de demanda (calculado por la tarea nocturna)
+    demanda_diaria = db.Column(db.Float)
+    stock_seguridad = db.Column(db.Integer)
+    punto_reorden = db.Column(db.Integer)
+    fecha_pronostico = db.Column(db.DateTime)
+    
     # Información adicional
     unidad_medida = db.Column(db.String(20), default='unidad')  # unidad, kg, litro, etc.
     ubicacion = db.Column(db.String(100))  # Ubicación física en almacén
@@ -32,6 +41,8 @@ class Producto(db.Model):
     # Relaciones
     movimientos = db.relationship('Movimiento', backref='producto', lazy=True)
     alertas = db.relationship('Alerta', backref='producto', lazy=True)
+    lotes = db.relationship('Lote', backref='producto', lazy=True)
+    existencias = db.relationship('StockAlmacen', backref='producto', lazy=True)
     
     def __init__(self, codigo, nombre, categoria_id, descripcion=None, 
                  stock_minimo=10, precio_compra=None, precio_venta=None,
@@ -48,24 +59,33 @@ class Producto(db.Model):
         self.fecha_vencimiento = fecha_vencimiento
         self.lote = lote
     
+    @hybrid_property
+    def umbral_reorden(self):
+        """Punto de reorden dinámico si existe, si no el stock mínimo manual"""
+        return self.punto_reorden if self.punto_reorden is not None else self.stock_minimo
+    
+    @umbral_reorden.expression
+    def umbral_reorden(cls):
+        return func.coalesce(cls.punto_reorden, cls.stock_minimo)
+    
     @property
     def necesita_restock(self):
         """Verificar si el producto necesita restock"""
-        return self.stock_actual <= self.stock_minimo
+        return self.stock_actual <= self.umbral_reorden
     
     @property
     def dias_para_vencer(self):
         """Calcular días hasta vencimiento"""
         if not self.fecha_vencimiento:
             return None
-        return (self.fecha_vencimiento - date.today()).days
+        return (self.fecha_vencimiento - hoy()).days
     
     @property
     def esta_vencido(self):
         """Verificar si el producto está vencido"""
         if not self.fecha_vencimiento:
             return False
-        return self.fecha_vencimiento < date.today()
+        return self.fecha_vencimiento < hoy()
     
     @property
     def valor_inventario(self):
@@ -74,31 +94,41 @@ class Producto(db.Model):
             return float(self.precio_compra) * self.stock_actual
         return 0
     
-    def to_dict(self):
-        """Convertir a diccionario para JSON"""
-        return {
-            'id': self.id,
-            'codigo': self.codigo,
-            'nombre': self.nombre,
-            'descripcion': self.descripcion,
-            'categoria_id': self.categoria_id,
-            'categoria_nombre': self.categoria.nombre if self.categoria else None,
-            'stock_actual': self.stock_actual,
-            'stock_minimo': self.stock_minimo,
-            'precio_compra': float(self.precio_compra) if self.precio_compra else None,
-            'precio_venta': float(self.precio_venta) if self.precio_venta else None,
-            'unidad_medida': self.unidad_medida,
-            'ubicacion': self.ubicacion,
-            'fecha_vencimiento': self.fecha_vencimiento.isoformat() if self.fecha_vencimiento else None,
-            'lote': self.lote,
-            'activo': self.activo,
-            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None,
-            'fecha_actualizacion': self.fecha_actualizacion.isoformat() if self.fecha_actualizacion else None,
-            'necesita_restock': self.necesita_restock,
-            'dias_para_vencer': self.dias_para_vencer,
-            'esta_vencido': self.esta_vencido,
-            'valor_inventario': self.valor_inventario
-        }
+    def to_dict(self, fields=None):
+        """Convertir a diccionario para JSON (opcionalmente solo algunos campos)"""
+        return serializar(self, fields)
+    
+    # Campos serializables: (columnas/relaciones que requiere, valor)
+    CAMPOS = {
+        'id': (('id',), lambda p: p.id),
+        'codigo': (('codigo',), lambda p: p.codigo),
+        'nombre': (('nombre',), lambda p: p.nombre),
+        'descripcion': (('descripcion',), lambda p: p.descripcion),
+        'categoria_id': (('categoria_id',), lambda p: p.categoria_id),
+        'categoria_nombre': (('categoria_id', 'categoria.nombre'),
+                             lambda p: p.categoria.nombre if p.categoria else None),
+        'stock_actual': (('stock_actual',), lambda p: p.stock_actual),
+        'stock_minimo': (('stock_minimo',), lambda p: p.stock_minimo),
+        'punto_reorden': (('punto_reorden',), lambda p: p.punto_reorden),
+        'stock_seguridad': (('stock_seguridad',), lambda p: p.stock_seguridad),
+        'demanda_diaria': (('demanda_diaria',), lambda p: p.demanda_diaria),
+        'precio_compra': (('precio_compra',), lambda p: float(p.precio_compra) if p.precio_compra else None),
+        'precio_venta': (('precio_venta',), lambda p: float(p.precio_venta) if p.precio_venta else None),
+        'unidad_medida': (('unidad_medida',), lambda p: p.unidad_medida),
+        'ubicacion': (('ubicacion',), lambda p: p.ubicacion),
+        'fecha_vencimiento': (('fecha_vencimiento',),
+                              lambda p: p.fecha_vencimiento.isoformat() if p.fecha_vencimiento else None),
+        'lote': (('lote',), lambda p: p.lote),
+        'activo': (('activo',), lambda p: p.activo),
+        'fecha_creacion': (('fecha_creacion',),
+                           lambda p: p.fecha_creacion.isoformat() if p.fecha_creacion else None),
+        'fecha_actualizacion': (('fecha_actualizacion',),
+                                lambda p: p.fecha_actualizacion.isoformat() if p.fecha_actualizacion else None),
+        'necesita_restock': (('stock_actual', 'punto_reorden', 'stock_minimo'), lambda p: p.necesita_restock),
+        'dias_para_vencer': (('fecha_vencimiento',), lambda p: p.dias_para_vencer),
+        'esta_vencido': (('fecha_vencimiento',), lambda p: p.esta_vencido),
+        'valor_inventario': (('precio_compra', 'stock_actual'), lambda p: p.valor_inventario)
+    }
     
     def __repr__(self):
         return f'<Producto {self.codigo} - {self.nombre}>'
@@ -0,0 +1,39 @@
+from datetime import datetime
+from backend.app import db
+
+class StockAlmacen(db.Model):
+    """Stock de un producto en un almacén"""
+    __tablename__ = 'stock_almacenes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    almacen_id = db.Column(db.Integer, db.ForeignKey('almacenes.id'), nullable=False)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    
+    fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # Búsqueda por almacén (filtros de listados y reportes) y por producto
+        db.UniqueConstraint('almacen_id', 'producto_id', name='uq_stock_almacen_producto'),
+        db.Index('ix_stock_almacenes_producto', 'producto_id'),
+    )
+    
+    def __init__(self, almacen_id, producto_id, cantidad=0):
+        self.almacen_id = almacen_id
+        self.producto_id = producto_id
+        self.cantidad = cantidad
+    
+    def to_dict(self):
+        """Convertir a diccionario para JSON"""
+        return {
+            'almacen_id': self.almacen_id,
+            'almacen_codigo': self.almacen.codigo if self.almacen else None,
+            'producto_id': self.producto_id,
+            'producto_codigo': self.producto.codigo if self.producto else None,
+            'producto_nombre': self.producto.nombre if self.producto else None,
+            'cantidad': self.cantidad,
+            'fecha_actualizacion': self.fecha_actualizacion.isoformat() if self.fecha_actualizacion else None
+        }
+    
+    def __repr__(self):
+        return f'<StockAlmacen almacen {self.almacen_id} - producto {self.producto_id}: {self.cantidad}>'
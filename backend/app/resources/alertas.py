@@ -1,15 +1,19 @@
-from datetime import datetime, date
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from backend.app import db
+from backend.app import db, eventos
 from backend.app.models.alerta import Alerta
-from backend.app.models.producto import Producto
 from backend.app.models.usuario import Usuario
+from backend.app.utils.versiones import condicional
+from backend.app.utils.campos import parsear_campos, opciones_carga, CampoInvalido
+from backend.app.utils.eventos import flujo_sse
+from backend.app.utils.contadores import no_leidas
+from backend.app.services.generacion_alertas import generar_alertas as generar_alertas_productos
 
 alertas_bp = Blueprint('alertas', __name__)
 
 @alertas_bp.route('', methods=['GET'])
 @jwt_required()
+@condicional('alertas', 'productos', 'usuarios')
 def get_alertas():
     """Obtener todas las alertas con filtros"""
     try:
@@ -20,7 +24,9 @@ def get_alertas():
         tipo = request.args.get('tipo')
         prioridad = request.args.get('prioridad')
         
-        query = Alerta.query
+        campos = parsear_campos(Alerta)
+        
+        query = Alerta.query.options(*opciones_carga(Alerta, campos))
         
         # Aplicar filtros
         if activas_only:
@@ -43,17 +49,20 @@ def get_alertas():
         )
         
         return jsonify({
-            'alertas': [alerta.to_dict() for alerta in alertas.items],
+            'alertas': [alerta.to_dict(campos) for alerta in alertas.items],
             'total': alertas.total,
             'pages': alertas.pages,
             'current_page': page
         }), 200
         
+    except CampoInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @alertas_bp.route('/<int:alerta_id>', methods=['GET'])
 @jwt_required()
+@condicional('alertas', 'productos', 'usuarios')
 def get_alerta(alerta_id):
     """Obtener una alerta específica"""
     try:
@@ -128,114 +137,10 @@ def generar_alertas():
         if not usuario or usuario.rol not in ['admin', 'manager']:
             return jsonify({'error': 'No tienes permisos para generar alertas'}), 403
         
-        alertas_creadas = []
-        
-        # Buscar productos con stock bajo
-        productos_stock_bajo = Producto.query.filter(
-            Producto.stock_actual <= Producto.stock_minimo,
-            Producto.activo == True
-        ).all()
-        
-        for producto in productos_stock_bajo:
-            # Verificar si ya existe una alerta activa para este producto
-            alerta_existente = Alerta.query.filter_by(
-                producto_id=producto.id,
-                tipo='stock_bajo',
-                activa=True
-            ).first()
-            
-            if not alerta_existente:
-                if producto.stock_actual == 0:
-                    tipo = 'sin_stock'
-                    titulo = f'Sin stock: {producto.nombre}'
-                    mensaje = f'El producto {producto.codigo} - {producto.nombre} no tiene stock disponible.'
-                    prioridad = 'critica'
-                else:
-                    tipo = 'stock_bajo'
-                    titulo = f'Stock bajo: {producto.nombre}'
-                    mensaje = f'El producto {producto.codigo} - {producto.nombre} tiene stock bajo. Stock actual: {producto.stock_actual}, Stock mínimo: {producto.stock_minimo}'
-                    prioridad = 'alta'
-                
-                alerta = Alerta(
-                    producto_id=producto.id,
-                    usuario_id=usuario.id,
-                    tipo=tipo,
-                    titulo=titulo,
-                    mensaje=mensaje,
-                    prioridad=prioridad
-                )
-                
-                db.session.add(alerta)
-                alertas_creadas.append(alerta)
-        
-        # Buscar productos próximos a vencer (30 días)
-        fecha_limite = date.today()
-        from datetime import timedelta
-        fecha_limite_vencimiento = fecha_limite + timedelta(days=30)
-        
-        productos_por_vencer = Producto.query.filter(
-            Producto.fecha_vencimiento.between(fecha_limite, fecha_limite_vencimiento),
-            Producto.activo == True
-        ).all()
-        
-        for producto in productos_por_vencer:
-            # Verificar si ya existe una alerta activa para este producto
-            alerta_existente = Alerta.query.filter_by(
-                producto_id=producto.id,
-                tipo='vencimiento',
-                activa=True
-            ).first()
-            
-            if not alerta_existente:
-                dias_restantes = (producto.fecha_vencimiento - fecha_limite).days
-                
-                if dias_restantes <= 7:
-                    prioridad = 'critica'
-                elif dias_restantes <= 15:
-                    prioridad = 'alta'
-                else:
-                    prioridad = 'media'
-                
-                alerta = Alerta(
-                    producto_id=producto.id,
-                    usuario_id=usuario.id,
-                    tipo='vencimiento',
-                    titulo=f'Próximo a vencer: {producto.nombre}',
-                    mensaje=f'El producto {producto.codigo} - {producto.nombre} vence en {dias_restantes} días (Fecha de vencimiento: {producto.fecha_vencimiento})',
-                    prioridad=prioridad
-                )
-                
-                db.session.add(alerta)
-                alertas_creadas.append(alerta)
-        
-        # Buscar productos vencidos
-        productos_vencidos = Producto.query.filter(
-            Producto.fecha_vencimiento < fecha_limite,
-            Producto.activo == True
-        ).all()
-        
-        for producto in productos_vencidos:
-            # Verificar si ya existe una alerta activa para este producto
-            alerta_existente = Alerta.query.filter_by(
-                producto_id=producto.id,
-                tipo='vencido',
-                activa=True
-            ).first()
-            
-            if not alerta_existente:
-                dias_vencido = (fecha_limite - producto.fecha_vencimiento).days
-                
-                alerta = Alerta(
-                    producto_id=producto.id,
-                    usuario_id=usuario.id,
-                    tipo='vencido',
-                    titulo=f'Producto vencido: {producto.nombre}',
-                    mensaje=f'El producto {producto.codigo} - {producto.nombre} está vencido desde hace {dias_vencido} días (Fecha de vencimiento: {producto.fecha_vencimiento})',
-                    prioridad='critica'
-                )
-                
-                db.session.add(alerta)
-                alertas_creadas.append(alerta)
+        # Stock bajo, sin stock y lotes próximos a vencer o vencidos
+        alertas_creadas = generar_alertas_productos(
+            usuario.id, dias_alerta=current_app.config['DIAS_VENCIMIENTO_ALERTA']
+        )
         
         db.session.commit()
         
@@ -249,8 +154,39 @@ def generar_alertas():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@alertas_bp.route('/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_alertas():
+    """
+    Flujo de eventos en tiempo real (Server-Sent Events).
+
+    Emite eventos 'alerta' (nuevas alertas) y 'stock' (cambios de stock).
+    EventSource no permite cabeceras, por lo que el token se acepta también
+    en el parámetro ?jwt=.
+    """
+    flujo = flujo_sse(
+        eventos.broker,
+        keepalive=current_app.config['EVENTOS_KEEPALIVE'],
+        duracion_maxima=current_app.config['EVENTOS_DURACION_MAXIMA']
+    )
+    return Response(flujo, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Desactivar el buffer de nginx
+    })
+
+@alertas_bp.route('/no-leidas', methods=['GET'])
+@jwt_required()
+def get_alertas_no_leidas():
+    """Obtener la cantidad de alertas activas sin leer (contador en caché)"""
+    try:
+        return jsonify({'alertas_no_leidas': no_leidas()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @alertas_bp.route('/estadisticas', methods=['GET'])
 @jwt_required()
+@condicional('alertas')
 def get_estadisticas_alertas():
     """Obtener estadísticas de alertas"""
     try:
@@ -0,0 +1,193 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import joinedload
+from backend.app import db, eventos
+from backend.app.models.almacen import Almacen
+from backend.app.models.stock_almacen import StockAlmacen
+from backend.app.models.producto import Producto
+from backend.app.models.usuario import Usuario
+from backend.app.utils.versiones import condicional
+from backend.app.utils.idempotencia import idempotente
+from backend.app.services.almacenes import transferir
+from backend.app.services.lotes import StockInsuficiente
+
+almacenes_bp = Blueprint('almacenes', __name__)
+
+@almacenes_bp.route('', methods=['GET'])
+@jwt_required()
+@condicional('almacenes', 'stock_almacenes')
+def get_almacenes():
+    """Obtener los almacenes con sus totales"""
+    try:
+        activos_only = request.args.get('activos_only', 'true').lower() == 'true'
+
+        query = Almacen.query
+        if activos_only:
+            query = query.filter_by(activo=True)
+
+        almacenes = query.order_by(Almacen.codigo).all()
+
+        return jsonify({
+            'almacenes': [almacen.to_dict() for almacen in almacenes],
+            'total': len(almacenes)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@almacenes_bp.route('/<int:almacen_id>', methods=['GET'])
+@jwt_required()
+@condicional('almacenes', 'stock_almacenes')
+def get_almacen(almacen_id):
+    """Obtener un almacén específico"""
+    try:
+        almacen = Almacen.query.get(almacen_id)
+
+        if not almacen:
+            return jsonify({'error': 'Almacén no encontrado'}), 404
+
+        return jsonify(almacen.to_dict()), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@almacenes_bp.route('', methods=['POST'])
+@jwt_required()
+def create_almacen():
+    """Crear nuevo almacén"""
+    try:
+        usuario_id = int(get_jwt_identity())
+        usuario = Usuario.query.get(usuario_id)
+
+        if not usuario or usuario.rol not in ['admin', 'manager']:
+            return jsonify({'error': 'No tienes permisos para crear almacenes'}), 403
+
+        data = request.get_json()
+
+        for field in ['codigo', 'nombre']:
+            if not data.get(field):
+                return jsonify({'error': f'{field} es requerido'}), 400
+
+        if Almacen.query.filter_by(codigo=data['codigo']).first():
+            return jsonify({'error': 'Ya existe un almacén con ese código'}), 400
+
+        almacen = Almacen(
+            codigo=data['codigo'],
+            nombre=data['nombre'],
+            direccion=data.get('direccion')
+        )
+
+        db.session.add(almacen)
+        db.session.commit()
+
+        return jsonify({
+            'message': 'Almacén creado exitosamente',
+            'almacen': almacen.to_dict()
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@almacenes_bp.route('/<int:almacen_id>/stock', methods=['GET'])
+@jwt_required()
+@condicional('stock_almacenes', 'productos')
+def get_stock_almacen(almacen_id):
+    """Obtener el stock por producto de un almacén"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+
+        almacen = Almacen.query.get(almacen_id)
+
+        if not almacen:
+            return jsonify({'error': 'Almacén no encontrado'}), 404
+
+        existencias = StockAlmacen.query.options(
+            joinedload(StockAlmacen.almacen), joinedload(StockAlmacen.producto)
+        ).filter(
+            StockAlmacen.almacen_id == almacen.id,
+            StockAlmacen.cantidad > 0
+        ).order_by(StockAlmacen.producto_id).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+
+        return jsonify({
+            'almacen': almacen.to_dict(),
+            'stock': [existencia.to_dict() for existencia in existencias.items],
+            'total': existencias.total,
+            'pages': existencias.pages,
+            'current_page': page
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@almacenes_bp.route('/transferencias', methods=['POST'])
+@jwt_required()
+@idempotente
+def crear_transferencia():
+    """Transferir stock de un producto entre almacenes"""
+    try:
+        usuario_id = int(get_jwt_identity())
+        usuario = Usuario.query.get(usuario_id)
+
+        if not usuario:
+            return jsonify({'error': 'Usuario no encontrado'}), 404
+
+        data = request.get_json()
+
+        for field in ['producto_id', 'origen_id', 'destino_id', 'cantidad']:
+            if not data.get(field):
+                return jsonify({'error': f'{field} es requerido'}), 400
+
+        cantidad = int(data['cantidad'])
+        if cantidad <= 0:
+            return jsonify({'error': 'Cantidad debe ser mayor a 0'}), 400
+
+        if data['origen_id'] == data['destino_id']:
+            return jsonify({'error': 'El almacén de origen y el de destino deben ser distintos'}), 400
+
+        # Bloquear el producto: el stock leído y los dos movimientos van bajo el mismo bloqueo
+        producto = Producto.query.filter_by(id=data['producto_id']).with_for_update().first()
+        if not producto:
+            return jsonify({'error': 'Producto no encontrado'}), 404
+
+        origen = Almacen.query.get(data['origen_id'])
+        destino = Almacen.query.get(data['destino_id'])
+        if not origen or not destino:
+            return jsonify({'error': 'Almacén no encontrado'}), 404
+
+        salida, entrada = transferir(
+            producto, origen, destino, cantidad, usuario.id,
+            motivo=data.get('motivo'),
+            referencia=data.get('referencia')
+        )
+        db.session.commit()
+
+        eventos.publicar('stock', {
+            'producto_id': producto.id,
+            'codigo': producto.codigo,
+            'nombre': producto.nombre,
+            'tipo': 'transferencia',
+            'cantidad': cantidad,
+            'origen_id': origen.id,
+            'destino_id': destino.id,
+            'stock_actual': producto.stock_actual,
+            'necesita_restock': producto.necesita_restock
+        })
+
+        return jsonify({
+            'message': 'Transferencia registrada exitosamente',
+            'referencia': salida.referencia,
+            'movimientos': [salida.to_dict(), entrada.to_dict()],
+            'origen': origen.to_dict(),
+            'destino': destino.to_dict()
+        }), 201
+
+    except StockInsuficiente as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -3,11 +3,14 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend.app import db
 from backend.app.models.categoria import Categoria
 from backend.app.models.usuario import Usuario
+from backend.app.utils.versiones import condicional
+from backend.app.utils.campos import parsear_campos, opciones_carga, CampoInvalido
 
 categorias_bp = Blueprint('categorias', __name__)
 
 @categorias_bp.route('', methods=['GET'])
 @jwt_required()
+@condicional('categorias', 'productos')
 def get_categorias():
     """Obtener todas las categorías"""
     try:
@@ -15,7 +18,9 @@ def get_categorias():
         per_page = request.args.get('per_page', 10, type=int)
         activas_only = request.args.get('activas_only', 'true').lower() == 'true'
         
-        query = Categoria.query
+        campos = parsear_campos(Categoria)
+        
+        query = Categoria.query.options(*opciones_carga(Categoria, campos))
         
         if activas_only:
             query = query.filter_by(activa=True)
@@ -25,17 +30,20 @@ def get_categorias():
         )
         
         return jsonify({
-            'categorias': [categoria.to_dict() for categoria in categorias.items],
+            'categorias': [categoria.to_dict(campos) for categoria in categorias.items],
             'total': categorias.total,
             'pages': categorias.pages,
             'current_page': page
         }), 200
         
+    except CampoInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @categorias_bp.route('/<int:categoria_id>', methods=['GET'])
 @jwt_required()
+@condicional('categorias', 'productos')
 def get_categoria(categoria_id):
     """Obtener una categoría específica"""
     try:
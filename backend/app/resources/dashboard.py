@@ -0,0 +1,31 @@
+from datetime import datetime
+from flask import Blueprint, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from backend.app import cache
+from backend.app.services.dashboard import resumen_dashboard, TABLAS_RESUMEN
+from backend.app.utils.versiones import condicional, obtener_version
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+@dashboard_bp.route('/resumen', methods=['GET'])
+@jwt_required()
+@condicional(*TABLAS_RESUMEN)
+def get_resumen():
+    """Obtener los totales del dashboard en una sola respuesta"""
+    try:
+        # La clave incluye las versiones de las tablas: un cambio invalida el resumen
+        versiones = ':'.join(str(obtener_version(tabla)) for tabla in TABLAS_RESUMEN)
+        clave = f'dashboard:resumen:{versiones}'
+        data = cache.get(clave)
+
+        if data is None:
+            data = {
+                'fecha_generacion': datetime.now().isoformat(),
+                **resumen_dashboard()
+            }
+            cache.set(clave, data, current_app.config['DASHBOARD_CACHE_TTL'])
+
+        return jsonify(data), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,15 +1,19 @@
-from datetime import datetime, date
-from flask import Blueprint, request, jsonify
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend.app import db
 from backend.app.models.movimiento import Movimiento
 from backend.app.models.producto import Producto
 from backend.app.models.usuario import Usuario
+from backend.app.services import series, movimientos_diarios
+from backend.app.utils.versiones import condicional
+from backend.app.utils.campos import parsear_campos, opciones_carga, CampoInvalido
 
 movimientos_bp = Blueprint('movimientos', __name__)
 
 @movimientos_bp.route('', methods=['GET'])
 @jwt_required()
+@condicional('movimientos', 'productos', 'usuarios')
 def get_movimientos():
     """Obtener historial de movimientos con filtros"""
     try:
@@ -17,11 +21,14 @@ def get_movimientos():
         per_page = request.args.get('per_page', 20, type=int)
         producto_id = request.args.get('producto_id', type=int)
         usuario_id = request.args.get('usuario_id', type=int)
+        almacen_id = request.args.get('almacen_id', type=int)
         tipo = request.args.get('tipo')
         fecha_desde = request.args.get('fecha_desde')
         fecha_hasta = request.args.get('fecha_hasta')
         
-        query = Movimiento.query
+        campos = parsear_campos(Movimiento)
+        
+        query = Movimiento.query.options(*opciones_carga(Movimiento, campos))
         
         # Aplicar filtros
         if producto_id:
@@ -30,6 +37,9 @@ def get_movimientos():
         if usuario_id:
             query = query.filter_by(usuario_id=usuario_id)
         
+        if almacen_id:
+            query = query.filter_by(almacen_id=almacen_id)
+        
         if tipo:
             query = query.filter_by(tipo=tipo)
         
@@ -51,17 +61,20 @@ def get_movimientos():
         )
         
         return jsonify({
-            'movimientos': [movimiento.to_dict() for movimiento in movimientos.items],
+            'movimientos': [movimiento.to_dict(campos) for movimiento in movimientos.items],
             'total': movimientos.total,
             'pages': movimientos.pages,
             'current_page': page
         }), 200
         
+    except CampoInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @movimientos_bp.route('/<int:movimiento_id>', methods=['GET'])
 @jwt_required()
+@condicional('movimientos', 'productos', 'usuarios')
 def get_movimiento(movimiento_id):
     """Obtener un movimiento específico"""
     try:
@@ -77,6 +90,7 @@ def get_movimiento(movimiento_id):
 
 @movimientos_bp.route('/producto/<int:producto_id>', methods=['GET'])
 @jwt_required()
+@condicional('movimientos', 'productos', 'usuarios')
 def get_movimientos_producto(producto_id):
     """Obtener historial de movimientos de un producto específico"""
     try:
@@ -105,75 +119,31 @@ def get_movimientos_producto(producto_id):
 
 @movimientos_bp.route('/estadisticas', methods=['GET'])
 @jwt_required()
+@condicional('movimientos', 'movimientos_diarios')
 def get_estadisticas_movimientos():
     """Obtener estadísticas de movimientos"""
     try:
         fecha_desde = request.args.get('fecha_desde')
         fecha_hasta = request.args.get('fecha_hasta')
         
-        query = Movimiento.query
-        
-        # Aplicar filtros de fecha si se proporcionan
-        if fecha_desde:
-            fecha_desde_dt = datetime.strptime(fecha_desde, '%Y-%m-%d')
-            query = query.filter(Movimiento.fecha_movimiento >= fecha_desde_dt)
-        
-        if fecha_hasta:
-            fecha_hasta_dt = datetime.strptime(fecha_hasta, '%Y-%m-%d')
-            fecha_hasta_dt = fecha_hasta_dt.replace(hour=23, minute=59, second=59)
-            query = query.filter(Movimiento.fecha_movimiento <= fecha_hasta_dt)
-        
-        # Contar movimientos por tipo
-        total_entradas = query.filter_by(tipo='entrada').count()
-        total_salidas = query.filter_by(tipo='salida').count()
-        total_ajustes = query.filter_by(tipo='ajuste').count()
-        
-        # Calcular valores monetarios (solo si tienen precio_unitario)
-        valor_entradas = db.session.query(db.func.sum(
-            Movimiento.cantidad * Movimiento.precio_unitario
-        )).filter(
-            Movimiento.tipo == 'entrada',
-            Movimiento.precio_unitario.isnot(None)
-        )
-        
-        if fecha_desde:
-            valor_entradas = valor_entradas.filter(
-                Movimiento.fecha_movimiento >= fecha_desde_dt
-            )
-        if fecha_hasta:
-            valor_entradas = valor_entradas.filter(
-                Movimiento.fecha_movimiento <= fecha_hasta_dt
-            )
-        
-        valor_entradas = valor_entradas.scalar() or 0
-        
-        valor_salidas = db.session.query(db.func.sum(
-            Movimiento.cantidad * Movimiento.precio_unitario
-        )).filter(
-            Movimiento.tipo == 'salida',
-            Movimiento.precio_unitario.isnot(None)
+        # Totales por tipo desde los totales diarios (una fila por día, producto y tipo)
+        totales = movimientos_diarios.totales_por_tipo(
+            datetime.strptime(fecha_desde, '%Y-%m-%d').date() if fecha_desde else None,
+            datetime.strptime(fecha_hasta, '%Y-%m-%d').date() if fecha_hasta else None
         )
-        
-        if fecha_desde:
-            valor_salidas = valor_salidas.filter(
-                Movimiento.fecha_movimiento >= fecha_desde_dt
-            )
-        if fecha_hasta:
-            valor_salidas = valor_salidas.filter(
-                Movimiento.fecha_movimiento <= fecha_hasta_dt
-            )
-        
-        valor_salidas = valor_salidas.scalar() or 0
+        total_entradas, _, valor_entradas = totales.get('entrada', (0, 0, 0.0))
+        total_salidas, _, valor_salidas = totales.get('salida', (0, 0, 0.0))
+        total_ajustes, _, _ = totales.get('ajuste', (0, 0, 0.0))
         
         return jsonify({
             'total_movimientos': total_entradas + total_salidas + total_ajustes,
             'entradas': {
                 'cantidad': total_entradas,
-                'valor': float(valor_entradas)
+                'valor': valor_entradas
             },
             'salidas': {
                 'cantidad': total_salidas,
-                'valor': float(valor_salidas)
+                'valor': valor_salidas
             },
             'ajustes': {
                 'cantidad': total_ajustes
@@ -186,3 +156,38 @@ def get_estadisticas_movimientos():
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@movimientos_bp.route('/serie', methods=['GET'])
+@jwt_required()
+@condicional('movimientos', 'movimientos_diarios', diario=True)
+def get_serie_movimientos():
+    """Obtener entradas, salidas y ajustes por intervalo de días"""
+    try:
+        fecha_hasta = request.args.get('fecha_hasta')
+        fecha_desde = request.args.get('fecha_desde')
+        intervalo = request.args.get('intervalo', 1, type=int)
+        
+        # Por defecto los últimos 7 días
+        hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date() if fecha_hasta else datetime.utcnow().date()
+        desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date() if fecha_desde else hasta - timedelta(days=6)
+        
+        if desde > hasta:
+            return jsonify({'error': 'fecha_desde debe ser anterior a fecha_hasta'}), 400
+        
+        if intervalo < 1:
+            return jsonify({'error': 'intervalo debe ser mayor a 0'}), 400
+        
+        if (hasta - desde).days >= current_app.config['MOVIMIENTOS_SERIE_MAX_DIAS']:
+            return jsonify({'error': 'El periodo solicitado es demasiado largo'}), 400
+        
+        return jsonify({
+            'periodo': {
+                'fecha_desde': desde.isoformat(),
+                'fecha_hasta': hasta.isoformat(),
+                'intervalo': intervalo
+            },
+            'serie': series.serie_movimientos(desde, hasta, intervalo)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
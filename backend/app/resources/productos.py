@@ -1,28 +1,41 @@
-from datetime import datetime, date
+from datetime import datetime
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from backend.app import db
+from backend.app import db, eventos
 from backend.app.models.producto import Producto
 from backend.app.models.categoria import Categoria
 from backend.app.models.usuario import Usuario
 from backend.app.models.movimiento import Movimiento
+from backend.app.models.almacen import Almacen
+from backend.app.models.stock_almacen import StockAlmacen
+from backend.app.utils.versiones import condicional
+from backend.app.utils.campos import parsear_campos, opciones_carga, CampoInvalido
+from backend.app.utils.idempotencia import idempotente
+from backend.app.services.vencimientos import sincronizar_lote_principal, productos_vencidos
+from backend.app.services.lotes import registrar_lotes, lotes_fefo, StockInsuficiente
+from backend.app.services.almacenes import registrar_almacen, stock_ajustado, AlmacenRequerido
+from backend.app.services.movimientos_diarios import registrar_movimiento_diario
 
 productos_bp = Blueprint('productos', __name__)
 
 @productos_bp.route('', methods=['GET'])
 @jwt_required()
+@condicional('productos', 'categorias', 'lotes', 'stock_almacenes', diario=True)
 def get_productos():
     """Obtener todos los productos con filtros"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         categoria_id = request.args.get('categoria_id', type=int)
+        almacen_id = request.args.get('almacen_id', type=int)
         activos_only = request.args.get('activos_only', 'true').lower() == 'true'
         stock_bajo = request.args.get('stock_bajo', 'false').lower() == 'true'
         vencidos = request.args.get('vencidos', 'false').lower() == 'true'
         search = request.args.get('search', '')
         
-        query = Producto.query
+        campos = parsear_campos(Producto)
+        
+        query = Producto.query.options(*opciones_carga(Producto, campos))
         
         # Aplicar filtros
         if activos_only:
@@ -31,11 +44,19 @@ def get_productos():
         if categoria_id:
             query = query.filter_by(categoria_id=categoria_id)
         
+        if almacen_id:
+            # Productos con stock en el almacén (búsqueda por índice en stock_almacenes)
+            query = query.join(StockAlmacen, db.and_(
+                StockAlmacen.producto_id == Producto.id,
+                StockAlmacen.almacen_id == almacen_id
+            )).filter(StockAlmacen.cantidad > 0).add_columns(StockAlmacen.cantidad)
+        
         if stock_bajo:
-            query = query.filter(Producto.stock_actual <= Producto.stock_minimo)
+            query = query.filter(Producto.stock_actual <= Producto.umbral_reorden)
         
         if vencidos:
-            query = query.filter(Producto.fecha_vencimiento < date.today())
+            # Productos con algún lote vencido que todavía tiene stock
+            query = query.filter(Producto.id.in_(productos_vencidos()))
         
         if search:
             query = query.filter(
@@ -50,18 +71,29 @@ def get_productos():
             page=page, per_page=per_page, error_out=False
         )
         
+        if almacen_id:
+            registros = [
+                {**producto.to_dict(campos), 'stock_almacen': cantidad}
+                for producto, cantidad in productos.items
+            ]
+        else:
+            registros = [producto.to_dict(campos) for producto in productos.items]
+        
         return jsonify({
-            'productos': [producto.to_dict() for producto in productos.items],
+            'productos': registros,
             'total': productos.total,
             'pages': productos.pages,
             'current_page': page
         }), 200
         
+    except CampoInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @productos_bp.route('/<int:producto_id>', methods=['GET'])
 @jwt_required()
+@condicional('productos', 'categorias', diario=True)
 def get_producto(producto_id):
     """Obtener un producto específico"""
     try:
@@ -120,6 +152,8 @@ def create_producto():
         )
         
         db.session.add(producto)
+        db.session.flush()
+        sincronizar_lote_principal(producto)
         db.session.commit()
         
         return jsonify({
@@ -191,12 +225,16 @@ def update_producto(producto_id):
             else:
                 producto.fecha_vencimiento = None
 
+        lote_anterior = producto.lote
         if 'lote' in data:
             producto.lote = data['lote']
 
         if 'activo' in data:
             producto.activo = data['activo']
 
+        if 'fecha_vencimiento' in data or 'lote' in data:
+            sincronizar_lote_principal(producto, lote_anterior)
+
         db.session.commit()
 
         return jsonify({
@@ -210,6 +248,7 @@ def update_producto(producto_id):
 
 @productos_bp.route('/<int:producto_id>/stock', methods=['POST'])
 @jwt_required()
+@idempotente
 def actualizar_stock(producto_id):
     """Actualizar stock de producto (entrada, salida o ajuste)"""
     try:
@@ -219,7 +258,9 @@ def actualizar_stock(producto_id):
         if not usuario:
             return jsonify({'error': 'Usuario no encontrado'}), 404
 
-        producto = Producto.query.get(producto_id)
+        # Bloquear el producto: stock_anterior y la asignación de lotes no
+        # deben intercalarse con otro movimiento del mismo producto
+        producto = Producto.query.filter_by(id=producto_id).with_for_update().first()
 
         if not producto:
             return jsonify({'error': 'Producto no encontrado'}), 404
@@ -243,6 +284,16 @@ def actualizar_stock(producto_id):
         if tipo == 'salida' and producto.stock_actual < cantidad:
             return jsonify({'error': 'Stock insuficiente'}), 400
 
+        almacen = None
+        if data.get('almacen_id'):
+            almacen = Almacen.query.get(data['almacen_id'])
+            if not almacen:
+                return jsonify({'error': 'Almacén no encontrado'}), 404
+
+        # Un ajuste es el conteo del almacén: el movimiento lleva el nuevo total
+        if tipo == 'ajuste':
+            almacen, cantidad = stock_ajustado(producto, cantidad, almacen)
+
         # Guardar stock anterior
         stock_anterior = producto.stock_actual
 
@@ -259,18 +310,68 @@ def actualizar_stock(producto_id):
             observaciones=data.get('observaciones')
         )
 
+        # Repartir el movimiento entre lotes (FEFO en las salidas)
+        fecha_vencimiento = data.get('fecha_vencimiento')
+        asignaciones = registrar_lotes(
+            producto, movimiento,
+            codigo_lote=data.get('lote'),
+            fecha_vencimiento=datetime.strptime(fecha_vencimiento, '%Y-%m-%d').date() if fecha_vencimiento else None
+        )
+
+        # Stock del almacén (predeterminado si no se indica)
+        registrar_almacen(producto, movimiento, almacen)
+
         # Actualizar stock del producto
         producto.stock_actual = movimiento.stock_posterior
 
         db.session.add(movimiento)
+        registrar_movimiento_diario(movimiento)
         db.session.commit()
 
+        eventos.publicar('stock', {
+            'producto_id': producto.id,
+            'codigo': producto.codigo,
+            'nombre': producto.nombre,
+            'tipo': tipo,
+            'cantidad': cantidad,
+            'almacen_id': movimiento.almacen_id,
+            'stock_anterior': stock_anterior,
+            'stock_actual': producto.stock_actual,
+            'necesita_restock': producto.necesita_restock
+        })
+
         return jsonify({
             'message': 'Stock actualizado exitosamente',
             'producto': producto.to_dict(),
-            'movimiento': movimiento.to_dict()
+            'movimiento': movimiento.to_dict(),
+            'lotes': [asignacion.to_dict() for asignacion in asignaciones]
         }), 200
 
+    except (StockInsuficiente, AlmacenRequerido) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+
+@productos_bp.route('/<int:producto_id>/lotes', methods=['GET'])
+@jwt_required()
+@condicional('lotes', 'productos')
+def get_lotes_producto(producto_id):
+    """Obtener los lotes con stock de un producto en orden FEFO"""
+    try:
+        producto = Producto.query.get(producto_id)
+
+        if not producto:
+            return jsonify({'error': 'Producto no encontrado'}), 404
+
+        lotes = lotes_fefo(producto.id)
+
+        return jsonify({
+            'producto_id': producto.id,
+            'stock_actual': producto.stock_actual,
+            'lotes': [lote.to_dict() for lote in lotes]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
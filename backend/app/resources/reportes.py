@@ -1,11 +1,13 @@
 from datetime import datetime, date, timedelta
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from backend.app import db
+from backend.app import db, cache
 from backend.app.models.producto import Producto
 from backend.app.models.movimiento import Movimiento
 from backend.app.models.categoria import Categoria
 from backend.app.models.usuario import Usuario
+from backend.app.services import analitica, rotacion, lecturas
+from backend.app.utils.versiones import condicional
 import pandas as pd
 import io
 from reportlab.lib.pagesizes import letter, A4
@@ -17,34 +19,23 @@ reportes_bp = Blueprint('reportes', __name__)
 
 @reportes_bp.route('/inventario', methods=['GET'])
 @jwt_required()
+@condicional('productos', 'categorias', 'stock_almacenes', diario=True)
 def reporte_inventario():
-    """Generar reporte de inventario actual"""
+    """Generar reporte de inventario actual (opcionalmente de un almacén)"""
     try:
         categoria_id = request.args.get('categoria_id', type=int)
+        almacen_id = request.args.get('almacen_id', type=int)
         formato = request.args.get('formato', 'json')  # json, excel, pdf
         
-        query = Producto.query.filter_by(activo=True)
-        
-        if categoria_id:
-            query = query.filter_by(categoria_id=categoria_id)
-        
-        productos = query.all()
-        
-        # Calcular totales
-        total_productos = len(productos)
-        valor_total_inventario = sum(producto.valor_inventario for producto in productos)
-        productos_stock_bajo = sum(1 for producto in productos if producto.necesita_restock)
-        productos_sin_stock = sum(1 for producto in productos if producto.stock_actual == 0)
+        # Filas livianas de Core en lugar de instancias del ORM
+        productos = lecturas.productos_a_registros(
+            lecturas.leer_productos(categoria_id, almacen_id=almacen_id)
+        )
         
         data = {
             'fecha_generacion': datetime.now().isoformat(),
-            'resumen': {
-                'total_productos': total_productos,
-                'valor_total_inventario': valor_total_inventario,
-                'productos_stock_bajo': productos_stock_bajo,
-                'productos_sin_stock': productos_sin_stock
-            },
-            'productos': [producto.to_dict() for producto in productos]
+            'resumen': lecturas.resumen_inventario(productos),
+            'productos': productos
         }
         
         if formato == 'json':
@@ -52,7 +43,7 @@ def reporte_inventario():
         
         elif formato == 'excel':
             # Crear DataFrame
-            df_productos = pd.DataFrame([producto.to_dict() for producto in productos])
+            df_productos = pd.DataFrame(productos)
             
             # Crear archivo Excel en memoria
             output = io.BytesIO()
@@ -119,12 +110,12 @@ def reporte_inventario():
             
             for producto in productos_limitados:
                 productos_data.append([
-                    producto.codigo,
-                    producto.nombre[:30] + '...' if len(producto.nombre) > 30 else producto.nombre,
-                    producto.categoria.nombre if producto.categoria else 'N/A',
-                    str(producto.stock_actual),
-                    f"${producto.precio_compra or 0:.2f}",
-                    f"${producto.valor_inventario:.2f}"
+                    producto['codigo'],
+                    producto['nombre'][:30] + '...' if len(producto['nombre']) > 30 else producto['nombre'],
+                    producto['categoria_nombre'] or 'N/A',
+                    str(producto['stock_actual']),
+                    f"${producto['precio_compra'] or 0:.2f}",
+                    f"${producto['valor_inventario']:.2f}"
                 ])
             
             productos_table = Table(productos_data)
@@ -165,12 +156,14 @@ def reporte_inventario():
 
 @reportes_bp.route('/movimientos', methods=['GET'])
 @jwt_required()
+@condicional('movimientos', 'movimientos_diarios', 'productos', 'usuarios', diario=True)
 def reporte_movimientos():
     """Generar reporte de movimientos de stock"""
     try:
         fecha_desde = request.args.get('fecha_desde')
         fecha_hasta = request.args.get('fecha_hasta')
         producto_id = request.args.get('producto_id', type=int)
+        almacen_id = request.args.get('almacen_id', type=int)
         tipo = request.args.get('tipo')
         formato = request.args.get('formato', 'json')
         
@@ -180,60 +173,39 @@ def reporte_movimientos():
         if not fecha_hasta:
             fecha_hasta = date.today().strftime('%Y-%m-%d')
         
-        query = Movimiento.query
+        detalle = request.args.get('detalle', 'true').lower() == 'true'
+        top = request.args.get('top', 10, type=int)
         
-        # Aplicar filtros
         fecha_desde_dt = datetime.strptime(fecha_desde, '%Y-%m-%d')
         fecha_hasta_dt = datetime.strptime(fecha_hasta, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
         
-        query = query.filter(
-            Movimiento.fecha_movimiento.between(fecha_desde_dt, fecha_hasta_dt)
+        # El detalle siempre se necesita para exportar a Excel
+        reporte = analitica.reporte_movimientos(
+            fecha_desde_dt, fecha_hasta_dt,
+            producto_id=producto_id,
+            tipo=tipo,
+            detalle=detalle or formato == 'excel',
+            top=top,
+            almacen_id=almacen_id
         )
         
-        if producto_id:
-            query = query.filter_by(producto_id=producto_id)
-        
-        if tipo:
-            query = query.filter_by(tipo=tipo)
-        
-        movimientos = query.order_by(Movimiento.fecha_movimiento.desc()).all()
-        
-        # Calcular estadísticas
-        total_entradas = sum(1 for m in movimientos if m.tipo == 'entrada')
-        total_salidas = sum(1 for m in movimientos if m.tipo == 'salida')
-        total_ajustes = sum(1 for m in movimientos if m.tipo == 'ajuste')
-        
-        valor_entradas = sum(m.valor_total for m in movimientos if m.tipo == 'entrada' and m.precio_unitario)
-        valor_salidas = sum(m.valor_total for m in movimientos if m.tipo == 'salida' and m.precio_unitario)
-        
         data = {
             'fecha_generacion': datetime.now().isoformat(),
             'periodo': {
                 'fecha_desde': fecha_desde,
                 'fecha_hasta': fecha_hasta
             },
-            'resumen': {
-                'total_movimientos': len(movimientos),
-                'entradas': {
-                    'cantidad': total_entradas,
-                    'valor': valor_entradas
-                },
-                'salidas': {
-                    'cantidad': total_salidas,
-                    'valor': valor_salidas
-                },
-                'ajustes': {
-                    'cantidad': total_ajustes
-                }
-            },
-            'movimientos': [movimiento.to_dict() for movimiento in movimientos]
+            'resumen': reporte['resumen'],
+            'por_producto': reporte['por_producto'],
+            'top_productos': reporte['top_productos'],
+            'movimientos': reporte.get('movimientos', [])
         }
         
         if formato == 'json':
             return jsonify(data), 200
         
         elif formato == 'excel':
-            df_movimientos = pd.DataFrame([movimiento.to_dict() for movimiento in movimientos])
+            df_movimientos = pd.DataFrame(data['movimientos'], columns=analitica.COLUMNAS_DETALLE)
             
             output = io.BytesIO()
             with pd.ExcelWriter(output, engine='openpyxl') as writer:
@@ -256,3 +228,86 @@ def reporte_movimientos():
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@reportes_bp.route('/rotacion', methods=['GET'])
+@jwt_required()
+@condicional('movimientos', 'productos', 'categorias', diario=True)
+def reporte_rotacion():
+    """Generar análisis ABC, rotación y días de cobertura del catálogo"""
+    try:
+        fecha_desde = request.args.get('fecha_desde')
+        fecha_hasta = request.args.get('fecha_hasta')
+        categoria_id = request.args.get('categoria_id', type=int)
+        formato = request.args.get('formato', 'json')
+        refrescar = request.args.get('refrescar', 'false').lower() == 'true'
+        
+        # Fechas por defecto (últimos 90 días)
+        if not fecha_desde:
+            fecha_desde = (date.today() - timedelta(days=90)).strftime('%Y-%m-%d')
+        if not fecha_hasta:
+            fecha_hasta = date.today().strftime('%Y-%m-%d')
+        
+        fecha_desde_dt = datetime.strptime(fecha_desde, '%Y-%m-%d')
+        fecha_hasta_dt = datetime.strptime(fecha_hasta, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+        
+        if fecha_desde_dt > fecha_hasta_dt:
+            return jsonify({'error': 'fecha_desde debe ser anterior a fecha_hasta'}), 400
+        
+        umbral_a = current_app.config['ABC_UMBRAL_A']
+        umbral_b = current_app.config['ABC_UMBRAL_B']
+        
+        # Cachear por ventana de fechas y categoría
+        clave = f'reportes:rotacion:{fecha_desde}:{fecha_hasta}:{categoria_id or "todas"}:{umbral_a}:{umbral_b}'
+        data = None if refrescar else cache.get(clave)
+        
+        if data is None:
+            analisis = rotacion.calcular_rotacion(
+                fecha_desde_dt, fecha_hasta_dt,
+                categoria_id=categoria_id,
+                umbral_a=umbral_a,
+                umbral_b=umbral_b
+            )
+            data = {
+                'fecha_generacion': datetime.now().isoformat(),
+                'periodo': {
+                    'fecha_desde': fecha_desde,
+                    'fecha_hasta': fecha_hasta,
+                    'dias': analisis['dias']
+                },
+                'umbrales': {
+                    'A': umbral_a,
+                    'B': umbral_b
+                },
+                'resumen': analisis['resumen'],
+                'productos': analisis['productos']
+            }
+            cache.set(clave, data, current_app.config['ROTACION_CACHE_TTL'])
+        
+        if formato == 'json':
+            return jsonify(data), 200
+        
+        elif formato == 'excel':
+            df_productos = pd.DataFrame(data['productos'], columns=rotacion.COLUMNAS_PRODUCTO)
+            df_resumen = pd.DataFrame([
+                {'clase': clase, **valores} for clase, valores in data['resumen'].items()
+            ])
+            
+            output = io.BytesIO()
+            with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                df_productos.to_excel(writer, sheet_name='Rotacion', index=False)
+                df_resumen.to_excel(writer, sheet_name='Resumen ABC', index=False)
+            
+            output.seek(0)
+            
+            return send_file(
+                output,
+                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                as_attachment=True,
+                download_name=f'rotacion_{fecha_desde}_{fecha_hasta}.xlsx'
+            )
+        
+        else:
+            return jsonify({'error': 'Formato no soportado. Use: json, excel'}), 400
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
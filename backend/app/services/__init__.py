@@ -0,0 +1 @@
+# Servicios de dominio (lógica compartida entre recursos y tareas)
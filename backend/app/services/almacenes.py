@@ -0,0 +1,218 @@
+"""
+Stock por almacén
+
+stock_almacenes guarda las unidades de cada producto en cada almacén, con
+clave única (almacen_id, producto_id): los filtros por almacén de listados y
+reportes son una búsqueda por índice en lugar de sumar movimientos.
+
+Cada movimiento indica su almacén (o usa el predeterminado) y aplica su
+diferencia a la fila del almacén y a los totales del almacén
+(total_unidades, productos_con_stock) con UPDATE incrementales. Una
+transferencia son dos movimientos con la misma referencia: una salida en el
+almacén de origen y una entrada en el de destino, sin cambiar el stock
+total del producto ni sus lotes.
+
+Un ajuste es el conteo físico de un almacén: el stock total del producto
+cambia en la diferencia entre lo contado y lo registrado en ese almacén.
+Si el producto tiene stock en más de un almacén, el ajuste debe indicarlo.
+"""
+
+from uuid import uuid4
+from flask import current_app
+from sqlalchemy import select, func, insert, update, exists
+from backend.app import db
+from backend.app.models.producto import Producto
+from backend.app.models.movimiento import Movimiento
+from backend.app.models.almacen import Almacen
+from backend.app.models.stock_almacen import StockAlmacen
+from backend.app.services.lotes import StockInsuficiente
+from backend.app.utils.versiones import marcar_modificadas
+
+
+class AlmacenRequerido(ValueError):
+    """El producto tiene stock en varios almacenes y el ajuste no indica cuál"""
+
+
+def almacen_predeterminado():
+    """Almacén configurado en ALMACEN_PREDETERMINADO (se crea si no existe)"""
+    codigo = current_app.config['ALMACEN_PREDETERMINADO']
+    almacen = Almacen.query.filter_by(codigo=codigo).first()
+    if almacen is None:
+        almacen = Almacen(codigo=codigo, nombre='Almacén principal')
+        db.session.add(almacen)
+        db.session.flush()
+    return almacen
+
+
+def aplicar_stock_almacen(almacen, producto_id, diferencia):
+    """
+    Sumar diferencia (con signo) al stock del producto en el almacén y a los
+    totales del almacén.
+
+    Lanza StockInsuficiente si el almacén quedaría con stock negativo.
+    """
+    existencia = StockAlmacen.query.filter_by(almacen_id=almacen.id, producto_id=producto_id)\
+        .with_for_update().first()
+    if existencia is None:
+        existencia = StockAlmacen(almacen_id=almacen.id, producto_id=producto_id)
+        db.session.add(existencia)
+
+    anterior = existencia.cantidad or 0
+    nueva = anterior + diferencia
+    if nueva < 0:
+        raise StockInsuficiente(
+            f'Stock insuficiente en el almacén {almacen.codigo}: hay {anterior} unidades'
+        )
+    existencia.cantidad = nueva
+
+    # UPDATE relativo: no pisa los cambios concurrentes de otros movimientos
+    db.session.execute(
+        update(Almacen).where(Almacen.id == almacen.id).values(
+            total_unidades=Almacen.total_unidades + diferencia,
+            productos_con_stock=Almacen.productos_con_stock + (int(nueva > 0) - int(anterior > 0))
+        )
+    )
+    return existencia
+
+
+def _asegurar_stock_almacen(producto):
+    """Productos anteriores al stock por almacén: todo su stock en el predeterminado"""
+    if producto.stock_actual and not db.session.query(
+        exists().where(StockAlmacen.producto_id == producto.id)
+    ).scalar():
+        aplicar_stock_almacen(almacen_predeterminado(), producto.id, producto.stock_actual)
+
+
+def registrar_almacen(producto, movimiento, almacen=None):
+    """
+    Aplicar un movimiento al stock del almacén indicado (o al predeterminado).
+
+    Se llama con producto.stock_actual todavía igual a stock_anterior.
+    Lanza StockInsuficiente si el almacén no tiene stock para el egreso.
+    """
+    _asegurar_stock_almacen(producto)
+    almacen = almacen or almacen_predeterminado()
+    movimiento.almacen_id = almacen.id
+    return aplicar_stock_almacen(almacen, producto.id, movimiento.stock_posterior - movimiento.stock_anterior)
+
+
+def stock_ajustado(producto, contado, almacen=None):
+    """
+    Traducir el conteo físico de un almacén al stock total del producto
+    (la cantidad de un movimiento de ajuste).
+
+    Sin almacén se usa el único almacén con stock del producto, o el
+    predeterminado si no tiene stock. Devuelve (almacen, stock_total).
+    Lanza AlmacenRequerido si el producto tiene stock en varios almacenes.
+    """
+    _asegurar_stock_almacen(producto)
+    if almacen is None:
+        con_stock = StockAlmacen.query.filter(
+            StockAlmacen.producto_id == producto.id, StockAlmacen.cantidad > 0
+        ).all()
+        if len(con_stock) > 1:
+            raise AlmacenRequerido(
+                'El producto tiene stock en varios almacenes: indique almacen_id del conteo'
+            )
+        almacen = db.session.get(Almacen, con_stock[0].almacen_id) if con_stock else almacen_predeterminado()
+
+    registrado = db.session.execute(
+        select(StockAlmacen.cantidad).where(
+            StockAlmacen.almacen_id == almacen.id, StockAlmacen.producto_id == producto.id
+        )
+    ).scalar() or 0
+    return almacen, producto.stock_actual - registrado + contado
+
+
+def almacen_de_correccion(producto, diferencia):
+    """
+    Almacén al que se aplica una corrección del stock total: el
+    predeterminado si suma unidades, el que tiene más stock si las resta.
+    """
+    _asegurar_stock_almacen(producto)
+    if diferencia >= 0:
+        return almacen_predeterminado()
+    mayor = StockAlmacen.query.filter(StockAlmacen.producto_id == producto.id)\
+        .order_by(StockAlmacen.cantidad.desc(), StockAlmacen.almacen_id).first()
+    return db.session.get(Almacen, mayor.almacen_id) if mayor else almacen_predeterminado()
+
+
+def transferir(producto, origen, destino, cantidad, usuario_id, motivo=None, referencia=None):
+    """
+    Mover unidades de un almacén a otro como un par salida/entrada marcado
+    como transferencia. El par no cambia el stock total, así que no suma a
+    los totales diarios ni cuenta como demanda o consumo.
+
+    Devuelve (salida, entrada). No confirma la sesión.
+    """
+    referencia = referencia or f'TRF-{uuid4().hex[:12].upper()}'
+    _asegurar_stock_almacen(producto)
+
+    salida = Movimiento(
+        producto_id=producto.id,
+        usuario_id=usuario_id,
+        tipo='salida',
+        cantidad=cantidad,
+        stock_anterior=producto.stock_actual,
+        motivo=motivo or 'Transferencia',
+        referencia=referencia,
+        observaciones=f'Transferencia a {destino.codigo}',
+        almacen_id=origen.id,
+        transferencia=True
+    )
+    entrada = Movimiento(
+        producto_id=producto.id,
+        usuario_id=usuario_id,
+        tipo='entrada',
+        cantidad=cantidad,
+        stock_anterior=salida.stock_posterior,
+        motivo=motivo or 'Transferencia',
+        referencia=referencia,
+        observaciones=f'Transferencia desde {origen.codigo}',
+        almacen_id=destino.id,
+        transferencia=True
+    )
+
+    aplicar_stock_almacen(origen, producto.id, -cantidad)
+    aplicar_stock_almacen(destino, producto.id, cantidad)
+
+    db.session.add_all([salida, entrada])
+    return salida, entrada
+
+
+def recalcular_totales():
+    """Recalcular total_unidades y productos_con_stock de todos los almacenes"""
+    unidades = select(func.coalesce(func.sum(StockAlmacen.cantidad), 0))\
+        .where(StockAlmacen.almacen_id == Almacen.id).scalar_subquery()
+    con_stock = select(func.count(StockAlmacen.id))\
+        .where(StockAlmacen.almacen_id == Almacen.id, StockAlmacen.cantidad > 0).scalar_subquery()
+    db.session.execute(
+        update(Almacen).values(total_unidades=unidades, productos_con_stock=con_stock),
+        execution_options={'synchronize_session': False}
+    )
+
+
+def reconstruir_stock_almacenes():
+    """
+    Asignar al almacén predeterminado el stock de los productos que no
+    tienen stock por almacén (INSERT ... SELECT) y recalcular los totales.
+
+    Devuelve la cantidad de filas creadas.
+    """
+    almacen = almacen_predeterminado()
+    sin_stock_almacen = ~exists().where(StockAlmacen.producto_id == Producto.id)
+    stmt = insert(StockAlmacen).from_select(
+        ['almacen_id', 'producto_id', 'cantidad', 'fecha_actualizacion'],
+        select(
+            db.literal(almacen.id),
+            Producto.id,
+            Producto.stock_actual,
+            func.now(),
+        ).where(sin_stock_almacen, Producto.stock_actual > 0)
+    )
+    resultado = db.session.execute(stmt)
+    recalcular_totales()
+    db.session.commit()
+    # Escrituras masivas: no pasan por los eventos de la sesión
+    marcar_modificadas(StockAlmacen.__tablename__, Almacen.__tablename__)
+    return resultado.rowcount
@@ -0,0 +1,293 @@
+"""
+Motor de reportes vectorizado sobre instantáneas columnares
+
+En lugar de cargar entidades ORM y recorrerlas varias veces en Python, los
+reportes leen solo las columnas necesarias directamente a DataFrames de
+pandas (con cursor del lado del servidor, por bloques volcados a columnas) y calculan
+resúmenes, agregados por producto y rankings con operaciones vectorizadas.
+Sin detalle ni filtro de almacén, el reporte parte de los totales diarios
+(movimientos_diarios) en lugar de los movimientos individuales.
+
+Las transferencias entre almacenes solo entran en los reportes de un
+almacén: en el total se compensan y no son entradas ni salidas reales.
+"""
+
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from backend.app import db
+from backend.app.models.movimiento import Movimiento
+from backend.app.models.producto import Producto
+from backend.app.models.usuario import Usuario
+from backend.app.services import movimientos_diarios
+
+TIPOS_MOVIMIENTO = ('entrada', 'salida', 'ajuste')
+
+# Columnas mínimas para resúmenes y agregados
+COLUMNAS_RESUMEN = ['id', 'producto_id', 'tipo', 'cantidad', 'precio_unitario']
+
+# Orden de columnas del detalle (mismo formato que Movimiento.to_dict)
+COLUMNAS_DETALLE = [
+    'id', 'producto_id', 'producto_codigo', 'producto_nombre', 'usuario_id',
+    'usuario_nombre', 'tipo', 'cantidad', 'precio_unitario', 'valor_total',
+    'motivo', 'referencia', 'observaciones', 'stock_anterior', 'stock_posterior',
+    'fecha_movimiento'
+]
+
+
+def _consulta_movimientos(fecha_desde_dt, fecha_hasta_dt, producto_id=None, tipo=None, detalle=True,
+                          almacen_id=None):
+    """Construir el SELECT con las columnas estrictamente necesarias"""
+    columnas = [
+        Movimiento.id,
+        Movimiento.producto_id,
+        Movimiento.tipo,
+        Movimiento.cantidad,
+        Movimiento.precio_unitario,
+    ]
+    if detalle:
+        columnas += [
+            Producto.codigo.label('producto_codigo'),
+            Producto.nombre.label('producto_nombre'),
+            Movimiento.usuario_id,
+            Usuario.nombre.label('usuario_nombre_pila'),
+            Usuario.apellido.label('usuario_apellido'),
+            Movimiento.motivo,
+            Movimiento.referencia,
+            Movimiento.observaciones,
+            Movimiento.stock_anterior,
+            Movimiento.stock_posterior,
+            Movimiento.fecha_movimiento,
+        ]
+
+    stmt = select(*columnas).where(
+        Movimiento.fecha_movimiento.between(fecha_desde_dt, fecha_hasta_dt)
+    )
+    if detalle:
+        stmt = stmt.outerjoin(Producto, Movimiento.producto_id == Producto.id)\
+            .outerjoin(Usuario, Movimiento.usuario_id == Usuario.id)
+    if producto_id:
+        stmt = stmt.where(Movimiento.producto_id == producto_id)
+    if tipo:
+        stmt = stmt.where(Movimiento.tipo == tipo)
+    if almacen_id:
+        stmt = stmt.where(Movimiento.almacen_id == almacen_id)
+    else:
+        stmt = stmt.where(Movimiento.transferencia == False)
+
+    return stmt.order_by(Movimiento.fecha_movimiento.desc(), Movimiento.id.desc())
+
+
+def _serie(valores):
+    """Columna leída a Series; los NUMERIC (Decimal) pasan a float64 como en read_sql"""
+    if any(isinstance(valor, Decimal) for valor in valores):
+        return pd.Series(np.array([np.nan if valor is None else float(valor) for valor in valores],
+                                  dtype='float64'))
+    return pd.Series(valores)
+
+
+def leer_dataframe(stmt, tamano_bloque=50000):
+    """
+    Leer un SELECT a un DataFrame usando cursor del lado del servidor.
+
+    El driver entrega el resultado por bloques (no lo carga completo en
+    memoria) y cada bloque se vuelca en listas por columna, de modo que no
+    se acumulan DataFrames parciales ni se concatenan copias.
+    """
+    conn = db.session.connection().execution_options(stream_results=True)
+    resultado = conn.execute(stmt)
+    columnas = list(resultado.keys())
+    valores = [[] for _ in columnas]
+    for bloque in resultado.partitions(tamano_bloque):
+        for lista, columna in zip(valores, zip(*bloque)):
+            lista.extend(columna)
+    return pd.DataFrame({nombre: _serie(lista) for nombre, lista in zip(columnas, valores)},
+                        columns=columnas)
+
+
+def cargar_movimientos(fecha_desde_dt, fecha_hasta_dt, producto_id=None, tipo=None,
+                       detalle=True, almacen_id=None):
+    """Cargar los movimientos del periodo como DataFrame columnar"""
+    stmt = _consulta_movimientos(fecha_desde_dt, fecha_hasta_dt, producto_id, tipo, detalle, almacen_id)
+    df = leer_dataframe(stmt)
+
+    if df.empty:
+        columnas = COLUMNAS_DETALLE if detalle else COLUMNAS_RESUMEN
+        df = pd.DataFrame({col: pd.Series(dtype=object) for col in columnas})
+
+    df['cantidad'] = pd.to_numeric(df['cantidad']).fillna(0).astype('int64')
+    df['precio_unitario'] = pd.to_numeric(df['precio_unitario'], errors='coerce').astype('float64')
+    # Mismo criterio que Movimiento.valor_total: sin precio el valor es 0
+    df['valor_total'] = (df['precio_unitario'].fillna(0) * df['cantidad']).astype('float64')
+    return df
+
+
+def _conteos(df):
+    """Los totales diarios ya traen la cantidad de movimientos de cada fila"""
+    return ('movimientos', 'sum') if 'movimientos' in df else ('cantidad', 'size')
+
+
+def cargar_totales_diarios(fecha_desde_dt, fecha_hasta_dt, producto_id=None, tipo=None):
+    """
+    Totales por producto y tipo del periodo desde movimientos_diarios, con
+    las columnas de cargar_movimientos(detalle=False) más 'movimientos'.
+
+    Las fechas se toman por día completo.
+    """
+    stmt = movimientos_diarios.consulta_por_producto(
+        fecha_desde_dt.date(), fecha_hasta_dt.date(), producto_id, tipo
+    )
+    df = leer_dataframe(stmt)
+    if df.empty:
+        df = pd.DataFrame({col: pd.Series(dtype=object)
+                           for col in ['producto_id', 'tipo', 'movimientos', 'cantidad', 'valor_total']})
+
+    df['movimientos'] = pd.to_numeric(df['movimientos']).fillna(0).astype('int64')
+    df['cantidad'] = pd.to_numeric(df['cantidad']).fillna(0).astype('int64')
+    df['valor_total'] = pd.to_numeric(df['valor_total']).fillna(0).astype('float64')
+    return df
+
+
+def resumir_movimientos(df):
+    """Resumen por tipo de movimiento en una sola agregación"""
+    agregado = df.groupby('tipo', observed=True).agg(
+        cantidad=_conteos(df),
+        valor=('valor_total', 'sum')
+    )
+
+    def fila(tipo):
+        if tipo in agregado.index:
+            return int(agregado.at[tipo, 'cantidad']), float(agregado.at[tipo, 'valor'])
+        return 0, 0.0
+
+    entradas, valor_entradas = fila('entrada')
+    salidas, valor_salidas = fila('salida')
+    ajustes, _ = fila('ajuste')
+
+    return {
+        'total_movimientos': int(df['movimientos'].sum()) if 'movimientos' in df else int(len(df)),
+        'entradas': {
+            'cantidad': entradas,
+            'valor': valor_entradas
+        },
+        'salidas': {
+            'cantidad': salidas,
+            'valor': valor_salidas
+        },
+        'ajustes': {
+            'cantidad': ajustes
+        }
+    }
+
+
+def agregar_por_producto(df):
+    """
+    Agregados por producto: movimientos, unidades y valor por tipo.
+
+    Devuelve un DataFrame indexado por producto_id.
+    """
+    columnas = ['movimientos', 'unidades_entrada', 'unidades_salida',
+                'valor_entradas', 'valor_salidas']
+    if df.empty:
+        return pd.DataFrame(columns=columnas, dtype='float64')
+
+    sumas = df.groupby(['producto_id', 'tipo'])[['cantidad', 'valor_total']].sum()\
+        .unstack('tipo', fill_value=0)\
+        .reindex(
+            columns=pd.MultiIndex.from_product([['cantidad', 'valor_total'], TIPOS_MOVIMIENTO]),
+            fill_value=0
+        )
+    agregado = pd.DataFrame({
+        'movimientos': df.groupby('producto_id').agg(movimientos=_conteos(df))['movimientos'],
+        'unidades_entrada': sumas[('cantidad', 'entrada')],
+        'unidades_salida': sumas[('cantidad', 'salida')],
+        'valor_entradas': sumas[('valor_total', 'entrada')],
+        'valor_salidas': sumas[('valor_total', 'salida')],
+    })
+
+    if 'producto_codigo' in df:
+        nombres = df.drop_duplicates('producto_id').set_index('producto_id')[['producto_codigo', 'producto_nombre']]
+        agregado = agregado.join(nombres)
+
+    return agregado
+
+
+def ranking(agregado, columna, top=10):
+    """Top-N de productos según una columna del agregado"""
+    if agregado.empty:
+        return agregado
+    return agregado[agregado[columna] > 0].nlargest(top, columna)
+
+
+def dataframe_a_registros(df):
+    """Convertir un DataFrame a lista de dicts con tipos nativos de Python"""
+    if df.empty:
+        return []
+    nombres = list(df.columns)
+    columnas = []
+    for nombre in nombres:
+        serie = df[nombre]
+        if serie.hasnans:
+            serie = serie.astype(object).where(serie.notna(), None)
+        columnas.append(serie.tolist())
+    return [dict(zip(nombres, fila)) for fila in zip(*columnas)]
+
+
+def agregado_a_registros(agregado):
+    """Serializar un agregado por producto"""
+    registros = dataframe_a_registros(agregado.reset_index())
+    for registro in registros:
+        registro['producto_id'] = int(registro['producto_id'])
+        registro['movimientos'] = int(registro['movimientos'])
+        registro['unidades_entrada'] = int(registro['unidades_entrada'])
+        registro['unidades_salida'] = int(registro['unidades_salida'])
+        registro['valor_entradas'] = float(registro['valor_entradas'])
+        registro['valor_salidas'] = float(registro['valor_salidas'])
+    return registros
+
+
+def detalle_movimientos(df):
+    """Detalle de movimientos con el mismo formato que Movimiento.to_dict"""
+    if df.empty:
+        return []
+
+    detalle = df.copy()
+    detalle['usuario_nombre'] = (
+        detalle['usuario_nombre_pila'].astype(object) + ' ' + detalle['usuario_apellido'].astype(object)
+    )
+    # Movimiento.to_dict devuelve None cuando el precio es nulo o cero
+    detalle['precio_unitario'] = detalle['precio_unitario'].where(detalle['precio_unitario'] != 0)
+    detalle['fecha_movimiento'] = pd.to_datetime(detalle['fecha_movimiento']).map(
+        lambda valor: valor.isoformat() if pd.notna(valor) else None
+    )
+    return dataframe_a_registros(detalle[COLUMNAS_DETALLE])
+
+
+def reporte_movimientos(fecha_desde_dt, fecha_hasta_dt, producto_id=None, tipo=None,
+                        detalle=True, top=10, almacen_id=None):
+    """
+    Calcular el reporte de movimientos del periodo.
+
+    Devuelve un dict con 'resumen', 'por_producto', 'top_productos' y, si se
+    solicita, 'movimientos' (detalle fila a fila).
+    """
+    if detalle or almacen_id:
+        df = cargar_movimientos(fecha_desde_dt, fecha_hasta_dt, producto_id, tipo, detalle,
+                                almacen_id=almacen_id)
+    else:
+        # Sin detalle basta con los totales diarios (días × productos con movimientos)
+        df = cargar_totales_diarios(fecha_desde_dt, fecha_hasta_dt, producto_id, tipo)
+    agregado = agregar_por_producto(df)
+
+    resultado = {
+        'resumen': resumir_movimientos(df),
+        'por_producto': agregado_a_registros(agregado),
+        'top_productos': {
+            'por_unidades_salida': agregado_a_registros(ranking(agregado, 'unidades_salida', top)),
+            'por_valor_salidas': agregado_a_registros(ranking(agregado, 'valor_salidas', top)),
+        }
+    }
+    if detalle:
+        resultado['movimientos'] = detalle_movimientos(df)
+    return resultado
@@ -0,0 +1,235 @@
+"""
+Conciliación del libro de movimientos con el stock de los productos
+
+Verifica en bloque, con funciones de ventana sobre movimientos ordenados por
+(fecha_movimiento, id) dentro de cada producto:
+
+- cadena:  stock_anterior de cada movimiento igual al stock_posterior del
+           movimiento previo (LAG). Un salto indica una actualización
+           perdida entre escrituras concurrentes.
+- calculo: stock_posterior coherente con el tipo y la cantidad.
+- saldo:   Producto.stock_actual igual al stock que resulta de reproducir
+           el libro: la cantidad del último ajuste (o 0) más las entradas y
+           menos las salidas posteriores.
+
+Los productos se revisan por rangos de id, opcionalmente en varios hilos
+(cada uno con su propia conexión). Con aplicar=True las diferencias de
+saldo se corrigen con movimientos de 'ajuste' al stock calculado, por
+lotes con un commit por lote.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select, func, case, and_, or_
+from backend.app import db
+from backend.app.models.producto import Producto
+from backend.app.models.movimiento import Movimiento
+from backend.app.services.lotes import registrar_lotes, StockInsuficiente
+from backend.app.services.almacenes import registrar_almacen, almacen_de_correccion
+from backend.app.services.movimientos_diarios import registrar_movimiento_diario
+from backend.app.utils.rangos import en_rango
+
+MOTIVO_CONCILIACION = 'Conciliación de stock'
+
+ORDEN_LIBRO = (Movimiento.fecha_movimiento, Movimiento.id)
+
+
+def consulta_saltos(desde, hasta):
+    """Movimientos con salto de cadena o stock_posterior mal calculado"""
+    previo = func.lag(Movimiento.stock_posterior).over(
+        partition_by=Movimiento.producto_id, order_by=ORDEN_LIBRO
+    )
+    libro = select(
+        Movimiento.id,
+        Movimiento.producto_id,
+        Movimiento.tipo,
+        Movimiento.cantidad,
+        Movimiento.stock_anterior,
+        Movimiento.stock_posterior,
+        Movimiento.fecha_movimiento,
+        Movimiento.motivo,
+        previo.label('posterior_previo'),
+    ).where(en_rango(Movimiento.producto_id, desde, hasta)).subquery()
+
+    calculado = case(
+        (libro.c.tipo == 'entrada', libro.c.stock_anterior + libro.c.cantidad),
+        (libro.c.tipo == 'salida', libro.c.stock_anterior - libro.c.cantidad),
+        else_=libro.c.cantidad
+    )
+    # Los ajustes de conciliación parten del stock registrado, no del libro
+    correctivo = and_(libro.c.tipo == 'ajuste', libro.c.motivo == MOTIVO_CONCILIACION)
+    return select(
+        libro.c.id.label('movimiento_id'),
+        libro.c.producto_id,
+        libro.c.fecha_movimiento,
+        libro.c.stock_anterior,
+        libro.c.stock_posterior,
+        libro.c.posterior_previo,
+        calculado.label('posterior_calculado'),
+    ).where(or_(
+        and_(libro.c.posterior_previo.isnot(None),
+             libro.c.stock_anterior != libro.c.posterior_previo,
+             ~func.coalesce(correctivo, False)),
+        libro.c.stock_posterior != calculado
+    )).order_by(libro.c.producto_id, libro.c.fecha_movimiento, libro.c.id)
+
+
+def consulta_saldos(desde, hasta):
+    """Productos cuyo stock_actual difiere del stock que resulta del libro"""
+    orden = func.row_number().over(partition_by=Movimiento.producto_id, order_by=ORDEN_LIBRO)
+    libro = select(
+        Movimiento.producto_id,
+        Movimiento.tipo,
+        Movimiento.cantidad,
+        orden.label('orden'),
+    ).where(en_rango(Movimiento.producto_id, desde, hasta)).subquery()
+
+    # Posición del último ajuste de cada producto (0 si no hay)
+    con_ajuste = select(
+        libro,
+        func.coalesce(func.max(case((libro.c.tipo == 'ajuste', libro.c.orden))).over(
+            partition_by=libro.c.producto_id
+        ), 0).label('orden_ajuste'),
+    ).subquery()
+
+    base = func.coalesce(func.max(case(
+        (con_ajuste.c.orden == con_ajuste.c.orden_ajuste, con_ajuste.c.cantidad)
+    )), 0)
+    variacion = func.coalesce(func.sum(case(
+        (con_ajuste.c.orden <= con_ajuste.c.orden_ajuste, 0),
+        (con_ajuste.c.tipo == 'entrada', con_ajuste.c.cantidad),
+        (con_ajuste.c.tipo == 'salida', -con_ajuste.c.cantidad),
+        else_=0
+    )), 0)
+    saldos = select(
+        con_ajuste.c.producto_id,
+        (base + variacion).label('stock_libro'),
+        func.count().label('movimientos'),
+    ).group_by(con_ajuste.c.producto_id).subquery()
+
+    stock_libro = func.coalesce(saldos.c.stock_libro, 0)
+    return select(
+        Producto.id.label('producto_id'),
+        Producto.codigo,
+        Producto.stock_actual,
+        stock_libro.label('stock_libro'),
+        func.coalesce(saldos.c.movimientos, 0).label('movimientos'),
+    ).outerjoin(saldos, saldos.c.producto_id == Producto.id)\
+        .where(en_rango(Producto.id, desde, hasta), Producto.stock_actual != stock_libro)\
+        .order_by(Producto.id)
+
+
+def verificar_rango(conexion, desde, hasta):
+    """Diferencias de saldo y saltos de cadena de los productos con id en [desde, hasta)"""
+    saldos = [dict(fila._mapping) for fila in conexion.execute(consulta_saldos(desde, hasta))]
+    saltos = [dict(fila._mapping) for fila in conexion.execute(consulta_saltos(desde, hasta))]
+    return saldos, saltos
+
+
+def _verificar_rango_aislado(engine, desde, hasta):
+    """verificar_rango con una conexión propia (para ejecutar en un hilo)"""
+    with engine.connect() as conexion:
+        return verificar_rango(conexion, desde, hasta)
+
+
+def rangos_de_productos(tamano_rango, desde=None, hasta=None):
+    """Partir el intervalo de ids de productos en rangos [desde, hasta)"""
+    minimo, maximo = db.session.execute(select(func.min(Producto.id), func.max(Producto.id))).one()
+    if minimo is None:
+        return []
+    desde = max(desde or minimo, minimo)
+    hasta = min(hasta or maximo + 1, maximo + 1)
+    return [(inicio, min(inicio + tamano_rango, hasta)) for inicio in range(desde, hasta, tamano_rango)]
+
+
+def aplicar_ajustes(diferencias, usuario_id, tamano_lote=500):
+    """
+    Registrar un ajuste al stock del libro por cada diferencia de saldo.
+
+    Cada producto se bloquea (SELECT ... FOR UPDATE) y su saldo se vuelve a
+    calcular antes de ajustar: si entre la verificación y el ajuste se
+    registró otro movimiento, se usa el saldo actual, y si la diferencia ya
+    no existe el producto se omite.
+
+    El ajuste pasa por los lotes como cualquier movimiento; la diferencia
+    se aplica al almacén predeterminado si suma unidades y al almacén con
+    más stock del producto si las resta. Hace commit cada tamano_lote ajustes. Devuelve (aplicados,
+    errores) donde errores es una lista de (producto_id, mensaje).
+    """
+    aplicados = 0
+    errores = []
+    for inicio in range(0, len(diferencias), tamano_lote):
+        for diferencia in diferencias[inicio:inicio + tamano_lote]:
+            producto_id = diferencia['producto_id']
+            producto = Producto.query.filter_by(id=producto_id)\
+                .with_for_update().populate_existing().first()
+            diferencia = db.session.execute(consulta_saldos(producto_id, producto_id + 1)).first()
+            if producto is None or diferencia is None:
+                continue
+            diferencia = diferencia._mapping
+
+            movimiento = Movimiento(
+                producto_id=producto.id,
+                usuario_id=usuario_id,
+                tipo='ajuste',
+                cantidad=diferencia['stock_libro'],
+                stock_anterior=producto.stock_actual,
+                motivo=MOTIVO_CONCILIACION,
+                observaciones=f"Stock registrado {producto.stock_actual}, "
+                              f"según movimientos {diferencia['stock_libro']}"
+            )
+            try:
+                with db.session.begin_nested():
+                    registrar_lotes(producto, movimiento)
+                    almacen = almacen_de_correccion(
+                        producto, diferencia['stock_libro'] - producto.stock_actual)
+                    registrar_almacen(producto, movimiento, almacen)
+                    producto.stock_actual = movimiento.stock_posterior
+                    db.session.add(movimiento)
+                    registrar_movimiento_diario(movimiento)
+                aplicados += 1
+            except StockInsuficiente as e:
+                errores.append((producto.id, str(e)))
+        db.session.commit()
+    return aplicados, errores
+
+
+def conciliar_stock(tamano_rango=10000, workers=1, desde=None, hasta=None,
+                    aplicar=False, usuario_id=None, tamano_lote=500):
+    """
+    Verificar el libro de movimientos de todos los productos (o de los ids
+    en [desde, hasta)) y, con aplicar=True, corregir las diferencias de
+    saldo con ajustes registrados a nombre de usuario_id.
+
+    Debe ejecutarse dentro de un contexto de aplicación.
+    """
+    rangos = rangos_de_productos(tamano_rango, desde, hasta)
+
+    if workers > 1 and len(rangos) > 1:
+        engine = db.engine
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            resultados = list(executor.map(
+                lambda rango: _verificar_rango_aislado(engine, *rango), rangos
+            ))
+    else:
+        conexion = db.session.connection()
+        resultados = [verificar_rango(conexion, *rango) for rango in rangos]
+
+    saldos = [fila for resultado in resultados for fila in resultado[0]]
+    saltos = [fila for resultado in resultados for fila in resultado[1]]
+
+    reporte = {
+        'rangos': len(rangos),
+        'diferencias_saldo': saldos,
+        'saltos_cadena': saltos,
+        'ajustes_aplicados': 0,
+        'errores': []
+    }
+
+    if aplicar and saldos:
+        if usuario_id is None:
+            raise ValueError('Se requiere un usuario para registrar los ajustes')
+        reporte['ajustes_aplicados'], reporte['errores'] = aplicar_ajustes(
+            saldos, usuario_id, tamano_lote
+        )
+
+    return reporte
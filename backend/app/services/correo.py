@@ -0,0 +1,130 @@
+"""
+Envío de correos por lotes
+
+Las notificaciones pendientes se agrupan por destinatario en un solo correo
+de resumen y el lote completo se envía por una única conexión SMTP
+(mail.connect()), en lugar de abrir una conexión (y un handshake TLS) por
+mensaje. Flask-Mail reabre la conexión cada MAIL_MAX_EMAILS mensajes.
+
+El envío se limita a CORREO_MAX_POR_SEGUNDO mensajes por segundo. Los
+errores transitorios (desconexión, timeout, respuestas 4xx) se reintentan
+con espera exponencial reabriendo la conexión; los permanentes (5xx,
+destinatario rechazado) se informan sin reintentar.
+
+Para probarlo sin un servidor real basta un servidor SMTP de depuración
+local (ver README, "Correo").
+"""
+
+import smtplib
+import time
+from collections import OrderedDict
+from flask import current_app
+from flask_mail import Message
+from backend.app import mail
+
+
+def _es_transitorio(error):
+    """Errores de conexión o respuestas 4xx del servidor"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPException, OSError))
+
+
+def agrupar_resumenes(notificaciones):
+    """
+    Agrupar notificaciones ({destinatario, asunto, mensaje}) en un correo
+    por destinatario, en el orden en que aparece cada uno.
+    """
+    por_destinatario = OrderedDict()
+    for notificacion in notificaciones:
+        por_destinatario.setdefault(notificacion['destinatario'], []).append(notificacion)
+
+    correos = []
+    for destinatario, grupo in por_destinatario.items():
+        if len(grupo) == 1:
+            correos.append(dict(grupo[0]))
+            continue
+        secciones = [f"{n['asunto']}\n{n['mensaje']}" for n in grupo]
+        correos.append({
+            'destinatario': destinatario,
+            'asunto': f'Resumen de {len(grupo)} notificaciones del Sistema de Inventario',
+            'mensaje': '\n\n'.join(secciones)
+        })
+    return correos
+
+
+def _abrir_conexion():
+    conexion = mail.connect()
+    conexion.__enter__()
+    return conexion
+
+
+def _cerrar_conexion(conexion):
+    try:
+        conexion.__exit__(None, None, None)
+    except (smtplib.SMTPException, OSError):
+        # La conexión ya estaba cortada
+        pass
+
+
+def enviar_lote(correos, remitente=None):
+    """
+    Enviar correos ({destinatario, asunto, mensaje}) por una sola conexión
+    SMTP con límite de ritmo y reintentos.
+
+    Devuelve {'enviados': [destinatarios], 'fallidos': [(destinatario, error)]}.
+    """
+    config = current_app.config
+    remitente = remitente or config['MAIL_USERNAME']
+    intervalo = 1.0 / config['CORREO_MAX_POR_SEGUNDO'] if config['CORREO_MAX_POR_SEGUNDO'] else 0
+    reintentos = config['CORREO_REINTENTOS']
+    espera = config['CORREO_ESPERA_REINTENTO']
+
+    resultado = {'enviados': [], 'fallidos': []}
+    conexion = None
+    ultimo_envio = None
+    try:
+        for correo in correos:
+            mensaje = Message(
+                subject=correo['asunto'],
+                recipients=[correo['destinatario']],
+                body=correo['mensaje'],
+                sender=remitente
+            )
+            for intento in range(reintentos + 1):
+                if ultimo_envio is not None and intervalo:
+                    pausa = ultimo_envio + intervalo - time.monotonic()
+                    if pausa > 0:
+                        time.sleep(pausa)
+                try:
+                    if conexion is None:
+                        conexion = _abrir_conexion()
+                    ultimo_envio = time.monotonic()
+                    conexion.send(mensaje)
+                    resultado['enviados'].append(correo['destinatario'])
+                    break
+                except Exception as e:
+                    if not _es_transitorio(e) or intento == reintentos:
+                        resultado['fallidos'].append((correo['destinatario'], str(e)))
+                        break
+                    # Reabrir la conexión tras una espera exponencial
+                    if conexion is not None:
+                        _cerrar_conexion(conexion)
+                        conexion = None
+                    time.sleep(espera * 2 ** intento)
+    finally:
+        if conexion is not None:
+            _cerrar_conexion(conexion)
+
+    return resultado
+
+
+def enviar_notificaciones(notificaciones, remitente=None):
+    """Agrupar las notificaciones por destinatario y enviarlas en un lote"""
+    correos = agrupar_resumenes(notificaciones)
+    resultado = enviar_lote(correos, remitente)
+    resultado['notificaciones'] = len(notificaciones)
+    resultado['correos'] = len(correos)
+    return resultado
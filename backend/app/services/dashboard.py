@@ -0,0 +1,90 @@
+"""
+Resumen del dashboard
+
+Totales de productos, valor del inventario, stock bajo, productos por
+categoría y contadores de alertas calculados con agregados SQL (tres
+consultas en total), en lugar de descargar todos los productos al navegador
+y contarlos ahí.
+"""
+
+from sqlalchemy import select, func, case
+from backend.app import db
+from backend.app.models.producto import Producto
+from backend.app.models.categoria import Categoria
+from backend.app.models.alerta import Alerta
+
+# Tablas de las que depende el resumen (ETag y clave de caché)
+TABLAS_RESUMEN = ('productos', 'categorias', 'alertas')
+
+
+def _contar(condicion):
+    """SUM(CASE WHEN condicion THEN 1 ELSE 0 END)"""
+    return func.coalesce(func.sum(case((condicion, 1), else_=0)), 0)
+
+
+def totales_productos(conexion):
+    """Totales de los productos activos en una sola pasada"""
+    fila = conexion.execute(
+        select(
+            func.count(Producto.id).label('total_productos'),
+            func.coalesce(func.sum(
+                func.coalesce(Producto.precio_compra, 0) * Producto.stock_actual
+            ), 0).label('valor_inventario'),
+            _contar(Producto.stock_actual <= Producto.umbral_reorden).label('stock_bajo'),
+            _contar(Producto.stock_actual == 0).label('sin_stock'),
+        ).where(Producto.activo == True)
+    ).one()
+    return {
+        'total_productos': fila.total_productos,
+        'valor_inventario': float(fila.valor_inventario),
+        'stock_bajo': int(fila.stock_bajo),
+        'sin_stock': int(fila.sin_stock)
+    }
+
+
+def productos_por_categoria(conexion):
+    """Cantidad de productos activos por categoría (None agrupa los sin categoría)"""
+    filas = conexion.execute(
+        select(
+            Categoria.id,
+            Categoria.nombre,
+            func.count(Producto.id).label('total'),
+        ).select_from(Producto)
+        .outerjoin(Categoria, Producto.categoria_id == Categoria.id)
+        .where(Producto.activo == True)
+        .group_by(Categoria.id, Categoria.nombre)
+        .order_by(func.count(Producto.id).desc(), Categoria.nombre)
+    ).all()
+    return [
+        {'categoria_id': fila.id, 'categoria_nombre': fila.nombre, 'total': fila.total}
+        for fila in filas
+    ]
+
+
+def contadores_alertas(conexion):
+    """Alertas activas, no leídas y activas por prioridad"""
+    activa = Alerta.activa == True
+    fila = conexion.execute(
+        select(
+            _contar(activa).label('activas'),
+            _contar(activa & (Alerta.leida == False)).label('no_leidas'),
+            _contar(activa & (Alerta.prioridad == 'critica')).label('criticas'),
+            _contar(activa & (Alerta.prioridad == 'alta')).label('altas'),
+        )
+    ).one()
+    return {
+        'activas': int(fila.activas),
+        'no_leidas': int(fila.no_leidas),
+        'criticas': int(fila.criticas),
+        'altas': int(fila.altas)
+    }
+
+
+def resumen_dashboard():
+    """Resumen completo del dashboard"""
+    conexion = db.session.connection()
+    return {
+        'productos': totales_productos(conexion),
+        'categorias': productos_por_categoria(conexion),
+        'alertas': contadores_alertas(conexion)
+    }
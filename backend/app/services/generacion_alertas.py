@@ -0,0 +1,114 @@
+"""
+Generación de alertas de stock y vencimiento por rangos de productos
+
+Cada rango de ids [desde, hasta) se evalúa en bloque: una consulta trae los
+productos activos con stock en o bajo su punto de reorden, otra las alertas
+de stock activas del rango, y las alertas nuevas se crean sin consultar
+producto por producto. El calendario de vencimientos se evalúa sobre el
+mismo rango.
+
+La tarea periódica reparte el catálogo en rangos de ALERTAS_TAMANO_RANGO
+productos (un grupo de tareas de Celery con un callback que suma los
+resultados), de modo que la generación escala con los workers de la cola
+de alertas y un rango lento no demora a los demás.
+"""
+
+from sqlalchemy import select
+from backend.app import db
+from backend.app.models.producto import Producto
+from backend.app.models.alerta import Alerta
+from backend.app.services.vencimientos import generar_alertas_vencimiento
+from backend.app.services.notificaciones import notificar_alertas
+from backend.app.utils.rangos import en_rango
+
+TIPOS_STOCK = ('stock_bajo', 'sin_stock')
+
+
+def generar_alertas_stock(usuario_id, desde=None, hasta=None):
+    """
+    Crear alertas 'sin_stock' y 'stock_bajo' de los productos con id en
+    [desde, hasta) (o de todos) sin duplicar alertas activas del mismo tipo.
+    No confirma la sesión.
+
+    Devuelve la lista de alertas creadas.
+    """
+    existentes = set(db.session.execute(
+        select(Alerta.producto_id, Alerta.tipo).where(
+            Alerta.activa == True,
+            Alerta.tipo.in_(TIPOS_STOCK),
+            en_rango(Alerta.producto_id, desde, hasta)
+        )
+    ).all())
+
+    productos = db.session.execute(
+        select(Producto.id, Producto.codigo, Producto.nombre, Producto.stock_actual, Producto.umbral_reorden)
+        .where(
+            Producto.stock_actual <= Producto.umbral_reorden,
+            Producto.activo == True,
+            en_rango(Producto.id, desde, hasta)
+        ).order_by(Producto.id)
+    ).all()
+
+    alertas = []
+    for producto in productos:
+        if producto.stock_actual == 0:
+            tipo = 'sin_stock'
+            titulo = f'Sin stock: {producto.nombre}'
+            mensaje = f'El producto {producto.codigo} - {producto.nombre} no tiene stock disponible.'
+            prioridad = 'critica'
+        else:
+            tipo = 'stock_bajo'
+            titulo = f'Stock bajo: {producto.nombre}'
+            mensaje = f'El producto {producto.codigo} - {producto.nombre} tiene stock bajo. Stock actual: {producto.stock_actual}, Punto de reorden: {producto.umbral_reorden}'
+            prioridad = 'alta'
+
+        if (producto.id, tipo) in existentes:
+            continue
+
+        alertas.append(Alerta(
+            producto_id=producto.id,
+            usuario_id=usuario_id,
+            tipo=tipo,
+            titulo=titulo,
+            mensaje=mensaje,
+            prioridad=prioridad
+        ))
+
+    db.session.add_all(alertas)
+    return alertas
+
+
+def generar_alertas(usuario_id, dias_alerta=30, desde=None, hasta=None):
+    """
+    Alertas de stock y de vencimiento de un rango de productos, con sus
+    notificaciones por correo. No confirma la sesión.
+
+    Devuelve la lista de alertas creadas.
+    """
+    alertas = generar_alertas_stock(usuario_id, desde, hasta)
+    alertas += generar_alertas_vencimiento(usuario_id, dias_alerta=dias_alerta, desde=desde, hasta=hasta)
+
+    # Avisos por correo (deduplicados), enviados en el próximo resumen
+    notificar_alertas(alertas)
+    return alertas
+
+
+def contar_por_tipo(alertas):
+    """{tipo: cantidad} de una lista de alertas"""
+    conteo = {}
+    for alerta in alertas:
+        conteo[alerta.tipo] = conteo.get(alerta.tipo, 0) + 1
+    return conteo
+
+
+def sumar_resultados(resultados):
+    """Combinar los resultados de las tareas de cada rango"""
+    total = {'rangos': len(resultados), 'alertas_creadas': 0, 'por_tipo': {}, 'errores': []}
+    for resultado in resultados:
+        if not resultado.get('success'):
+            total['errores'].append({'rango': resultado.get('rango'), 'error': resultado.get('error')})
+            continue
+        total['alertas_creadas'] += resultado['alertas_creadas']
+        for tipo, cantidad in resultado['por_tipo'].items():
+            total['por_tipo'][tipo] = total['por_tipo'].get(tipo, 0) + cantidad
+    return total
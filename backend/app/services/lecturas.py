@@ -0,0 +1,122 @@
+"""
+Lecturas livianas para reportes de solo lectura
+
+Las consultas usan select() de Core y devuelven filas inmutables (Row, con
+acceso por nombre como una namedtuple) en lugar de instancias del ORM, sin
+identity map, sin seguimiento de cambios ni __dict__ por instancia. Los
+serializadores usan los CAMPOS del modelo, de modo que producen exactamente
+el mismo diccionario que to_dict().
+
+Por ahora solo el reporte de inventario lee por aquí; los listados
+paginados siguen con el ORM porque su proyección ?fields= se apoya en
+load_only sobre las entidades.
+"""
+
+from types import SimpleNamespace
+from sqlalchemy import select
+from backend.app import db
+from backend.app.models.producto import Producto
+from backend.app.models.categoria import Categoria
+from backend.app.models.stock_almacen import StockAlmacen
+
+
+def consulta_productos(categoria_id=None, activos_only=True, almacen_id=None):
+    """
+    Sentencia select() con las columnas de to_dict() y el nombre de categoría.
+
+    Con almacen_id solo incluye los productos con stock en ese almacén y
+    stock_actual es el stock del almacén.
+    """
+    stock = StockAlmacen.cantidad.label('stock_actual') if almacen_id else Producto.stock_actual
+    stmt = select(
+        Producto.id,
+        Producto.codigo,
+        Producto.nombre,
+        Producto.descripcion,
+        Producto.categoria_id,
+        Categoria.nombre.label('categoria_nombre'),
+        stock,
+        Producto.stock_minimo,
+        Producto.punto_reorden,
+        Producto.stock_seguridad,
+        Producto.demanda_diaria,
+        Producto.precio_compra,
+        Producto.precio_venta,
+        Producto.unidad_medida,
+        Producto.ubicacion,
+        Producto.fecha_vencimiento,
+        Producto.lote,
+        Producto.activo,
+        Producto.fecha_creacion,
+        Producto.fecha_actualizacion,
+    ).outerjoin(Categoria, Producto.categoria_id == Categoria.id)\
+        .order_by(Producto.id)
+
+    if activos_only:
+        stmt = stmt.where(Producto.activo == True)
+
+    if categoria_id:
+        stmt = stmt.where(Producto.categoria_id == categoria_id)
+
+    if almacen_id:
+        stmt = stmt.join(StockAlmacen, (StockAlmacen.producto_id == Producto.id) &
+                         (StockAlmacen.almacen_id == almacen_id))\
+            .where(StockAlmacen.cantidad > 0)
+
+    return stmt
+
+
+def leer_productos(categoria_id=None, activos_only=True, almacen_id=None):
+    """Filas de productos (Row inmutables) para reportes de solo lectura"""
+    # Ejecutar sobre la conexión evita el procesamiento de resultados del ORM
+    return db.session.connection().execute(
+        consulta_productos(categoria_id, activos_only, almacen_id)
+    ).all()
+
+
+class _FilaProducto:
+    """
+    Fila de producto con la interfaz que espera Producto.CAMPOS: las
+    columnas se leen de la fila y los campos calculados (necesita_restock,
+    dias_para_vencer, ...) son las mismas propiedades del modelo.
+    """
+
+    __slots__ = ('_fila',)
+
+    umbral_reorden = Producto.__dict__['umbral_reorden']
+    necesita_restock = Producto.necesita_restock
+    dias_para_vencer = Producto.dias_para_vencer
+    esta_vencido = Producto.esta_vencido
+    valor_inventario = Producto.valor_inventario
+
+    def __init__(self, fila):
+        self._fila = fila
+
+    def __getattr__(self, nombre):
+        return getattr(self._fila, nombre)
+
+    @property
+    def categoria(self):
+        nombre = self._fila.categoria_nombre
+        return SimpleNamespace(nombre=nombre) if nombre is not None else None
+
+
+def producto_a_dict(fila):
+    """Serializar una fila de producto igual que Producto.to_dict()"""
+    producto = _FilaProducto(fila)
+    return {campo: valor(producto) for campo, (_, valor) in Producto.CAMPOS.items()}
+
+
+def productos_a_registros(filas):
+    """Serializar filas de productos"""
+    return [producto_a_dict(fila) for fila in filas]
+
+
+def resumen_inventario(registros):
+    """Totales del reporte de inventario a partir de los registros serializados"""
+    return {
+        'total_productos': len(registros),
+        'valor_total_inventario': sum(registro['valor_inventario'] for registro in registros),
+        'productos_stock_bajo': sum(1 for registro in registros if registro['necesita_restock']),
+        'productos_sin_stock': sum(1 for registro in registros if registro['stock_actual'] == 0)
+    }
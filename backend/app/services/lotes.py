@@ -0,0 +1,159 @@
+"""
+Stock por lote y asignación FEFO
+
+Cada movimiento de stock se reparte entre lotes (tabla movimientos_lotes).
+Los ingresos van al lote indicado o, sin código, al lote general (nunca al
+lote vigente que se refleja en Producto.lote, que cambia con cada movimiento
+y mezclaría unidades nuevas con un lote a punto de vencer); los
+egresos se toman primero de los lotes que vencen antes (First Expired,
+First Out), con los lotes sin vencimiento al final.
+
+La selección de lotes usa una suma acumulada (ventana ordenada por
+fecha_vencimiento sobre el índice (producto_id, fecha_vencimiento)) que
+devuelve solo los lotes necesarios para cubrir la cantidad, sin leer el
+resto. Los lotes con y sin vencimiento se consultan por separado: ordenar
+por "sin vencimiento al final" con una expresión impediría usar el índice
+para el orden. Los lotes sin vencimiento solo se leen si los demás no
+alcanzan. Producto.stock_actual se mantiene aplicando la misma diferencia
+del movimiento, sin volver a sumar los lotes; quien registra el movimiento
+bloquea antes la fila del producto.
+"""
+
+from sqlalchemy import select, func, exists
+from backend.app import db
+from backend.app.models.lote import Lote
+from backend.app.models.movimiento_lote import MovimientoLote
+from backend.app.services.vencimientos import sincronizar_lote_principal
+
+
+class StockInsuficiente(ValueError):
+    """Los lotes no alcanzan para cubrir un egreso"""
+
+
+def _grupo_fefo(producto_id, con_vencimiento):
+    """Condición y orden FEFO de los lotes con stock con o sin vencimiento"""
+    if con_vencimiento:
+        return ((Lote.producto_id == producto_id, Lote.cantidad > 0, Lote.fecha_vencimiento.isnot(None)),
+                (Lote.fecha_vencimiento, Lote.id))
+    return ((Lote.producto_id == producto_id, Lote.cantidad > 0, Lote.fecha_vencimiento.is_(None)),
+            (Lote.id,))
+
+
+def _tomar_lotes(producto_id, cantidad, con_vencimiento):
+    """Lotes del grupo necesarios para cubrir cantidad, bloqueados, con lo tomado de cada uno"""
+    condiciones, orden = _grupo_fefo(producto_id, con_vencimiento)
+
+    # Unidades de los lotes anteriores del grupo en orden FEFO
+    previo = func.coalesce(func.sum(Lote.cantidad).over(
+        order_by=orden, rows=(None, -1)
+    ), 0)
+    candidatos = select(Lote.id, previo.label('previo')).where(*condiciones).subquery()
+
+    filas = db.session.execute(
+        select(Lote, candidatos.c.previo)
+        .join(candidatos, candidatos.c.id == Lote.id)
+        .where(candidatos.c.previo < cantidad)
+        .order_by(*orden)
+        .with_for_update(of=Lote)
+    ).all()
+    return [(lote, min(lote.cantidad, cantidad - previo)) for lote, previo in filas]
+
+
+def asignar_fefo(producto_id, cantidad):
+    """
+    Elegir los lotes de los que sale la cantidad pedida en orden FEFO.
+
+    Devuelve una lista de (lote, cantidad_tomada) y bloquea esos lotes hasta
+    el fin de la transacción. No modifica los lotes.
+    Lanza StockInsuficiente si la suma de los lotes no alcanza.
+    """
+    tomas = _tomar_lotes(producto_id, cantidad, con_vencimiento=True)
+    disponible = sum(toma for _, toma in tomas)
+    if disponible < cantidad:
+        tomas += _tomar_lotes(producto_id, cantidad - disponible, con_vencimiento=False)
+        disponible = sum(toma for _, toma in tomas)
+
+    if disponible < cantidad:
+        raise StockInsuficiente(
+            f'Los lotes del producto tienen {disponible} unidades, se pidieron {cantidad}'
+        )
+    return tomas
+
+
+def lotes_fefo(producto_id):
+    """Lotes con stock en orden FEFO (los que no vencen al final)"""
+    lotes = []
+    for con_vencimiento in (True, False):
+        condiciones, orden = _grupo_fefo(producto_id, con_vencimiento)
+        lotes += Lote.query.filter(*condiciones).order_by(*orden).all()
+    return lotes
+
+
+def lote_vigente(producto_id):
+    """Lote con stock que vence primero (None si no hay stock)"""
+    for con_vencimiento in (True, False):
+        condiciones, orden = _grupo_fefo(producto_id, con_vencimiento)
+        lote = Lote.query.filter(*condiciones).order_by(*orden).first()
+        if lote is not None:
+            return lote
+    return None
+
+
+def _obtener_lote(producto, codigo, fecha_vencimiento=None):
+    """Lote del producto con ese código, creado vacío si no existe"""
+    lote = Lote.query.filter_by(producto_id=producto.id, codigo=codigo).first()
+    if lote is None:
+        lote = Lote(producto_id=producto.id, codigo=codigo, fecha_vencimiento=fecha_vencimiento)
+        db.session.add(lote)
+    elif fecha_vencimiento and not lote.fecha_vencimiento:
+        lote.fecha_vencimiento = fecha_vencimiento
+    return lote
+
+
+def registrar_lotes(producto, movimiento, codigo_lote=None, fecha_vencimiento=None):
+    """
+    Repartir un movimiento entre lotes y actualizar sus cantidades.
+
+    Se llama con la fila del producto bloqueada (with_for_update) y
+    producto.stock_actual todavía igual a stock_anterior. Los
+    ingresos van al lote codigo_lote (creándolo con fecha_vencimiento si no
+    existe) o al lote general; los egresos salen de codigo_lote si se
+    indica, o de los lotes en orden FEFO. Al final, lote y fecha_vencimiento
+    del producto pasan a ser los del lote con stock que vence primero.
+
+    Devuelve las asignaciones creadas. Lanza StockInsuficiente si los lotes
+    no cubren un egreso.
+    """
+    # Productos anteriores al stock por lote: todo su stock en el lote principal
+    if not db.session.query(exists().where(Lote.producto_id == producto.id)).scalar():
+        sincronizar_lote_principal(producto)
+
+    diferencia = movimiento.stock_posterior - movimiento.stock_anterior
+    asignaciones = []
+
+    if diferencia > 0:
+        lote = _obtener_lote(producto, codigo_lote or Lote.LOTE_GENERAL, fecha_vencimiento)
+        lote.cantidad = (lote.cantidad or 0) + diferencia
+        asignaciones.append(MovimientoLote(lote, diferencia, movimiento))
+
+    elif diferencia < 0:
+        if codigo_lote:
+            lote = Lote.query.filter_by(producto_id=producto.id, codigo=codigo_lote).first()
+            if lote is None or lote.cantidad < -diferencia:
+                raise StockInsuficiente(f'Stock insuficiente en el lote {codigo_lote}')
+            tomas = [(lote, -diferencia)]
+        else:
+            tomas = asignar_fefo(producto.id, -diferencia)
+
+        for lote, toma in tomas:
+            lote.cantidad -= toma
+            asignaciones.append(MovimientoLote(lote, -toma, movimiento))
+
+    db.session.add_all(asignaciones)
+
+    vigente = lote_vigente(producto.id)
+    if vigente is not None:
+        producto.lote = vigente.codigo if vigente.codigo != Lote.LOTE_GENERAL else None
+        producto.fecha_vencimiento = vigente.fecha_vencimiento
+
+    return asignaciones
@@ -0,0 +1,153 @@
+"""
+Totales diarios de movimientos
+
+movimientos_diarios guarda, por (fecha, producto_id, tipo), la cantidad de
+movimientos, las unidades y el valor del día. Las estadísticas, los
+resúmenes de reportes y las series del dashboard recorren días × productos
+con movimientos en lugar de todos los movimientos del periodo.
+
+Cada movimiento suma su parte en la misma transacción que lo registra con
+un upsert sobre la clave única del día (INSERT ... ON DUPLICATE KEY UPDATE
+en MySQL, ON CONFLICT DO UPDATE en SQLite/PostgreSQL): dos movimientos
+concurrentes del mismo día y producto no compiten por crear la fila.
+
+Las transferencias entre almacenes no cambian el stock total y no se suman.
+
+La fecha es la de fecha_movimiento (UTC). Las inserciones masivas que no
+pasan por registrar_movimiento_diario() deben reconstruir los totales con
+reconstruir_movimientos_diarios() (flask reconstruir-movimientos-diarios).
+"""
+
+from datetime import datetime
+from sqlalchemy import select, func, insert, delete
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from backend.app import db
+from backend.app.models.movimiento import Movimiento
+from backend.app.models.movimiento_diario import MovimientoDiario
+from backend.app.utils.versiones import marcar_modificadas, registrar_tablas
+
+CLAVE_DIA = ('fecha', 'producto_id', 'tipo')
+
+# Contador que cambia solo al reconstruir: los movimientos nuevos no tocan
+# días cerrados, una reconstrucción sí
+VERSION_RECONSTRUCCION = 'movimientos_diarios:reconstruccion'
+INSERT_CON_CONFLICTO = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def _upsert_dia(valores):
+    """INSERT de la fila del día que, si ya existe, suma los valores a la existente"""
+    tabla = MovimientoDiario.__table__
+    sumas = ('movimientos', 'unidades', 'valor')
+    dialecto = db.session.get_bind().dialect.name
+
+    if dialecto == 'mysql':
+        stmt = mysql.insert(tabla).values(**valores)
+        return stmt.on_duplicate_key_update(
+            **{columna: tabla.c[columna] + stmt.inserted[columna] for columna in sumas}
+        )
+    if dialecto in INSERT_CON_CONFLICTO:
+        stmt = INSERT_CON_CONFLICTO[dialecto](tabla).values(**valores)
+        return stmt.on_conflict_do_update(
+            index_elements=list(CLAVE_DIA),
+            set_={columna: tabla.c[columna] + stmt.excluded[columna] for columna in sumas}
+        )
+    raise NotImplementedError(f'Upsert de totales diarios no soportado en {dialecto}')
+
+
+def registrar_movimiento_diario(movimiento):
+    """Sumar un movimiento a los totales de su día (no confirma la sesión)"""
+    if movimiento.fecha_movimiento is None:
+        movimiento.fecha_movimiento = datetime.utcnow()
+
+    db.session.execute(_upsert_dia({
+        'fecha': movimiento.fecha_movimiento.date(),
+        'producto_id': movimiento.producto_id,
+        'tipo': movimiento.tipo,
+        'movimientos': 1,
+        'unidades': movimiento.cantidad,
+        'valor': movimiento.valor_total,
+    }))
+    # Escritura de Core: no pasa por el seguimiento de cambios del ORM
+    registrar_tablas(db.session, MovimientoDiario.__tablename__)
+
+
+def reconstruir_movimientos_diarios(desde=None):
+    """
+    Recalcular los totales diarios desde la tabla de movimientos (todos, o
+    los días a partir de desde) con DELETE + INSERT ... SELECT agrupado.
+
+    Devuelve la cantidad de filas creadas.
+    """
+    dia = func.date(Movimiento.fecha_movimiento)
+    consulta = select(
+        dia,
+        Movimiento.producto_id,
+        Movimiento.tipo,
+        func.count(Movimiento.id),
+        func.coalesce(func.sum(Movimiento.cantidad), 0),
+        func.coalesce(func.sum(Movimiento.cantidad * func.coalesce(Movimiento.precio_unitario, 0)), 0),
+    ).where(Movimiento.transferencia == False)\
+        .group_by(dia, Movimiento.producto_id, Movimiento.tipo)
+
+    borrar = delete(MovimientoDiario)
+    if desde:
+        consulta = consulta.where(Movimiento.fecha_movimiento >= datetime.combine(desde, datetime.min.time()))
+        borrar = borrar.where(MovimientoDiario.fecha >= desde)
+
+    db.session.execute(borrar)
+    resultado = db.session.execute(insert(MovimientoDiario).from_select(
+        ['fecha', 'producto_id', 'tipo', 'movimientos', 'unidades', 'valor'], consulta
+    ))
+    db.session.commit()
+    # Escrituras masivas: no pasan por los eventos de la sesión
+    marcar_modificadas(MovimientoDiario.__tablename__, VERSION_RECONSTRUCCION)
+    return resultado.rowcount
+
+
+def _en_periodo(stmt, desde=None, hasta=None, producto_id=None, tipo=None):
+    if desde:
+        stmt = stmt.where(MovimientoDiario.fecha >= desde)
+    if hasta:
+        stmt = stmt.where(MovimientoDiario.fecha <= hasta)
+    if producto_id:
+        stmt = stmt.where(MovimientoDiario.producto_id == producto_id)
+    if tipo:
+        stmt = stmt.where(MovimientoDiario.tipo == tipo)
+    return stmt
+
+
+def totales_por_tipo(desde=None, hasta=None):
+    """{tipo: (movimientos, unidades, valor)} de los días en [desde, hasta]"""
+    stmt = _en_periodo(select(
+        MovimientoDiario.tipo,
+        func.sum(MovimientoDiario.movimientos),
+        func.sum(MovimientoDiario.unidades),
+        func.sum(MovimientoDiario.valor),
+    ).group_by(MovimientoDiario.tipo), desde, hasta)
+    return {
+        tipo: (int(movimientos), int(unidades), float(valor))
+        for tipo, movimientos, unidades, valor in db.session.connection().execute(stmt)
+    }
+
+
+def totales_por_dia(desde, hasta):
+    """Filas (fecha, tipo, movimientos, unidades, valor) de los días en [desde, hasta]"""
+    stmt = _en_periodo(select(
+        MovimientoDiario.fecha,
+        MovimientoDiario.tipo,
+        func.sum(MovimientoDiario.movimientos).label('movimientos'),
+        func.sum(MovimientoDiario.unidades).label('unidades'),
+        func.sum(MovimientoDiario.valor).label('valor'),
+    ).group_by(MovimientoDiario.fecha, MovimientoDiario.tipo), desde, hasta)
+    return db.session.connection().execute(stmt).all()
+
+
+def consulta_por_producto(desde, hasta, producto_id=None, tipo=None):
+    """SELECT de totales por producto y tipo del periodo (columnas de analitica)"""
+    return _en_periodo(select(
+        MovimientoDiario.producto_id,
+        MovimientoDiario.tipo,
+        func.sum(MovimientoDiario.movimientos).label('movimientos'),
+        func.sum(MovimientoDiario.unidades).label('cantidad'),
+        func.sum(MovimientoDiario.valor).label('valor_total'),
+    ).group_by(MovimientoDiario.producto_id, MovimientoDiario.tipo), desde, hasta, producto_id, tipo)
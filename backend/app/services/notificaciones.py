@@ -0,0 +1,224 @@
+"""
+Notificaciones de alertas por correo: deduplicación y resúmenes
+
+Al generar alertas se crea una notificación pendiente por alerta y
+destinatario (usuarios activos con rol en NOTIFICACION_ROLES), salvo que el
+usuario ya tenga una notificación del mismo (producto, tipo) dentro de las
+últimas NOTIFICACION_VENTANA_HORAS horas.
+
+Una tarea periódica junta las pendientes de cada usuario en un resumen. Los
+usuarios con las mismas alertas pendientes (normalmente todos los de un
+rol) comparten el resumen, que se arma una sola vez. Todos los resúmenes de
+la ejecución se entregan juntos por el canal NOTIFICACION_CANAL:
+
+- python: services/correo, un lote por una sola conexión SMTP.
+- node:   peticiones POST /api/email/send-bulk al email_service, con un
+          mensaje por destinatario (nadie ve las direcciones de los demás).
+          Cada petición lleva a lo sumo los mensajes que el servicio envía
+          dentro de EMAIL_SERVICE_TIMEOUT a EMAIL_SERVICE_MAX_POR_SEGUNDO;
+          un lote mayor vencería el timeout y se reenviaría completo.
+"""
+
+import json
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from backend.app import db
+from backend.app.models.notificacion import Notificacion
+from backend.app.models.usuario import Usuario
+from backend.app.services.correo import enviar_lote
+
+ORDEN_PRIORIDAD = {'critica': 0, 'alta': 1, 'media': 2, 'baja': 3}
+
+
+def destinatarios():
+    """Usuarios activos que reciben las alertas por correo"""
+    return Usuario.query.filter(
+        Usuario.activo == True,
+        Usuario.rol.in_(current_app.config['NOTIFICACION_ROLES'])
+    ).order_by(Usuario.id).all()
+
+
+def notificar_alertas(alertas, ahora=None):
+    """
+    Crear las notificaciones pendientes de las alertas nuevas sin repetir
+    (usuario, producto, tipo) dentro de la ventana. No confirma la sesión.
+
+    Devuelve las notificaciones creadas.
+    """
+    if not alertas:
+        return []
+    ahora = ahora or datetime.utcnow()
+    desde = ahora - timedelta(hours=current_app.config['NOTIFICACION_VENTANA_HORAS'])
+
+    # Ids de las alertas recién agregadas a la sesión
+    db.session.flush()
+
+    usuarios = destinatarios()
+    if not usuarios:
+        return []
+    # Solo las notificaciones de estos productos y destinatarios
+    recientes = set(db.session.execute(
+        select(Notificacion.usuario_id, Notificacion.producto_id, Notificacion.tipo)
+        .where(
+            Notificacion.fecha_creacion >= desde,
+            Notificacion.producto_id.in_({alerta.producto_id for alerta in alertas}),
+            Notificacion.usuario_id.in_([usuario.id for usuario in usuarios])
+        )
+    ).all())
+
+    nuevas = []
+    for alerta in alertas:
+        for usuario in usuarios:
+            clave = (usuario.id, alerta.producto_id, alerta.tipo)
+            if clave in recientes:
+                continue
+            recientes.add(clave)
+            nuevas.append(Notificacion(
+                alerta_id=alerta.id,
+                usuario_id=usuario.id,
+                producto_id=alerta.producto_id,
+                tipo=alerta.tipo,
+                fecha_creacion=ahora
+            ))
+
+    db.session.add_all(nuevas)
+    return nuevas
+
+
+def renderizar_resumen(alertas):
+    """Asunto y cuerpo de texto de un resumen, con las alertas más graves primero"""
+    alertas = sorted(alertas, key=lambda a: (ORDEN_PRIORIDAD.get(a.prioridad, 9), a.id))
+    criticas = sum(1 for alerta in alertas if alerta.prioridad == 'critica')
+
+    asunto = f'Resumen de alertas de inventario: {len(alertas)} nuevas'
+    if criticas:
+        asunto += f' ({criticas} críticas)'
+
+    lineas = [f'Se generaron {len(alertas)} alertas nuevas:', '']
+    for alerta in alertas:
+        lineas.append(f'[{(alerta.prioridad or "media").upper()}] {alerta.titulo}')
+        lineas.append(f'    {alerta.mensaje}')
+    lineas += ['', 'Sistema de Gestión de Inventario']
+    return asunto, '\n'.join(lineas)
+
+
+def _enviar_por_servicio(mensajes):
+    """
+    Enviar un lote de mensajes ({to, subject, text}) en una petición al
+    email_service, que los pasa por su pool de conexiones SMTP.
+
+    Devuelve el resultado de cada mensaje ({index, success, error}).
+    """
+    config = current_app.config
+    peticion = urllib.request.Request(
+        f"{config['EMAIL_SERVICE_URL'].rstrip('/')}/api/email/send-bulk",
+        data=json.dumps({'messages': mensajes}).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    with urllib.request.urlopen(peticion, timeout=config['EMAIL_SERVICE_TIMEOUT']) as respuesta:
+        return json.loads(respuesta.read())['results']
+
+
+def tamano_lote_servicio():
+    """Mensajes por petición que el email_service envía holgadamente dentro del timeout"""
+    config = current_app.config
+    return max(1, int(config['EMAIL_SERVICE_MAX_POR_SEGUNDO'] * config['EMAIL_SERVICE_TIMEOUT'] * 0.8))
+
+
+def entregar_resumenes(resumenes, canal):
+    """
+    Entregar resúmenes (usuarios, asunto, cuerpo) por lotes.
+
+    Devuelve los ids de los usuarios que recibieron su resumen.
+    """
+    entregados = set()
+    if not resumenes:
+        return entregados
+
+    if canal == 'node':
+        usuarios_mensajes = []
+        mensajes = []
+        for usuarios, asunto, cuerpo in resumenes:
+            for usuario in usuarios:
+                usuarios_mensajes.append(usuario.id)
+                mensajes.append({'to': usuario.email, 'subject': asunto, 'text': cuerpo})
+        tamano = tamano_lote_servicio()
+        for inicio in range(0, len(mensajes), tamano):
+            try:
+                resultados = _enviar_por_servicio(mensajes[inicio:inicio + tamano])
+            except (OSError, ValueError, KeyError):
+                # Servicio caído o respuesta inválida: el lote se reintenta en la próxima ejecución
+                continue
+            for resultado in resultados:
+                if resultado['success']:
+                    entregados.add(usuarios_mensajes[inicio + resultado['index']])
+        return entregados
+
+    por_email = {}
+    correos = []
+    for usuarios, asunto, cuerpo in resumenes:
+        for usuario in usuarios:
+            por_email[usuario.email] = usuario.id
+            correos.append({'destinatario': usuario.email, 'asunto': asunto, 'mensaje': cuerpo})
+    resultado = enviar_lote(correos)
+    entregados.update(por_email[email] for email in resultado['enviados'])
+    return entregados
+
+
+def enviar_resumenes(canal=None, ahora=None):
+    """
+    Enviar las notificaciones pendientes agrupadas en resúmenes y confirmar
+    la sesión.
+
+    Las notificaciones entregadas pasan a 'enviada'; las demás suman un
+    intento y pasan a 'fallida' al llegar a NOTIFICACION_MAX_INTENTOS.
+    """
+    config = current_app.config
+    canal = canal or config['NOTIFICACION_CANAL']
+    ahora = ahora or datetime.utcnow()
+
+    pendientes = Notificacion.query.options(
+        joinedload(Notificacion.alerta), joinedload(Notificacion.usuario)
+    ).filter(Notificacion.estado == 'pendiente').order_by(Notificacion.id).all()
+
+    por_usuario = defaultdict(list)
+    for notificacion in pendientes:
+        por_usuario[notificacion.usuario_id].append(notificacion)
+
+    # Usuarios con las mismas alertas pendientes comparten un resumen
+    grupos = defaultdict(list)
+    for notificaciones in por_usuario.values():
+        clave = tuple(sorted(n.alerta_id for n in notificaciones))
+        grupos[clave].append(notificaciones)
+
+    resumenes = [
+        ([notificaciones[0].usuario for notificaciones in grupo],
+         *renderizar_resumen([n.alerta for n in grupo[0]]))
+        for grupo in grupos.values()
+    ]
+    entregados = entregar_resumenes(resumenes, canal)
+
+    enviadas = fallidas = 0
+    for notificacion in pendientes:
+        if notificacion.usuario_id in entregados:
+            notificacion.estado = 'enviada'
+            notificacion.fecha_envio = ahora
+            enviadas += 1
+        else:
+            notificacion.intentos += 1
+            if notificacion.intentos >= config['NOTIFICACION_MAX_INTENTOS']:
+                notificacion.estado = 'fallida'
+            fallidas += 1
+
+    db.session.commit()
+    return {
+        'pendientes': len(pendientes),
+        'resumenes': len(grupos),
+        'enviadas': enviadas,
+        'fallidas': fallidas
+    }
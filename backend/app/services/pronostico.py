@@ -0,0 +1,186 @@
+"""
+Pronóstico de demanda y cálculo de punto de reorden
+
+Ajusta por producto un suavizado exponencial simple sobre los totales
+diarios de salidas y calcula stock de seguridad y punto de reorden:
+
+    nivel_t        = alpha * y_t + (1 - alpha) * nivel_{t-1}
+    sigma          = RMSE de los errores de pronóstico a un paso
+    stock_seguridad = ceil(z * sigma * sqrt(lead_time))
+    punto_reorden  = ceil(nivel_T * lead_time + stock_seguridad)
+
+Los productos se procesan en lotes como matrices (productos x días), de modo
+que cada paso del suavizado es una operación vectorizada sobre todo el lote.
+Los lotes pueden repartirse entre varios procesos (o hilos cuando el
+proceso actual es daemon, como los hijos prefork de Celery, que no pueden
+crear subprocesos; numpy libera el GIL en estas operaciones).
+"""
+
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, update, func, bindparam
+from backend.app import db
+from backend.app.models.movimiento import Movimiento
+from backend.app.models.producto import Producto
+from backend.app.services.analitica import leer_dataframe
+from backend.app.utils.versiones import marcar_modificadas
+
+
+def suavizado_exponencial(matriz, alpha):
+    """
+    Aplicar suavizado exponencial simple a cada fila de la matriz.
+
+    Devuelve (nivel_final, sigma) por fila. El nivel se inicializa con la
+    media de los primeros 7 días y sigma es el RMSE de los errores a un paso.
+    """
+    matriz = np.asarray(matriz, dtype='float64')
+    filas, dias = matriz.shape
+    if dias == 0:
+        return np.zeros(filas), np.zeros(filas)
+
+    nivel = matriz[:, :min(7, dias)].mean(axis=1)
+    errores_cuadrados = np.zeros(filas)
+    for t in range(dias):
+        error = matriz[:, t] - nivel
+        errores_cuadrados += error * error
+        nivel = nivel + alpha * error
+
+    return nivel, np.sqrt(errores_cuadrados / dias)
+
+
+def pronosticar_lote(matriz, alpha, lead_time, z, dias_minimos):
+    """
+    Calcular demanda diaria, stock de seguridad y punto de reorden de un lote.
+
+    Las filas con menos de dias_minimos días con demanda devuelven NaN
+    (el producto conserva su stock mínimo manual).
+    """
+    matriz = np.asarray(matriz, dtype='float64')
+    nivel, sigma = suavizado_exponencial(matriz, alpha)
+
+    stock_seguridad = np.ceil(z * sigma * math.sqrt(lead_time))
+    punto_reorden = np.ceil(nivel * lead_time + stock_seguridad)
+
+    sin_historia = (matriz > 0).sum(axis=1) < dias_minimos
+    nivel[sin_historia] = np.nan
+    stock_seguridad[sin_historia] = np.nan
+    punto_reorden[sin_historia] = np.nan
+    return nivel, stock_seguridad, punto_reorden
+
+
+def cargar_demanda_diaria(fecha_desde, fecha_hasta):
+    """Totales diarios de salidas por producto, agregados en SQL"""
+    dia = func.date(Movimiento.fecha_movimiento).label('dia')
+    stmt = select(
+        Movimiento.producto_id,
+        dia,
+        func.sum(Movimiento.cantidad).label('unidades'),
+    ).join(Producto, Movimiento.producto_id == Producto.id)\
+        .where(
+            Movimiento.tipo == 'salida',
+            Movimiento.transferencia == False,
+            Producto.activo == True,
+            Movimiento.fecha_movimiento >= datetime.combine(fecha_desde, datetime.min.time()),
+            Movimiento.fecha_movimiento < datetime.combine(fecha_hasta + timedelta(days=1), datetime.min.time())
+        )\
+        .group_by(Movimiento.producto_id, dia)
+
+    return leer_dataframe(stmt)
+
+
+def construir_matriz(demanda, producto_ids, fecha_desde, fecha_hasta):
+    """Pivotar la demanda a una matriz (productos x días) con ceros donde no hubo salidas"""
+    dias = pd.date_range(fecha_desde, fecha_hasta, freq='D')
+    if demanda.empty:
+        return np.zeros((len(producto_ids), len(dias)))
+
+    demanda = demanda.copy()
+    demanda['dia'] = pd.to_datetime(demanda['dia'])
+    demanda['unidades'] = pd.to_numeric(demanda['unidades']).astype('float64')
+    matriz = demanda.pivot_table(index='producto_id', columns='dia', values='unidades',
+                                 aggfunc='sum', fill_value=0)
+    matriz = matriz.reindex(index=producto_ids, columns=dias, fill_value=0)
+    return matriz.to_numpy(dtype='float64')
+
+
+def calcular_puntos_reorden(dias_historia=90, alpha=0.3, lead_time=7, z=1.65,
+                            dias_minimos=7, tamano_lote=5000, workers=1, hoy=None):
+    """
+    Recalcular demanda estimada, stock de seguridad y punto de reorden de
+    todos los productos activos y guardarlos con actualizaciones masivas.
+
+    Debe ejecutarse dentro de un contexto de aplicación.
+    """
+    hoy = hoy or date.today()
+    fecha_hasta = hoy - timedelta(days=1)
+    fecha_desde = hoy - timedelta(days=dias_historia)
+
+    producto_ids = [
+        fila.producto_id for fila in db.session.execute(
+            select(Producto.id.label('producto_id')).where(Producto.activo == True).order_by(Producto.id)
+        )
+    ]
+    if not producto_ids:
+        return {'productos_procesados': 0, 'productos_con_pronostico': 0}
+
+    matriz = construir_matriz(cargar_demanda_diaria(fecha_desde, fecha_hasta),
+                              producto_ids, fecha_desde, fecha_hasta)
+
+    lotes = [matriz[i:i + tamano_lote] for i in range(0, len(producto_ids), tamano_lote)]
+    argumentos = (alpha, lead_time, z, dias_minimos)
+
+    if workers > 1 and len(lotes) > 1:
+        if multiprocessing.current_process().daemon:
+            ejecutor = ThreadPoolExecutor
+        else:
+            ejecutor = ProcessPoolExecutor
+        with ejecutor(max_workers=workers) as executor:
+            resultados = list(executor.map(
+                pronosticar_lote, lotes, *[[valor] * len(lotes) for valor in argumentos]
+            ))
+    else:
+        resultados = [pronosticar_lote(lote, *argumentos) for lote in lotes]
+
+    nivel = np.concatenate([r[0] for r in resultados])
+    stock_seguridad = np.concatenate([r[1] for r in resultados])
+    punto_reorden = np.concatenate([r[2] for r in resultados])
+
+    ahora = datetime.utcnow()
+    filas = [
+        {
+            'b_id': producto_id,
+            'b_demanda': None if np.isnan(nivel[i]) else round(float(nivel[i]), 4),
+            'b_seguridad': None if np.isnan(stock_seguridad[i]) else int(stock_seguridad[i]),
+            'b_reorden': None if np.isnan(punto_reorden[i]) else int(punto_reorden[i]),
+            'b_fecha': ahora
+        }
+        for i, producto_id in enumerate(producto_ids)
+    ]
+
+    tabla = Producto.__table__
+    stmt = update(tabla).where(tabla.c.id == bindparam('b_id')).values(
+        demanda_diaria=bindparam('b_demanda'),
+        stock_seguridad=bindparam('b_seguridad'),
+        punto_reorden=bindparam('b_reorden'),
+        fecha_pronostico=bindparam('b_fecha')
+    )
+    conexion = db.session.connection()
+    for inicio in range(0, len(filas), tamano_lote):
+        conexion.execute(stmt, filas[inicio:inicio + tamano_lote])
+    db.session.commit()
+    # El executemany de Core no pasa por los eventos de la sesión
+    marcar_modificadas(Producto.__tablename__)
+
+    return {
+        'productos_procesados': len(producto_ids),
+        'productos_con_pronostico': int((~np.isnan(punto_reorden)).sum()),
+        'periodo': {
+            'fecha_desde': fecha_desde.isoformat(),
+            'fecha_hasta': fecha_hasta.isoformat()
+        }
+    }
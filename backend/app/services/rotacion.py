@@ -0,0 +1,171 @@
+"""
+Análisis ABC, rotación y días de cobertura por producto
+
+Las métricas se calculan para todo el catálogo en una sola pasada
+vectorizada sobre los movimientos ya agregados por (producto, tipo) en SQL,
+sin recorrer movimientos individuales en Python.
+"""
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, func
+from backend.app.models.movimiento import Movimiento
+from backend.app.models.producto import Producto
+from backend.app.models.categoria import Categoria
+from backend.app.services.analitica import leer_dataframe, dataframe_a_registros
+
+COLUMNAS_PRODUCTO = [
+    'producto_id', 'codigo', 'nombre', 'categoria_nombre', 'clase_abc',
+    'unidades_entrada', 'unidades_salida', 'valor_consumo', 'porcentaje_valor',
+    'porcentaje_acumulado', 'stock_actual', 'stock_promedio', 'rotacion',
+    'demanda_diaria', 'dias_cobertura'
+]
+
+
+def _cargar_catalogo(categoria_id=None):
+    """Productos activos con su stock y precio actuales"""
+    stmt = select(
+        Producto.id.label('producto_id'),
+        Producto.codigo,
+        Producto.nombre,
+        Categoria.nombre.label('categoria_nombre'),
+        Producto.stock_actual,
+    ).outerjoin(Categoria, Producto.categoria_id == Categoria.id)\
+        .where(Producto.activo == True)
+
+    if categoria_id:
+        stmt = stmt.where(Producto.categoria_id == categoria_id)
+
+    return leer_dataframe(stmt)
+
+
+def _cargar_flujos(fecha_desde_dt, fecha_hasta_dt, categoria_id=None):
+    """Unidades y valor de consumo por producto y tipo, agregados en SQL"""
+    valor = Movimiento.cantidad * func.coalesce(Movimiento.precio_unitario, Producto.precio_compra, 0)
+    stmt = select(
+        Movimiento.producto_id,
+        Movimiento.tipo,
+        func.sum(Movimiento.cantidad).label('unidades'),
+        func.sum(valor).label('valor'),
+    ).join(Producto, Movimiento.producto_id == Producto.id)\
+        .where(
+            Movimiento.fecha_movimiento.between(fecha_desde_dt, fecha_hasta_dt),
+            Movimiento.tipo.in_(['entrada', 'salida']),
+            Movimiento.transferencia == False
+        )\
+        .group_by(Movimiento.producto_id, Movimiento.tipo)
+
+    if categoria_id:
+        stmt = stmt.where(Producto.categoria_id == categoria_id)
+
+    return leer_dataframe(stmt)
+
+
+def clasificar_abc(valores, umbral_a=0.80, umbral_b=0.95):
+    """
+    Clasificar productos A/B/C según su participación acumulada en el valor.
+
+    Un producto es A mientras el acumulado previo a él no supere umbral_a,
+    B hasta umbral_b y C el resto (incluidos los productos sin consumo).
+    Devuelve (clases, porcentaje, porcentaje_acumulado) alineados con valores.
+    """
+    valores = pd.Series(valores, dtype='float64')
+    total = valores.sum()
+    if total <= 0:
+        ceros = pd.Series(0.0, index=valores.index)
+        return pd.Series('C', index=valores.index), ceros, ceros
+
+    orden = valores.sort_values(ascending=False, kind='mergesort')
+    porcentaje = orden / total
+    acumulado = porcentaje.cumsum()
+    previo = acumulado - porcentaje
+
+    clases = pd.Series(
+        np.select([previo < umbral_a, previo < umbral_b], ['A', 'B'], default='C'),
+        index=orden.index
+    )
+    clases[orden <= 0] = 'C'
+
+    return clases.reindex(valores.index), porcentaje.reindex(valores.index), acumulado.reindex(valores.index)
+
+
+def calcular_rotacion(fecha_desde_dt, fecha_hasta_dt, categoria_id=None, umbral_a=0.80, umbral_b=0.95):
+    """
+    Calcular clase ABC, rotación y días de cobertura de todo el catálogo.
+
+    - Rotación: unidades de salida / stock promedio del periodo, donde el
+      stock inicial se estima como stock_actual - entradas + salidas.
+    - Días de cobertura: stock_actual / demanda diaria promedio del periodo.
+    """
+    dias = max((fecha_hasta_dt.date() - fecha_desde_dt.date()).days + 1, 1)
+
+    catalogo = _cargar_catalogo(categoria_id)
+    flujos = _cargar_flujos(fecha_desde_dt, fecha_hasta_dt, categoria_id)
+
+    if catalogo.empty:
+        return {'dias': dias, 'resumen': _resumen_vacio(), 'productos': []}
+
+    if not flujos.empty:
+        flujos['unidades'] = pd.to_numeric(flujos['unidades']).astype('float64')
+        flujos['valor'] = pd.to_numeric(flujos['valor']).astype('float64')
+        pivote = flujos.pivot_table(index='producto_id', columns='tipo',
+                                    values=['unidades', 'valor'], aggfunc='sum', fill_value=0)
+        pivote.columns = [f'{medida}_{tipo}' for medida, tipo in pivote.columns]
+        df = catalogo.merge(pivote, how='left', left_on='producto_id', right_index=True)
+    else:
+        df = catalogo
+
+    for columna in ('unidades_entrada', 'unidades_salida', 'valor_salida'):
+        if columna not in df:
+            df[columna] = 0.0
+    df[['unidades_entrada', 'unidades_salida', 'valor_salida']] = \
+        df[['unidades_entrada', 'unidades_salida', 'valor_salida']].fillna(0.0)
+    df['stock_actual'] = pd.to_numeric(df['stock_actual']).fillna(0).astype('int64')
+
+    # Clasificación ABC sobre el valor de consumo (salidas valorizadas)
+    df['valor_consumo'] = df['valor_salida']
+    clases, porcentaje, acumulado = clasificar_abc(df['valor_consumo'], umbral_a, umbral_b)
+    df['clase_abc'] = clases
+    df['porcentaje_valor'] = (porcentaje * 100).round(4)
+    df['porcentaje_acumulado'] = (acumulado * 100).round(4)
+
+    # Rotación y cobertura
+    stock_inicial = (df['stock_actual'] - df['unidades_entrada'] + df['unidades_salida']).clip(lower=0)
+    df['stock_promedio'] = (stock_inicial + df['stock_actual']) / 2
+    df['rotacion'] = (df['unidades_salida'] / df['stock_promedio'].replace(0, np.nan)).round(4)
+    df['demanda_diaria'] = (df['unidades_salida'] / dias).round(4)
+    df['dias_cobertura'] = (df['stock_actual'] / df['demanda_diaria'].replace(0, np.nan)).round(1)
+
+    df['unidades_entrada'] = df['unidades_entrada'].astype('int64')
+    df['unidades_salida'] = df['unidades_salida'].astype('int64')
+    df['valor_consumo'] = df['valor_consumo'].round(2)
+
+    df = df.sort_values(['valor_consumo', 'producto_id'], ascending=[False, True])
+
+    resumen = df.groupby('clase_abc').agg(
+        productos=('producto_id', 'size'),
+        valor_consumo=('valor_consumo', 'sum'),
+        unidades_salida=('unidades_salida', 'sum')
+    )
+    total_valor = float(df['valor_consumo'].sum())
+    resumen_dict = _resumen_vacio()
+    for clase, fila in resumen.iterrows():
+        resumen_dict[clase] = {
+            'productos': int(fila['productos']),
+            'valor_consumo': round(float(fila['valor_consumo']), 2),
+            'porcentaje_valor': round(float(fila['valor_consumo']) / total_valor * 100, 2) if total_valor else 0.0,
+            'unidades_salida': int(fila['unidades_salida'])
+        }
+
+    return {
+        'dias': dias,
+        'resumen': resumen_dict,
+        'productos': dataframe_a_registros(df[COLUMNAS_PRODUCTO])
+    }
+
+
+def _resumen_vacio():
+    return {
+        clase: {'productos': 0, 'valor_consumo': 0.0, 'porcentaje_valor': 0.0, 'unidades_salida': 0}
+        for clase in ('A', 'B', 'C')
+    }
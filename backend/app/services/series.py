@@ -0,0 +1,91 @@
+"""
+Serie temporal de movimientos por día
+
+Una sola consulta sobre los totales diarios (movimientos_diarios) agrupada
+por fecha y tipo devuelve cantidad de movimientos, unidades y valor de cada
+día del periodo. Los días cerrados (anteriores al día UTC en curso) no
+cambian salvo al reconstruir los totales, así que se guardan en la caché uno
+por uno (con la versión de reconstrucción en la clave) y solo se consultan
+los días que faltan (el tramo entre el primero y el último no cacheados) más
+el día en curso. Los días se agrupan después en intervalos de N días.
+"""
+
+from datetime import date, datetime, timedelta
+from flask import current_app
+from backend.app import cache
+from backend.app.services import movimientos_diarios
+from backend.app.services.analitica import TIPOS_MOVIMIENTO
+from backend.app.utils.versiones import obtener_version
+
+
+def _clave_dia(dia, version):
+    return f'movimientos:dia:{version}:{dia.isoformat()}'
+
+
+def _dia_vacio():
+    return {tipo: {'cantidad': 0, 'unidades': 0, 'valor': 0.0} for tipo in TIPOS_MOVIMIENTO}
+
+
+def _como_fecha(valor):
+    """Normalizar una fecha leída como date o como texto 'YYYY-MM-DD'"""
+    return valor if isinstance(valor, date) else date.fromisoformat(str(valor)[:10])
+
+
+def consultar_dias(desde, hasta):
+    """Totales por día y tipo de movimiento de los días en [desde, hasta]"""
+    dias = {desde + timedelta(days=i): _dia_vacio() for i in range((hasta - desde).days + 1)}
+    for fila in movimientos_diarios.totales_por_dia(desde, hasta):
+        dias[_como_fecha(fila.fecha)][fila.tipo] = {
+            'cantidad': int(fila.movimientos),
+            'unidades': int(fila.unidades),
+            'valor': float(fila.valor)
+        }
+    return dias
+
+
+def totales_por_dia(desde, hasta):
+    """Totales de cada día del periodo, leyendo de la caché los días cerrados"""
+    # fecha_movimiento se guarda en UTC: un día está cerrado cuando terminó en UTC
+    hoy = datetime.utcnow().date()
+    todos = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+    version = obtener_version(movimientos_diarios.VERSION_RECONSTRUCCION)
+
+    dias = {}
+    for dia in todos:
+        if dia < hoy:
+            guardado = cache.get(_clave_dia(dia, version))
+            if guardado is not None:
+                dias[dia] = guardado
+
+    faltantes = [dia for dia in todos if dia not in dias]
+    if faltantes:
+        consultados = consultar_dias(faltantes[0], faltantes[-1])
+        ttl = current_app.config['MOVIMIENTOS_DIA_CACHE_TTL']
+        for dia in faltantes:
+            dias[dia] = consultados[dia]
+            if dia < hoy:
+                cache.set(_clave_dia(dia, version), dias[dia], ttl)
+
+    return dias
+
+
+def serie_movimientos(desde, hasta, intervalo=1):
+    """
+    Serie de movimientos entre desde y hasta (fechas inclusive) en
+    intervalos de `intervalo` días a partir de desde.
+    """
+    dias = totales_por_dia(desde, hasta)
+    serie = []
+    inicio = desde
+    while inicio <= hasta:
+        fin = min(inicio + timedelta(days=intervalo - 1), hasta)
+        punto = {'fecha_desde': inicio.isoformat(), 'fecha_hasta': fin.isoformat(), **_dia_vacio()}
+        dia = inicio
+        while dia <= fin:
+            for tipo in TIPOS_MOVIMIENTO:
+                for medida in ('cantidad', 'unidades', 'valor'):
+                    punto[tipo][medida] += dias[dia][tipo][medida]
+            dia += timedelta(days=1)
+        serie.append(punto)
+        inicio = fin + timedelta(days=1)
+    return serie
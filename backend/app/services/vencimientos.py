@@ -0,0 +1,178 @@
+"""
+Calendario de vencimientos por lote
+
+Cada producto tiene uno o más lotes (tabla lotes) con su fecha de
+vencimiento y cantidad, indexados por fecha_vencimiento y por
+(producto_id, fecha_vencimiento). Las consultas de vencimiento recorren solo
+los lotes de la ventana de fechas pedida en lugar de escanear productos, y
+una función de ventana (ROW_NUMBER) elige el lote más próximo a vencer de
+cada producto en la misma consulta.
+
+El lote principal de un producto refleja sus campos lote/fecha_vencimiento y
+se sincroniza al crear o modificar el producto.
+"""
+
+from datetime import timedelta
+from sqlalchemy import select, func, insert, exists, and_
+from backend.app import db
+from backend.app.models.producto import Producto
+from backend.app.models.lote import Lote
+from backend.app.models.alerta import Alerta
+from backend.app.utils.fechas import hoy as fecha_hoy
+from backend.app.utils.rangos import en_rango
+from backend.app.utils.versiones import marcar_modificadas
+
+
+def sincronizar_lote_principal(producto, lote_anterior=None):
+    """
+    Reflejar lote y fecha_vencimiento del producto en su lote principal.
+
+    lote_anterior es el valor previo de producto.lote: si cambió, el lote
+    anterior se renombra (conserva su cantidad) salvo que ya exista un lote
+    con el código nuevo. El producto debe tener id (llamar después de un
+    flush).
+    """
+    codigo = producto.lote or Lote.LOTE_GENERAL
+    lote = Lote.query.filter_by(producto_id=producto.id, codigo=codigo).first()
+
+    anterior = lote_anterior or Lote.LOTE_GENERAL
+    if lote is None and anterior != codigo:
+        lote = Lote.query.filter_by(producto_id=producto.id, codigo=anterior).first()
+        if lote is not None:
+            lote.codigo = codigo
+
+    if lote is None:
+        lote = Lote(
+            producto_id=producto.id,
+            codigo=codigo,
+            fecha_vencimiento=producto.fecha_vencimiento,
+            cantidad=producto.stock_actual or 0
+        )
+        db.session.add(lote)
+    else:
+        lote.fecha_vencimiento = producto.fecha_vencimiento
+
+    return lote
+
+
+def reconstruir_lotes():
+    """
+    Crear el lote principal de los productos que aún no tienen lotes, con
+    todo su stock actual (INSERT ... SELECT, sin recorrer filas en Python).
+
+    Devuelve la cantidad de lotes creados.
+    """
+    sin_lotes = ~exists().where(Lote.producto_id == Producto.id)
+    stmt = insert(Lote).from_select(
+        ['producto_id', 'codigo', 'fecha_vencimiento', 'cantidad', 'fecha_creacion'],
+        select(
+            Producto.id,
+            func.coalesce(Producto.lote, Lote.LOTE_GENERAL),
+            Producto.fecha_vencimiento,
+            func.coalesce(Producto.stock_actual, 0),
+            func.coalesce(Producto.fecha_creacion, func.now()),
+        ).where(sin_lotes)
+    )
+    resultado = db.session.execute(stmt)
+    db.session.commit()
+    # INSERT ... SELECT no pasa por los eventos de la sesión
+    marcar_modificadas(Lote.__tablename__)
+    return resultado.rowcount
+
+
+def consulta_lotes_proximos(condicion):
+    """
+    Lote con stock más próximo a vencer de cada producto activo entre los
+    lotes que cumplen la condición, junto con las unidades afectadas.
+
+    Devuelve filas (Producto, lote, fecha_vencimiento, cantidad).
+    """
+    lotes = select(
+        Lote.producto_id,
+        Lote.codigo,
+        Lote.fecha_vencimiento,
+        func.row_number().over(
+            partition_by=Lote.producto_id,
+            order_by=(Lote.fecha_vencimiento, Lote.id)
+        ).label('orden'),
+        func.sum(Lote.cantidad).over(partition_by=Lote.producto_id).label('cantidad'),
+    ).where(condicion, Lote.cantidad > 0).subquery()
+
+    return select(Producto, lotes.c.codigo, lotes.c.fecha_vencimiento, lotes.c.cantidad)\
+        .join(lotes, lotes.c.producto_id == Producto.id)\
+        .where(lotes.c.orden == 1, Producto.activo == True)\
+        .order_by(lotes.c.fecha_vencimiento)
+
+
+def productos_vencidos(hoy=None):
+    """Subconsulta de ids de productos con algún lote vencido con stock"""
+    hoy = hoy or fecha_hoy()
+    return select(Lote.producto_id).where(Lote.fecha_vencimiento < hoy, Lote.cantidad > 0)
+
+
+def generar_alertas_vencimiento(usuario_id, dias_alerta=30, hoy=None, desde=None, hasta=None):
+    """
+    Crear alertas 'vencimiento' (lotes que vencen en los próximos
+    dias_alerta días) y 'vencido' (lotes vencidos con stock), una por
+    producto y sin duplicar alertas activas, de los productos con id en
+    [desde, hasta) o de todos. No confirma la sesión.
+
+    Devuelve la lista de alertas creadas.
+    """
+    hoy = hoy or fecha_hoy()
+    existentes = set(db.session.execute(
+        select(Alerta.producto_id, Alerta.tipo).where(
+            Alerta.activa == True,
+            Alerta.tipo.in_(['vencimiento', 'vencido']),
+            en_rango(Alerta.producto_id, desde, hasta)
+        )
+    ).all())
+
+    alertas = []
+
+    por_vencer = db.session.execute(consulta_lotes_proximos(and_(
+        Lote.fecha_vencimiento.between(hoy, hoy + timedelta(days=dias_alerta)),
+        en_rango(Lote.producto_id, desde, hasta)
+    )))
+    for producto, lote, fecha_vencimiento, cantidad in por_vencer:
+        if (producto.id, 'vencimiento') in existentes:
+            continue
+
+        dias_restantes = (fecha_vencimiento - hoy).days
+        if dias_restantes <= 7:
+            prioridad = 'critica'
+        elif dias_restantes <= 15:
+            prioridad = 'alta'
+        else:
+            prioridad = 'media'
+
+        alertas.append(Alerta(
+            producto_id=producto.id,
+            usuario_id=usuario_id,
+            tipo='vencimiento',
+            titulo=f'Próximo a vencer: {producto.nombre}',
+            mensaje=f'El producto {producto.codigo} - {producto.nombre} vence en {dias_restantes} días '
+                    f'(Fecha de vencimiento: {fecha_vencimiento}, lote {lote}, {cantidad} unidades)',
+            prioridad=prioridad
+        ))
+
+    vencidos = db.session.execute(consulta_lotes_proximos(and_(
+        Lote.fecha_vencimiento < hoy, en_rango(Lote.producto_id, desde, hasta)
+    )))
+    for producto, lote, fecha_vencimiento, cantidad in vencidos:
+        if (producto.id, 'vencido') in existentes:
+            continue
+
+        dias_vencido = (hoy - fecha_vencimiento).days
+        alertas.append(Alerta(
+            producto_id=producto.id,
+            usuario_id=usuario_id,
+            tipo='vencido',
+            titulo=f'Producto vencido: {producto.nombre}',
+            mensaje=f'El producto {producto.codigo} - {producto.nombre} está vencido desde hace {dias_vencido} días '
+                    f'(Fecha de vencimiento: {fecha_vencimiento}, lote {lote}, {cantidad} unidades)',
+            prioridad='critica'
+        ))
+
+    db.session.add_all(alertas)
+    return alertas
@@ -1,181 +1,162 @@
-from datetime import datetime, date, timedelta
-from celery import Celery
-from backend.app import create_app, db
-from backend.app.models.producto import Producto
+"""
+Tareas de alertas y notificaciones
+
+Las tareas se declaran con shared_task y se enlazan a la instancia de
+Celery que crea make_celery() (en create_app), que además les da el
+contexto de la aplicación: importar este módulo no crea la aplicación.
+"""
+
+from datetime import datetime, timedelta
+from celery import shared_task, chord
+from flask import current_app
+from backend.app import db
 from backend.app.models.alerta import Alerta
 from backend.app.models.usuario import Usuario
-from flask_mail import Message, Mail
-
-# Crear aplicación Flask para el contexto de Celery
-app = create_app()
-celery = Celery(app.import_name)
-celery.conf.update(app.config)
+from backend.app.services.conciliacion import rangos_de_productos
+from backend.app.services.generacion_alertas import generar_alertas, contar_por_tipo, sumar_resultados
+from backend.app.services.correo import enviar_lote, enviar_notificaciones
+from backend.app.services.notificaciones import enviar_resumenes
+from backend.app.utils.bloqueos import Bloqueo, exclusiva, registrar_ejecucion
+from backend.config.config import LIMITES_COLAS_CELERY
 
-class ContextTask(celery.Task):
-    """Tarea que mantiene el contexto de la aplicación Flask"""
-    def __call__(self, *args, **kwargs):
-        with app.app_context():
-            return self.run(*args, **kwargs)
+GENERACION_ALERTAS = 'generar_alertas_automaticas'
 
-celery.Task = ContextTask
+def _bloqueo_generacion(token=None):
+    """
+    Arrendamiento de la generación de alertas: lo toma la tarea que reparte
+    los rangos, lo renueva cada rango con un latido mientras trabaja y lo
+    libera el callback. El TTL es el límite duro de una tarea de la cola
+    de alertas.
+    """
+    return Bloqueo(GENERACION_ALERTAS, ttl=LIMITES_COLAS_CELERY['alertas'] + 60, token=token)
 
-@celery.task
+@shared_task
 def generar_alertas_automaticas():
-    """Tarea para generar alertas automáticas de stock bajo y vencimientos"""
+    """
+    Tarea para generar alertas automáticas de stock bajo y vencimientos:
+    reparte el catálogo en rangos de ids evaluados en paralelo (chord) y
+    suma los resultados en resumir_alertas_generadas. Se omite si la
+    generación anterior sigue en curso.
+    """
     try:
-        with app.app_context():
-            alertas_creadas = 0
-            
-            # Obtener usuario admin para crear las alertas
-            admin_user = Usuario.query.filter_by(rol='admin').first()
-            if not admin_user:
-                return {'error': 'No se encontró usuario administrador'}
-            
-            # Buscar productos con stock bajo o sin stock
-            productos_stock_bajo = Producto.query.filter(
-                Producto.stock_actual <= Producto.stock_minimo,
-                Producto.activo == True
-            ).all()
-            
-            for producto in productos_stock_bajo:
-                # Verificar si ya existe una alerta activa para este producto
-                alerta_existente = Alerta.query.filter_by(
-                    producto_id=producto.id,
-                    tipo='stock_bajo' if producto.stock_actual > 0 else 'sin_stock',
-                    activa=True
-                ).first()
-                
-                if not alerta_existente:
-                    if producto.stock_actual == 0:
-                        tipo = 'sin_stock'
-                        titulo = f'Sin stock: {producto.nombre}'
-                        mensaje = f'El producto {producto.codigo} - {producto.nombre} no tiene stock disponible.'
-                        prioridad = 'critica'
-                    else:
-                        tipo = 'stock_bajo'
-                        titulo = f'Stock bajo: {producto.nombre}'
-                        mensaje = f'El producto {producto.codigo} - {producto.nombre} tiene stock bajo. Stock actual: {producto.stock_actual}, Stock mínimo: {producto.stock_minimo}'
-                        prioridad = 'alta'
-                    
-                    alerta = Alerta(
-                        producto_id=producto.id,
-                        usuario_id=admin_user.id,
-                        tipo=tipo,
-                        titulo=titulo,
-                        mensaje=mensaje,
-                        prioridad=prioridad
-                    )
-                    
-                    db.session.add(alerta)
-                    alertas_creadas += 1
-            
-            # Buscar productos próximos a vencer (30 días)
-            fecha_limite = date.today()
-            fecha_limite_vencimiento = fecha_limite + timedelta(days=30)
-            
-            productos_por_vencer = Producto.query.filter(
-                Producto.fecha_vencimiento.between(fecha_limite, fecha_limite_vencimiento),
-                Producto.activo == True
-            ).all()
-            
-            for producto in productos_por_vencer:
-                # Verificar si ya existe una alerta activa para este producto
-                alerta_existente = Alerta.query.filter_by(
-                    producto_id=producto.id,
-                    tipo='vencimiento',
-                    activa=True
-                ).first()
-                
-                if not alerta_existente:
-                    dias_restantes = (producto.fecha_vencimiento - fecha_limite).days
-                    
-                    if dias_restantes <= 7:
-                        prioridad = 'critica'
-                    elif dias_restantes <= 15:
-                        prioridad = 'alta'
-                    else:
-                        prioridad = 'media'
-                    
-                    alerta = Alerta(
-                        producto_id=producto.id,
-                        usuario_id=admin_user.id,
-                        tipo='vencimiento',
-                        titulo=f'Próximo a vencer: {producto.nombre}',
-                        mensaje=f'El producto {producto.codigo} - {producto.nombre} vence en {dias_restantes} días (Fecha de vencimiento: {producto.fecha_vencimiento})',
-                        prioridad=prioridad
-                    )
-                    
-                    db.session.add(alerta)
-                    alertas_creadas += 1
-            
-            # Buscar productos vencidos
-            productos_vencidos = Producto.query.filter(
-                Producto.fecha_vencimiento < fecha_limite,
-                Producto.activo == True
-            ).all()
-            
-            for producto in productos_vencidos:
-                # Verificar si ya existe una alerta activa para este producto
-                alerta_existente = Alerta.query.filter_by(
-                    producto_id=producto.id,
-                    tipo='vencido',
-                    activa=True
-                ).first()
-                
-                if not alerta_existente:
-                    dias_vencido = (fecha_limite - producto.fecha_vencimiento).days
-                    
-                    alerta = Alerta(
-                        producto_id=producto.id,
-                        usuario_id=admin_user.id,
-                        tipo='vencido',
-                        titulo=f'Producto vencido: {producto.nombre}',
-                        mensaje=f'El producto {producto.codigo} - {producto.nombre} está vencido desde hace {dias_vencido} días (Fecha de vencimiento: {producto.fecha_vencimiento})',
-                        prioridad='critica'
-                    )
-                    
-                    db.session.add(alerta)
-                    alertas_creadas += 1
-            
-            db.session.commit()
-            
+        bloqueo = _bloqueo_generacion()
+        if not bloqueo.adquirir() and bloqueo.tomado():
             return {
                 'success': True,
-                'alertas_creadas': alertas_creadas,
+                'omitida': True,
+                'motivo': 'Otra ejecución en curso',
                 'fecha_ejecucion': datetime.now().isoformat()
             }
+        
+        despachada = False
+        try:
+            # Obtener usuario admin para crear las alertas
+            admin_user = Usuario.query.filter_by(rol='admin').first()
+            if not admin_user:
+                return {'error': 'No se encontró usuario administrador'}
             
+            rangos = rangos_de_productos(current_app.config['ALERTAS_TAMANO_RANGO'])
+            if not rangos:
+                return {
+                    'success': True,
+                    'rangos': 0,
+                    'fecha_ejecucion': datetime.now().isoformat()
+                }
+            
+            resultado = chord(
+                generar_alertas_rango.s(admin_user.id, desde, hasta, bloqueo.token)
+                for desde, hasta in rangos
+            )(resumir_alertas_generadas.s(datetime.now().isoformat(), bloqueo.token))
+            despachada = True
+        finally:
+            if not despachada:
+                bloqueo.liberar()
+        
+        return {
+            'success': True,
+            'rangos': len(rangos),
+            'resumen_id': resultado.id,
+            'fecha_ejecucion': datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'fecha_ejecucion': datetime.now().isoformat()
+        }
+
+@shared_task
+def generar_alertas_rango(usuario_id, desde, hasta, token=None):
+    """Tarea para generar las alertas de los productos con id en [desde, hasta)"""
+    latido = None
+    try:
+        if token:
+            bloqueo = _bloqueo_generacion(token)
+            bloqueo.renovar()
+            latido = bloqueo.latido()
+        
+        alertas = generar_alertas(
+            usuario_id, dias_alerta=current_app.config['DIAS_VENCIMIENTO_ALERTA'], desde=desde, hasta=hasta
+        )
+        db.session.commit()
+        
+        return {
+            'success': True,
+            'rango': [desde, hasta],
+            'alertas_creadas': len(alertas),
+            'por_tipo': contar_por_tipo(alertas),
+            'fecha_ejecucion': datetime.now().isoformat()
+        }
+        
     except Exception as e:
         db.session.rollback()
         return {
             'success': False,
+            'rango': [desde, hasta],
             'error': str(e),
             'fecha_ejecucion': datetime.now().isoformat()
         }
+    finally:
+        if latido:
+            latido.detener()
 
-@celery.task
+@shared_task
+def resumir_alertas_generadas(resultados, fecha_inicio, token=None):
+    """Callback del chord: sumar las alertas creadas en cada rango y liberar la generación"""
+    total = sumar_resultados(resultados)
+    resumen = {
+        'success': not total['errores'],
+        **total,
+        'fecha_inicio': fecha_inicio,
+        'fecha_ejecucion': datetime.now().isoformat()
+    }
+    inicio = datetime.fromisoformat(fecha_inicio)
+    registrar_ejecucion(GENERACION_ALERTAS, inicio, (datetime.now() - inicio).total_seconds(), resumen)
+    if token:
+        _bloqueo_generacion(token).liberar()
+    return resumen
+
+@shared_task
 def enviar_notificacion_email(destinatario, asunto, mensaje):
     """Tarea para enviar notificaciones por email"""
     try:
-        with app.app_context():
-            mail = Mail(app)
-            
-            msg = Message(
-                subject=asunto,
-                recipients=[destinatario],
-                body=mensaje,
-                sender=app.config['MAIL_USERNAME']
-            )
-            
-            mail.send(msg)
-            
-            return {
-                'success': True,
-                'destinatario': destinatario,
-                'asunto': asunto,
-                'fecha_envio': datetime.now().isoformat()
-            }
-            
+        resultado = enviar_lote([{
+            'destinatario': destinatario,
+            'asunto': asunto,
+            'mensaje': mensaje
+        }])
+        
+        if resultado['fallidos']:
+            raise RuntimeError(resultado['fallidos'][0][1])
+        
+        return {
+            'success': True,
+            'destinatario': destinatario,
+            'asunto': asunto,
+            'fecha_envio': datetime.now().isoformat()
+        }
+        
     except Exception as e:
         return {
             'success': False,
@@ -184,31 +165,77 @@ def enviar_notificacion_email(destinatario, asunto, mensaje):
             'fecha_intento': datetime.now().isoformat()
         }
 
-@celery.task
+@shared_task
+def enviar_notificaciones_lote(notificaciones):
+    """
+    Tarea para enviar muchas notificaciones ({destinatario, asunto, mensaje})
+    agrupadas en un resumen por destinatario y por una sola conexión SMTP
+    """
+    try:
+        resultado = enviar_notificaciones(notificaciones)
+        
+        return {
+            'success': not resultado['fallidos'],
+            'notificaciones': resultado['notificaciones'],
+            'correos': resultado['correos'],
+            'enviados': len(resultado['enviados']),
+            'fallidos': resultado['fallidos'],
+            'fecha_ejecucion': datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'fecha_ejecucion': datetime.now().isoformat()
+        }
+
+@shared_task
+@exclusiva(coalescer=True)
+def enviar_resumen_notificaciones():
+    """Tarea para enviar las notificaciones de alertas pendientes en resúmenes"""
+    try:
+        resultado = enviar_resumenes()
+        
+        return {
+            'success': not resultado['fallidas'],
+            **resultado,
+            'fecha_ejecucion': datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        db.session.rollback()
+        return {
+            'success': False,
+            'error': str(e),
+            'fecha_ejecucion': datetime.now().isoformat()
+        }
+
+@shared_task
+@exclusiva()
 def limpiar_alertas_resueltas():
     """Tarea para limpiar alertas resueltas antiguas (más de 30 días)"""
     try:
-        with app.app_context():
-            fecha_limite = datetime.now() - timedelta(days=30)
-            
-            alertas_antiguas = Alerta.query.filter(
-                Alerta.resuelta == True,
-                Alerta.fecha_resolucion < fecha_limite
-            ).all()
-            
-            alertas_eliminadas = len(alertas_antiguas)
-            
-            for alerta in alertas_antiguas:
-                db.session.delete(alerta)
-            
-            db.session.commit()
-            
-            return {
-                'success': True,
-                'alertas_eliminadas': alertas_eliminadas,
-                'fecha_ejecucion': datetime.now().isoformat()
-            }
-            
+        fecha_limite = datetime.now() - timedelta(days=30)
+        
+        alertas_antiguas = Alerta.query.filter(
+            Alerta.resuelta == True,
+            Alerta.fecha_resolucion < fecha_limite
+        ).all()
+        
+        alertas_eliminadas = len(alertas_antiguas)
+        
+        for alerta in alertas_antiguas:
+            db.session.delete(alerta)
+        
+        db.session.commit()
+        
+        return {
+            'success': True,
+            'alertas_eliminadas': alertas_eliminadas,
+            'fecha_ejecucion': datetime.now().isoformat()
+        }
+        
     except Exception as e:
         db.session.rollback()
         return {
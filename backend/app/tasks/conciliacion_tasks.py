@@ -0,0 +1,48 @@
+from datetime import datetime
+from celery import shared_task
+from flask import current_app
+from backend.app import db
+from backend.app.models.usuario import Usuario
+from backend.app.utils.bloqueos import exclusiva
+from backend.app.services.conciliacion import conciliar_stock
+
+# Diferencias incluidas en el resultado de la tarea (el resto solo se cuenta)
+MAXIMO_DETALLE = 100
+
+@shared_task
+@exclusiva()
+def conciliar_libro_stock(aplicar=False):
+    """Tarea para verificar el libro de movimientos y, opcionalmente, corregir saldos"""
+    try:
+        usuario_id = None
+        if aplicar:
+            admin_user = Usuario.query.filter_by(rol='admin').first()
+            if not admin_user:
+                return {'error': 'No se encontró usuario administrador'}
+            usuario_id = admin_user.id
+        
+        reporte = conciliar_stock(
+            tamano_rango=current_app.config['CONCILIACION_TAMANO_RANGO'],
+            workers=current_app.config['CONCILIACION_WORKERS'],
+            aplicar=aplicar,
+            usuario_id=usuario_id,
+            tamano_lote=current_app.config['CONCILIACION_TAMANO_LOTE']
+        )
+        
+        return {
+            'success': True,
+            'diferencias_saldo': len(reporte['diferencias_saldo']),
+            'saltos_cadena': len(reporte['saltos_cadena']),
+            'ajustes_aplicados': reporte['ajustes_aplicados'],
+            'errores': reporte['errores'],
+            'detalle': reporte['diferencias_saldo'][:MAXIMO_DETALLE],
+            'fecha_ejecucion': datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        db.session.rollback()
+        return {
+            'success': False,
+            'error': str(e),
+            'fecha_ejecucion': datetime.now().isoformat()
+        }
@@ -0,0 +1,35 @@
+from datetime import datetime
+from celery import shared_task
+from flask import current_app
+from backend.app import db
+from backend.app.utils.bloqueos import exclusiva
+from backend.app.services.pronostico import calcular_puntos_reorden
+
+@shared_task
+@exclusiva()
+def calcular_pronostico_demanda():
+    """Tarea nocturna para recalcular demanda, stock de seguridad y punto de reorden"""
+    try:
+        resultado = calcular_puntos_reorden(
+            dias_historia=current_app.config['PRONOSTICO_DIAS_HISTORIA'],
+            alpha=current_app.config['PRONOSTICO_ALPHA'],
+            lead_time=current_app.config['PRONOSTICO_LEAD_TIME_DIAS'],
+            z=current_app.config['PRONOSTICO_Z'],
+            dias_minimos=current_app.config['PRONOSTICO_DIAS_MINIMOS'],
+            tamano_lote=current_app.config['PRONOSTICO_TAMANO_LOTE'],
+            workers=current_app.config['PRONOSTICO_WORKERS']
+        )
+        
+        return {
+            'success': True,
+            **resultado,
+            'fecha_ejecucion': datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        db.session.rollback()
+        return {
+            'success': False,
+            'error': str(e),
+            'fecha_ejecucion': datetime.now().isoformat()
+        }
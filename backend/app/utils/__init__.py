@@ -0,0 +1 @@
+# Utilidades compartidas de la aplicación
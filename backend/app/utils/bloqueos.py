@@ -0,0 +1,150 @@
+"""
+Bloqueos con arrendamiento para tareas programadas
+
+Beat puede disparar una tarea mientras la ejecución anterior sigue en curso
+(una corrida que tarda más que su intervalo, o dos procesos beat). Cada
+ejecución toma un arrendamiento en la caché (SET NX con TTL en Redis) con un
+token propio; mientras trabaja, un hilo lo renueva cada tercio del TTL
+(latido), y al terminar lo libera solo si el token sigue siendo el suyo. Si
+el proceso muere, el arrendamiento vence solo a los TAREAS_BLOQUEO_TTL
+segundos.
+
+Una ejecución que encuentra el arrendamiento tomado se omite. Con
+coalescer=True además deja una marca para que la ejecución en curso corra
+una vez más al terminar: varios disparos superpuestos se reducen a uno.
+
+La duración de cada ejecución se guarda en la caché (las últimas
+TAREAS_HISTORIAL por tarea, ver `flask estado-tareas`).
+"""
+
+import threading
+import time
+import uuid
+from datetime import datetime
+from functools import wraps
+from flask import current_app
+from backend.app import cache
+
+
+def _clave_bloqueo(nombre):
+    return f'tareas:{nombre}:bloqueo'
+
+
+def _clave_pendiente(nombre):
+    return f'tareas:{nombre}:pendiente'
+
+
+def _clave_ejecuciones(nombre):
+    return f'tareas:{nombre}:ejecuciones'
+
+
+class Bloqueo:
+    """Arrendamiento exclusivo con nombre; token identifica al dueño"""
+
+    def __init__(self, nombre, ttl=None, token=None):
+        self.nombre = nombre
+        self.ttl = ttl or current_app.config['TAREAS_BLOQUEO_TTL']
+        self.token = token or uuid.uuid4().hex
+
+    def adquirir(self):
+        """Tomar el arrendamiento si está libre"""
+        return cache.add(_clave_bloqueo(self.nombre), self.token, ttl=self.ttl)
+
+    def tomado(self):
+        """Hay un arrendamiento vigente (propio o ajeno)"""
+        return cache.get(_clave_bloqueo(self.nombre)) is not None
+
+    def renovar(self):
+        """Extender el arrendamiento; False si ya no es nuestro"""
+        return cache.expire_if(_clave_bloqueo(self.nombre), self.token, self.ttl)
+
+    def liberar(self):
+        """Soltar el arrendamiento si sigue siendo nuestro"""
+        return cache.delete_if(_clave_bloqueo(self.nombre), self.token)
+
+    def latido(self):
+        """Hilo que renueva el arrendamiento hasta llamar a detener()"""
+        return _Latido(self, current_app._get_current_object())
+
+
+class _Latido(threading.Thread):
+    def __init__(self, bloqueo, app):
+        super().__init__(name=f'latido-{bloqueo.nombre}', daemon=True)
+        self.bloqueo = bloqueo
+        self.app = app
+        self.detenido = threading.Event()
+        self.start()
+
+    def run(self):
+        with self.app.app_context():
+            while not self.detenido.wait(self.bloqueo.ttl / 3):
+                if not self.bloqueo.renovar():
+                    # Arrendamiento perdido (venció o lo tomó otro): dejar de renovar
+                    break
+
+    def detener(self):
+        self.detenido.set()
+        self.join()
+
+
+def registrar_ejecucion(nombre, inicio, duracion, resultado=None):
+    """Guardar la duración de una ejecución en el historial de la tarea"""
+    historial = cache.get(_clave_ejecuciones(nombre)) or []
+    historial.append({
+        'inicio': inicio.isoformat(),
+        'duracion': round(duracion, 3),
+        'success': resultado.get('success', True) if isinstance(resultado, dict) else True
+    })
+    cache.set(_clave_ejecuciones(nombre), historial[-current_app.config['TAREAS_HISTORIAL']:], ttl=0)
+
+
+def ejecuciones(nombre):
+    """Últimas ejecuciones registradas de una tarea (más antigua primero)"""
+    return cache.get(_clave_ejecuciones(nombre)) or []
+
+
+def _omitida(motivo):
+    return {
+        'success': True,
+        'omitida': True,
+        'motivo': motivo,
+        'fecha_ejecucion': datetime.now().isoformat()
+    }
+
+
+def exclusiva(nombre=None, ttl=None, coalescer=False):
+    """
+    Decorador para tareas programadas: una sola ejecución a la vez.
+
+    Se aplica debajo de @shared_task (necesita el contexto de la
+    aplicación). Las ejecuciones superpuestas se omiten, o se coalescen en
+    una ejecución más al terminar la actual si coalescer es True.
+    """
+    def decorador(funcion):
+        nombre_tarea = nombre or funcion.__name__
+
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            bloqueo = Bloqueo(nombre_tarea, ttl)
+            if not bloqueo.adquirir():
+                if bloqueo.tomado():
+                    if coalescer:
+                        cache.set(_clave_pendiente(nombre_tarea), True, ttl=bloqueo.ttl)
+                        return _omitida('Coalescida con la ejecución en curso')
+                    return _omitida('Otra ejecución en curso')
+                # Caché no disponible: se ejecuta sin protección antes que no ejecutar
+
+            latido = bloqueo.latido()
+            try:
+                while True:
+                    inicio = datetime.now()
+                    comienzo = time.monotonic()
+                    resultado = funcion(*args, **kwargs)
+                    registrar_ejecucion(nombre_tarea, inicio, time.monotonic() - comienzo, resultado)
+                    if not (coalescer and cache.delete(_clave_pendiente(nombre_tarea))):
+                        return resultado
+            finally:
+                latido.detener()
+                bloqueo.liberar()
+        return envoltura
+    return decorador
@@ -0,0 +1,247 @@
+"""
+Caché clave/valor con TTL para resultados costosos
+
+Usa Redis cuando CACHE_TYPE es 'redis' (compartida entre procesos y
+workers) y un diccionario en memoria cuando es 'memory' (tests y
+desarrollo). Los valores se guardan serializados como JSON. Si Redis no
+está disponible, las operaciones se degradan a fallos de caché en lugar de
+romper la petición.
+"""
+
+import json
+import logging
+import threading
+import time
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+class MemoriaBackend:
+    """Backend en memoria del proceso"""
+
+    def __init__(self):
+        self._datos = {}
+        self._lock = threading.Lock()
+
+    def _leer(self, clave):
+        entrada = self._datos.get(clave)
+        if entrada is None:
+            return None
+        valor, expira = entrada
+        if expira is not None and expira <= time.monotonic():
+            del self._datos[clave]
+            return None
+        return entrada
+
+    @staticmethod
+    def _expiracion(ttl):
+        return time.monotonic() + ttl if ttl else None
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._leer(clave)
+            return entrada[0] if entrada else None
+
+    def set(self, clave, valor, ttl=None):
+        with self._lock:
+            self._datos[clave] = (valor, self._expiracion(ttl))
+        return True
+
+    def add(self, clave, valor, ttl=None):
+        with self._lock:
+            if self._leer(clave):
+                return False
+            self._datos[clave] = (valor, self._expiracion(ttl))
+            return True
+
+    def delete(self, clave):
+        with self._lock:
+            return self._datos.pop(clave, None) is not None
+
+    def incr(self, clave, cantidad=1):
+        with self._lock:
+            entrada = self._leer(clave)
+            valor = (int(entrada[0]) if entrada else 0) + cantidad
+            self._datos[clave] = (str(valor), entrada[1] if entrada else None)
+            return valor
+
+    def incr_if_exists(self, clave, cantidad=1):
+        with self._lock:
+            entrada = self._leer(clave)
+            if not entrada:
+                return None
+            valor = int(entrada[0]) + cantidad
+            self._datos[clave] = (str(valor), entrada[1])
+            return valor
+
+    def expire(self, clave, ttl):
+        with self._lock:
+            entrada = self._leer(clave)
+            if not entrada:
+                return False
+            self._datos[clave] = (entrada[0], self._expiracion(ttl))
+            return True
+
+    def delete_if(self, clave, valor):
+        with self._lock:
+            entrada = self._leer(clave)
+            if not entrada or entrada[0] != valor:
+                return False
+            del self._datos[clave]
+            return True
+
+    def expire_if(self, clave, valor, ttl):
+        with self._lock:
+            entrada = self._leer(clave)
+            if not entrada or entrada[0] != valor:
+                return False
+            self._datos[clave] = (valor, self._expiracion(ttl))
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+
+class RedisBackend:
+    """Backend sobre Redis"""
+
+    # Comparar y borrar/renovar en un solo paso (scripts Lua atómicos)
+    SCRIPT_DELETE_IF = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+    )
+    SCRIPT_EXPIRE_IF = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('expire', KEYS[1], ARGV[2]) end return 0"
+    )
+    # INCRBY sobre una clave inexistente la crearía sin TTL
+    SCRIPT_INCR_IF_EXISTS = (
+        "if redis.call('exists', KEYS[1]) == 1 then return redis.call('incrby', KEYS[1], ARGV[1]) end return false"
+    )
+
+    def __init__(self, url):
+        import redis
+
+        self.cliente = redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=2)
+
+    @staticmethod
+    def _texto(valor):
+        return valor.decode('utf-8') if isinstance(valor, bytes) else valor
+
+    def get(self, clave):
+        return self._texto(self.cliente.get(clave))
+
+    def set(self, clave, valor, ttl=None):
+        return bool(self.cliente.set(clave, valor, ex=ttl or None))
+
+    def add(self, clave, valor, ttl=None):
+        return bool(self.cliente.set(clave, valor, ex=ttl or None, nx=True))
+
+    def delete(self, clave):
+        return bool(self.cliente.delete(clave))
+
+    def incr(self, clave, cantidad=1):
+        return int(self.cliente.incrby(clave, cantidad))
+
+    def incr_if_exists(self, clave, cantidad=1):
+        valor = self.cliente.eval(self.SCRIPT_INCR_IF_EXISTS, 1, clave, cantidad)
+        return int(valor) if valor is not None else None
+
+    def expire(self, clave, ttl):
+        return bool(self.cliente.expire(clave, ttl))
+
+    def delete_if(self, clave, valor):
+        return bool(self.cliente.eval(self.SCRIPT_DELETE_IF, 1, clave, valor))
+
+    def expire_if(self, clave, valor, ttl):
+        return bool(self.cliente.eval(self.SCRIPT_EXPIRE_IF, 1, clave, valor, ttl))
+
+    def clear(self):
+        pass
+
+
+class Cache:
+    """Extensión de caché inicializada con la aplicación Flask"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configurar el backend según CACHE_TYPE"""
+        app.config.setdefault('CACHE_TYPE', 'memory')
+        app.config.setdefault('CACHE_KEY_PREFIX', 'inventario:')
+        app.config.setdefault('CACHE_DEFAULT_TIMEOUT', 300)
+
+        if app.config['CACHE_TYPE'] == 'redis':
+            backend = RedisBackend(app.config['CACHE_REDIS_URL'])
+        else:
+            backend = MemoriaBackend()
+
+        app.extensions['cache'] = backend
+
+    @property
+    def backend(self):
+        return current_app.extensions['cache']
+
+    def _clave(self, clave):
+        return current_app.config['CACHE_KEY_PREFIX'] + clave
+
+    def _ejecutar(self, operacion, *args, defecto=None):
+        """Ejecutar una operación del backend sin propagar errores de conexión"""
+        try:
+            return getattr(self.backend, operacion)(*args)
+        except Exception as e:
+            logger.warning('Error de caché en %s: %s', operacion, e)
+            return defecto
+
+    def get(self, clave):
+        """Obtener un valor (None si no existe o expiró)"""
+        valor = self._ejecutar('get', self._clave(clave))
+        return json.loads(valor) if valor is not None else None
+
+    def set(self, clave, valor, ttl=None):
+        """Guardar un valor con TTL en segundos"""
+        if ttl is None:
+            ttl = current_app.config['CACHE_DEFAULT_TIMEOUT']
+        return self._ejecutar('set', self._clave(clave), json.dumps(valor, default=str), ttl, defecto=False)
+
+    def add(self, clave, valor, ttl=None):
+        """Guardar un valor solo si la clave no existe (operación atómica)"""
+        return self._ejecutar('add', self._clave(clave), json.dumps(valor, default=str), ttl, defecto=False)
+
+    def delete(self, clave):
+        """Eliminar una clave"""
+        return self._ejecutar('delete', self._clave(clave), defecto=False)
+
+    def incr(self, clave, cantidad=1):
+        """Incrementar atómicamente un contador entero"""
+        return self._ejecutar('incr', self._clave(clave), cantidad)
+
+    def incr_if_exists(self, clave, cantidad=1):
+        """Incrementar un contador solo si existe, conservando su TTL (None si no existe)"""
+        return self._ejecutar('incr_if_exists', self._clave(clave), cantidad)
+
+    def expire(self, clave, ttl):
+        """Renovar el TTL de una clave existente"""
+        return self._ejecutar('expire', self._clave(clave), ttl, defecto=False)
+
+    def delete_if(self, clave, valor):
+        """Eliminar una clave solo si aún guarda valor (operación atómica)"""
+        return self._ejecutar('delete_if', self._clave(clave), json.dumps(valor, default=str), defecto=False)
+
+    def expire_if(self, clave, valor, ttl):
+        """Renovar el TTL de una clave solo si aún guarda valor (operación atómica)"""
+        return self._ejecutar('expire_if', self._clave(clave), json.dumps(valor, default=str), ttl, defecto=False)
+
+    def clear(self):
+        """Vaciar la caché (solo backend en memoria)"""
+        return self._ejecutar('clear')
+
+    def obtener_o_calcular(self, clave, funcion, ttl=None):
+        """Devolver el valor cacheado o calcularlo y guardarlo"""
+        valor = self.get(clave)
+        if valor is None:
+            valor = funcion()
+            self.set(clave, valor, ttl)
+        return valor
@@ -0,0 +1,84 @@
+"""
+Proyección de campos (?fields=) para los listados
+
+Cada modelo declara en CAMPOS, por campo serializable, las columnas y
+relaciones que necesita y la función que lo calcula. Con ?fields=a,b la
+consulta carga solo esas columnas (load_only) y las relaciones necesarias
+en la misma consulta (joinedload / selectinload), y to_dict() construye
+solo esos campos.
+
+Las dependencias se escriben como 'columna' o 'relacion.columna'.
+"""
+
+from flask import request
+from sqlalchemy.orm import load_only, joinedload, selectinload
+
+
+class CampoInvalido(ValueError):
+    """Se pidió un campo que el modelo no expone"""
+
+
+def parsear_campos(modelo, parametro='fields'):
+    """
+    Leer la lista de campos pedidos en la query string.
+
+    Devuelve None si no se pidió proyección (todos los campos).
+    Lanza CampoInvalido si algún campo no existe.
+    """
+    valor = request.args.get(parametro)
+    if not valor:
+        return None
+
+    campos = []
+    for campo in valor.split(','):
+        campo = campo.strip()
+        if campo and campo not in campos:
+            campos.append(campo)
+
+    desconocidos = [campo for campo in campos if campo not in modelo.CAMPOS]
+    if desconocidos:
+        raise CampoInvalido(
+            f"Campos no válidos: {', '.join(desconocidos)}. "
+            f"Disponibles: {', '.join(modelo.CAMPOS)}"
+        )
+    return campos or None
+
+
+def opciones_carga(modelo, campos):
+    """Opciones de carga del ORM para serializar solo los campos indicados"""
+    if not campos:
+        return []
+
+    columnas = set()
+    relaciones = {}
+    for campo in campos:
+        for dependencia in modelo.CAMPOS[campo][0]:
+            if '.' in dependencia:
+                relacion, columna = dependencia.split('.', 1)
+                relaciones.setdefault(relacion, set()).add(columna)
+            else:
+                columnas.add(dependencia)
+
+    opciones = []
+    if columnas:
+        opciones.append(load_only(*[getattr(modelo, columna) for columna in sorted(columnas)]))
+    else:
+        # Solo la clave primaria
+        opciones.append(load_only(modelo.id))
+
+    for relacion, columnas_relacion in sorted(relaciones.items()):
+        atributo = getattr(modelo, relacion)
+        destino = atributo.property.mapper.class_
+        # Colecciones en una segunda consulta; relaciones a uno con JOIN
+        cargador = selectinload if atributo.property.uselist else joinedload
+        opciones.append(
+            cargador(atributo).load_only(*[getattr(destino, columna) for columna in sorted(columnas_relacion)])
+        )
+
+    return opciones
+
+
+def serializar(instancia, campos=None):
+    """Construir el diccionario de una instancia con los campos pedidos (o todos)"""
+    especificacion = type(instancia).CAMPOS
+    return {campo: especificacion[campo][1](instancia) for campo in (campos or especificacion)}
@@ -0,0 +1,86 @@
+"""
+Compresión negociada de respuestas (gzip / brotli)
+
+Comprime en after_request las respuestas de texto (JSON, HTML, CSV...) que
+superan COMPRESION_MINIMO bytes, según el Accept-Encoding del cliente.
+Brotli se usa solo si la librería está instalada; si no, gzip. Las
+respuestas en streaming, los archivos enviados con send_file y las que ya
+tienen Content-Encoding no se tocan.
+"""
+
+import gzip
+from flask import request, current_app
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+TIPOS_COMPRIMIBLES = {
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/csv',
+    'text/plain',
+    'text/javascript',
+}
+
+
+def comprimir(datos, codificacion, nivel):
+    """Comprimir bytes con la codificación indicada"""
+    if codificacion == 'br':
+        # Brotli usa niveles 0-11; se escala el nivel de gzip (1-9)
+        return brotli.compress(datos, quality=min(11, round(nivel * 11 / 9)))
+    return gzip.compress(datos, compresslevel=nivel, mtime=0)
+
+
+def elegir_codificacion(accept_encodings):
+    """Elegir la mejor codificación aceptada por el cliente (o None)"""
+    candidatas = ['br', 'gzip'] if brotli is not None else ['gzip']
+    calidades = {codificacion: accept_encodings[codificacion] for codificacion in candidatas}
+    mejor = max(candidatas, key=lambda c: calidades[c])
+    return mejor if calidades[mejor] > 0 else None
+
+
+class Compresion:
+    """Extensión que comprime las respuestas de la aplicación Flask"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESION_HABILITADA', True)
+        app.config.setdefault('COMPRESION_MINIMO', 1024)
+        app.config.setdefault('COMPRESION_NIVEL', 6)
+
+        if app.config['COMPRESION_HABILITADA']:
+            app.after_request(self._after_request)
+
+    def _after_request(self, respuesta):
+        if (respuesta.status_code < 200 or respuesta.status_code >= 300
+                or respuesta.status_code == 204
+                or respuesta.direct_passthrough
+                or respuesta.is_streamed
+                or 'Content-Encoding' in respuesta.headers
+                or respuesta.mimetype not in TIPOS_COMPRIMIBLES):
+            return respuesta
+
+        respuesta.vary.add('Accept-Encoding')
+
+        if respuesta.content_length is not None and \
+                respuesta.content_length < current_app.config['COMPRESION_MINIMO']:
+            return respuesta
+
+        codificacion = elegir_codificacion(request.accept_encodings)
+        if codificacion is None:
+            return respuesta
+
+        datos = respuesta.get_data()
+        if len(datos) < current_app.config['COMPRESION_MINIMO']:
+            return respuesta
+
+        respuesta.set_data(comprimir(datos, codificacion, current_app.config['COMPRESION_NIVEL']))
+        respuesta.headers['Content-Encoding'] = codificacion
+        return respuesta
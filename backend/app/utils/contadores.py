@@ -0,0 +1,102 @@
+"""
+Contador de alertas no leídas
+
+El indicador de alertas de la cabecera solo necesita cuántas alertas activas
+quedan sin leer. Ese número vive en una clave de la caché (INCRBY atómico en
+Redis, solo si la clave existe para no recrearla sin TTL) que se ajusta al confirmar cada sesión con la diferencia que producen
+las alertas creadas, leídas o resueltas en ella, de modo que leerlo cuesta
+una sola consulta a la caché.
+
+Si la clave no existe (primer uso, vaciado de la caché, expiración o
+alertas eliminadas) se recalcula con un COUNT. El TTL acota cuánto puede
+durar una desviación causada por escrituras que no pasan por el ORM; las
+escrituras masivas deben llamar a invalidar_no_leidas().
+"""
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from backend.app import cache
+
+CLAVE_CONTADOR = 'alertas:no_leidas'
+CLAVE_SESION = 'alertas_no_leidas'
+
+
+def _sin_leer(activa, leida):
+    # activa es None en una alerta nueva antes de aplicar el valor por defecto
+    return int(activa is not False and not leida)
+
+
+def _anterior(estado, atributo):
+    """Valor del atributo antes de los cambios de este flush"""
+    historia = estado.attrs[atributo].history
+    if historia.deleted:
+        return historia.deleted[0]
+    if historia.unchanged:
+        return historia.unchanged[0]
+    return estado.attrs[atributo].loaded_value
+
+
+def no_leidas():
+    """Alertas activas sin leer (se recalcula con COUNT si no está en la caché)"""
+    valor = cache.get(CLAVE_CONTADOR)
+    if valor is None:
+        from backend.app.models.alerta import Alerta
+
+        valor = Alerta.query.filter_by(activa=True, leida=False).count()
+        cache.add(CLAVE_CONTADOR, valor, ttl=current_app.config['ALERTAS_CONTADOR_TTL'])
+    return int(valor)
+
+
+def invalidar_no_leidas():
+    """Forzar el recálculo del contador en la próxima lectura"""
+    cache.delete(CLAVE_CONTADOR)
+
+
+def ajustar_no_leidas(diferencia):
+    """Sumar diferencia al contador si está en la caché (sin recrearlo si expiró)"""
+    if not diferencia:
+        return
+    valor = cache.incr_if_exists(CLAVE_CONTADOR, diferencia)
+    if valor is not None and valor < 0:
+        invalidar_no_leidas()
+
+
+def _registrar_flush(session, flush_context):
+    """Acumular la variación de alertas sin leer del flush hasta el commit"""
+    from backend.app.models.alerta import Alerta
+
+    pendiente = session.info.setdefault(CLAVE_SESION, {'diferencia': 0, 'recalcular': False})
+    for instancia in session.new:
+        if isinstance(instancia, Alerta):
+            pendiente['diferencia'] += _sin_leer(instancia.activa, instancia.leida)
+    for instancia in session.dirty:
+        if isinstance(instancia, Alerta):
+            estado = inspect(instancia)
+            pendiente['diferencia'] += _sin_leer(instancia.activa, instancia.leida) - _sin_leer(
+                _anterior(estado, 'activa'), _anterior(estado, 'leida')
+            )
+    for instancia in session.deleted:
+        if isinstance(instancia, Alerta):
+            pendiente['recalcular'] = True
+
+
+def _registrar_commit(session):
+    pendiente = session.info.pop(CLAVE_SESION, None)
+    if pendiente and has_app_context():
+        if pendiente['recalcular']:
+            invalidar_no_leidas()
+        else:
+            ajustar_no_leidas(pendiente['diferencia'])
+
+
+def _registrar_rollback(session, transaccion_anterior):
+    session.info.pop(CLAVE_SESION, None)
+
+
+def registrar_contadores():
+    """Mantener el contador al confirmar la sesión (una sola vez por proceso)"""
+    if not event.contains(Session, 'after_flush', _registrar_flush):
+        event.listen(Session, 'after_flush', _registrar_flush)
+        event.listen(Session, 'after_commit', _registrar_commit)
+        event.listen(Session, 'after_soft_rollback', _registrar_rollback)
@@ -0,0 +1,227 @@
+"""
+Canal de eventos en tiempo real (publicación / suscripción)
+
+Los eventos (nuevas alertas, cambios de stock) se publican en un broker y se
+reenvían a los navegadores por Server-Sent Events. Con EVENTOS_BROKER=redis
+se usa Redis pub/sub, de modo que los eventos generados por cualquier
+proceso (API o workers de Celery) llegan a todos los clientes conectados;
+con 'memory' el broker vive en el proceso (tests y desarrollo).
+
+Las alertas se publican automáticamente al confirmar la sesión que las crea,
+sin importar si se generan desde la API o desde una tarea.
+"""
+
+import itertools
+import json
+import logging
+import queue
+import threading
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+CLAVE_SESION = 'eventos_pendientes'
+
+
+class SuscripcionMemoria:
+    """Suscripción a un MemoriaBroker"""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.cola = queue.Queue(maxsize=1000)
+
+    def recibir(self, timeout):
+        """Siguiente mensaje o None si no llegó ninguno en timeout segundos"""
+        try:
+            return self.cola.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def cerrar(self):
+        self.broker._quitar(self)
+
+
+class MemoriaBroker:
+    """Broker en memoria del proceso"""
+
+    def __init__(self):
+        self._suscripciones = set()
+        self._lock = threading.Lock()
+
+    def publicar(self, mensaje):
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+        for suscripcion in suscripciones:
+            try:
+                suscripcion.cola.put_nowait(mensaje)
+            except queue.Full:
+                # Cliente demasiado lento: se descarta el evento para él
+                pass
+        return len(suscripciones)
+
+    def suscribir(self):
+        suscripcion = SuscripcionMemoria(self)
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def _quitar(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+
+class SuscripcionRedis:
+    """Suscripción a un canal de Redis pub/sub"""
+
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    def recibir(self, timeout):
+        mensaje = self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if mensaje is None:
+            return None
+        datos = mensaje['data']
+        return datos.decode('utf-8') if isinstance(datos, bytes) else datos
+
+    def cerrar(self):
+        try:
+            self.pubsub.close()
+        except Exception:
+            pass
+
+
+class RedisBroker:
+    """Broker sobre Redis pub/sub"""
+
+    def __init__(self, url, canal):
+        import redis
+
+        self.cliente = redis.Redis.from_url(url, socket_connect_timeout=1)
+        self.canal = canal
+
+    def publicar(self, mensaje):
+        return self.cliente.publish(self.canal, mensaje)
+
+    def suscribir(self):
+        pubsub = self.cliente.pubsub()
+        pubsub.subscribe(self.canal)
+        return SuscripcionRedis(pubsub)
+
+
+class Eventos:
+    """Extensión de eventos inicializada con la aplicación Flask"""
+
+    def __init__(self, app=None):
+        self._secuencia = itertools.count(1)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configurar el broker según EVENTOS_BROKER"""
+        app.config.setdefault('EVENTOS_BROKER', 'memory')
+        app.config.setdefault('EVENTOS_CANAL', 'inventario:eventos')
+        app.config.setdefault('EVENTOS_KEEPALIVE', 15)
+        app.config.setdefault('EVENTOS_DURACION_MAXIMA', 300)
+
+        if app.config['EVENTOS_BROKER'] == 'redis':
+            broker = RedisBroker(app.config['EVENTOS_REDIS_URL'], app.config['EVENTOS_CANAL'])
+        else:
+            broker = MemoriaBroker()
+
+        app.extensions['eventos'] = broker
+
+    @property
+    def broker(self):
+        return current_app.extensions['eventos']
+
+    def publicar(self, tipo, datos):
+        """Publicar un evento (los errores del broker no interrumpen la petición)"""
+        mensaje = json.dumps({
+            'id': f'{int(datetime.utcnow().timestamp() * 1000)}-{next(self._secuencia)}',
+            'tipo': tipo,
+            'datos': datos
+        }, default=str)
+        try:
+            self.broker.publicar(mensaje)
+        except Exception as e:
+            logger.warning('No se pudo publicar el evento %s: %s', tipo, e)
+
+    def suscribir(self):
+        """Crear una suscripción a todos los eventos"""
+        return self.broker.suscribir()
+
+
+def formatear_sse(mensaje):
+    """Convertir un mensaje del broker al formato text/event-stream"""
+    evento = json.loads(mensaje)
+    datos = json.dumps(evento['datos'], default=str)
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {datos}\n\n"
+
+
+def flujo_sse(broker, keepalive, duracion_maxima):
+    """
+    Generador de Server-Sent Events sobre una suscripción al broker.
+
+    La suscripción se crea al empezar a transmitir y se cierra al terminar.
+    Envía un comentario de keepalive cuando no hay eventos para que los
+    proxies no cierren la conexión, y termina tras duracion_maxima segundos
+    (el navegador reconecta automáticamente) para no retener workers.
+    """
+    inicio = datetime.utcnow()
+    suscripcion = broker.suscribir()
+    try:
+        yield 'retry: 5000\n: conectado\n\n'
+        while (datetime.utcnow() - inicio).total_seconds() < duracion_maxima:
+            mensaje = suscripcion.recibir(timeout=keepalive)
+            if mensaje is None:
+                yield ': keepalive\n\n'
+            else:
+                yield formatear_sse(mensaje)
+    finally:
+        suscripcion.cerrar()
+
+
+def alerta_a_evento(alerta):
+    """Datos de una alerta para el evento (sin cargar relaciones)"""
+    return {
+        'id': alerta.id,
+        'producto_id': alerta.producto_id,
+        'tipo': alerta.tipo,
+        'titulo': alerta.titulo,
+        'mensaje': alerta.mensaje,
+        'prioridad': alerta.prioridad,
+        'fecha_creacion': alerta.fecha_creacion.isoformat() if alerta.fecha_creacion else None
+    }
+
+
+def _registrar_flush(session, flush_context):
+    """Acumular las alertas nuevas del flush hasta el commit"""
+    from backend.app.models.alerta import Alerta
+
+    for instancia in session.new:
+        if isinstance(instancia, Alerta):
+            session.info.setdefault(CLAVE_SESION, []).append(('alerta', alerta_a_evento(instancia)))
+
+
+def _registrar_commit(session):
+    pendientes = session.info.pop(CLAVE_SESION, None)
+    if pendientes and has_app_context() and 'eventos' in current_app.extensions:
+        from backend.app import eventos
+
+        for tipo, datos in pendientes:
+            eventos.publicar(tipo, datos)
+
+
+def _registrar_rollback(session, transaccion_anterior):
+    session.info.pop(CLAVE_SESION, None)
+
+
+def registrar_publicacion():
+    """Publicar las alertas nuevas al confirmar la sesión (una sola vez por proceso)"""
+    if not event.contains(Session, 'after_flush', _registrar_flush):
+        event.listen(Session, 'after_flush', _registrar_flush)
+        event.listen(Session, 'after_commit', _registrar_commit)
+        event.listen(Session, 'after_soft_rollback', _registrar_rollback)
@@ -0,0 +1,23 @@
+"""
+Fecha de referencia por petición
+
+hoy() devuelve la misma fecha durante toda una petición HTTP (se calcula una
+vez y se guarda en flask.g), de modo que serializar miles de filas no llama
+a date.today() por cada una y todas usan el mismo día aunque la petición
+cruce la medianoche.
+
+Fuera de una petición (tareas de Celery, comandos CLI) el contexto de la
+aplicación puede durar días, así que la fecha se calcula en cada llamada.
+"""
+
+from datetime import date
+from flask import g, has_request_context
+
+
+def hoy():
+    """Fecha de hoy, fija durante la petición actual"""
+    if not has_request_context():
+        return date.today()
+    if 'hoy' not in g:
+        g.hoy = date.today()
+    return g.hoy
@@ -0,0 +1,98 @@
+"""
+Claves de idempotencia para endpoints de escritura
+
+Un cliente que reintenta una petición (p. ej. un lector de códigos con
+Wi-Fi inestable) envía la misma cabecera Idempotency-Key. La primera
+ejecución guarda la respuesta en la caché con TTL y los reintentos la
+reciben tal cual, sin volver a escribir en la base de datos.
+
+- Misma clave mientras la primera petición sigue en curso: 409.
+- Misma clave con un cuerpo distinto: 422.
+- Sin cabecera: el endpoint se ejecuta normalmente.
+"""
+
+import hashlib
+from functools import wraps
+from flask import request, jsonify, make_response, current_app
+from flask_jwt_extended import get_jwt_identity
+from backend.app import cache
+
+CABECERA = 'Idempotency-Key'
+LONGITUD_MAXIMA = 255
+
+
+def _claves(clave_cliente):
+    """Clave del resultado y del bloqueo, por usuario y ruta"""
+    base = hashlib.sha256(
+        f'{get_jwt_identity()}|{request.method}|{request.path}|{clave_cliente}'.encode('utf-8')
+    ).hexdigest()
+    return f'idempotencia:{base}', f'idempotencia:{base}:en_curso'
+
+
+def _huella():
+    """Huella del cuerpo de la petición para detectar reutilización de claves"""
+    return hashlib.sha256(request.get_data()).hexdigest()
+
+
+def _reproducir(guardada):
+    respuesta = current_app.response_class(
+        guardada['cuerpo'], status=guardada['status'], mimetype=guardada['mimetype']
+    )
+    respuesta.headers['Idempotent-Replayed'] = 'true'
+    return respuesta
+
+
+def _responder_guardada(guardada, huella):
+    """Reproducir la respuesta guardada si la petición es la misma"""
+    if guardada['huella'] != huella:
+        return jsonify({'error': f'{CABECERA} ya fue usada con otra petición'}), 422
+    return _reproducir(guardada)
+
+
+def idempotente(funcion):
+    """
+    Decorador para endpoints POST que acepta la cabecera Idempotency-Key.
+
+    Se aplica después de @jwt_required(), ya que las claves son por usuario.
+    Solo se guardan las respuestas que no son errores del servidor (5xx),
+    de modo que un fallo transitorio puede reintentarse con la misma clave.
+    """
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        clave_cliente = request.headers.get(CABECERA)
+        if not clave_cliente:
+            return funcion(*args, **kwargs)
+
+        if len(clave_cliente) > LONGITUD_MAXIMA:
+            return jsonify({'error': f'{CABECERA} no puede superar {LONGITUD_MAXIMA} caracteres'}), 400
+
+        clave, clave_bloqueo = _claves(clave_cliente)
+        huella = _huella()
+
+        guardada = cache.get(clave)
+        if guardada is not None:
+            return _responder_guardada(guardada, huella)
+
+        if not cache.add(clave_bloqueo, huella, ttl=current_app.config['IDEMPOTENCIA_BLOQUEO_TTL']):
+            if cache.get(clave_bloqueo) is not None:
+                return jsonify({'error': 'Hay una petición con la misma clave en proceso'}), 409
+            # Caché no disponible: se ejecuta sin protección antes que rechazar la escritura
+
+        try:
+            # La petición anterior pudo terminar entre la lectura y el bloqueo
+            guardada = cache.get(clave)
+            if guardada is not None:
+                return _responder_guardada(guardada, huella)
+
+            respuesta = make_response(funcion(*args, **kwargs))
+            if respuesta.status_code < 500:
+                cache.set(clave, {
+                    'huella': huella,
+                    'status': respuesta.status_code,
+                    'mimetype': respuesta.mimetype,
+                    'cuerpo': respuesta.get_data(as_text=True)
+                }, ttl=current_app.config['IDEMPOTENCIA_TTL'])
+            return respuesta
+        finally:
+            cache.delete(clave_bloqueo)
+    return envoltura
@@ -0,0 +1,75 @@
+"""
+Proveedor JSON rápido basado en orjson
+
+Reemplaza al DefaultJSONProvider de Flask (json de la biblioteca estándar)
+cuando JSON_PROVIDER es 'orjson' y la librería está instalada; si no lo
+está, se conserva el proveedor por defecto.
+
+Diferencias con el proveedor por defecto:
+- Decimal se serializa como número (float) en lugar de texto.
+- date/datetime se serializan en ISO 8601, igual que los to_dict() de los
+  modelos, en lugar del formato HTTP.
+- Los tipos de numpy (resultados de pandas) se serializan directamente.
+"""
+
+import logging
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider, _default
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _por_defecto(obj):
+    """Tipos que orjson no serializa de forma nativa"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return _default(obj)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Proveedor JSON de Flask sobre orjson"""
+
+    def _opciones(self, sort_keys=None, indent=None):
+        opciones = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys if sort_keys is None else sort_keys:
+            opciones |= orjson.OPT_SORT_KEYS
+        if indent:
+            opciones |= orjson.OPT_INDENT_2
+        return opciones
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Serializar a bytes (evita decodificar y volver a codificar)"""
+        return orjson.dumps(
+            obj,
+            default=_por_defecto,
+            option=self._opciones(kwargs.get('sort_keys'), kwargs.get('indent'))
+        )
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self.dumps_bytes(obj, indent=indent) + b'\n', mimetype=self.mimetype
+        )
+
+
+def configurar_json(app):
+    """Instalar el proveedor JSON indicado por JSON_PROVIDER"""
+    app.config.setdefault('JSON_PROVIDER', 'orjson')
+
+    if app.config['JSON_PROVIDER'] == 'orjson':
+        if orjson is None:
+            logger.warning('orjson no está instalado; se usa el proveedor JSON por defecto')
+            return
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,15 @@
+"""
+Rangos de ids [desde, hasta) para procesar tablas grandes por partes
+
+La generación de alertas y la conciliación reparten los productos en rangos
+de ids contiguos; cada rango se filtra con la misma condición semiabierta.
+"""
+
+from sqlalchemy import and_, true
+
+
+def en_rango(columna, desde=None, hasta=None):
+    """Condición desde <= columna < hasta (sin límite si no se indican)"""
+    if desde is None and hasta is None:
+        return true()
+    return and_(columna >= desde, columna < hasta)
@@ -0,0 +1,169 @@
+"""
+Validadores de versión para GET condicionales (ETag / Last-Modified)
+
+Cada tabla tiene un contador de cambios en la caché que se incrementa al
+confirmar (commit) una sesión que insertó, modificó o eliminó filas de esa
+tabla. El ETag de una respuesta se deriva de la ruta, los parámetros y los
+contadores de las tablas de las que depende, por lo que validarlo no
+requiere consultar la base de datos ni serializar nada.
+
+Las escrituras masivas que no pasan por el ORM (executemany de Core) deben
+llamar a marcar_modificadas() explícitamente, o registrar_tablas() si deben
+invalidarse recién al confirmar la sesión.
+
+Con varios procesos la caché debe ser compartida (CACHE_TYPE=redis) para que
+todos vean los mismos contadores.
+"""
+
+import hashlib
+import random
+import time
+from datetime import date, datetime, timezone
+from functools import wraps
+from flask import request, make_response, current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from backend.app import cache
+
+CLAVE_SESION = 'tablas_modificadas'
+
+
+def _clave_version(tabla):
+    return f'version:{tabla}'
+
+
+def _clave_modificado(tabla):
+    return f'modificado:{tabla}'
+
+
+def obtener_version(tabla):
+    """
+    Versión actual de una tabla (None si la caché no está disponible).
+
+    Se inicializa con un valor aleatorio para que un vaciado de la caché
+    nunca reutilice un ETag emitido antes.
+    """
+    version = cache.get(_clave_version(tabla))
+    if version is None:
+        cache.add(_clave_version(tabla), random.getrandbits(48), ttl=0)
+        version = cache.get(_clave_version(tabla))
+    return version
+
+
+def marcar_modificadas(*tablas):
+    """Invalidar los validadores de las tablas indicadas"""
+    ahora = int(time.time())
+    for tabla in tablas:
+        obtener_version(tabla)
+        if cache.incr(_clave_version(tabla)) is not None:
+            cache.set(_clave_modificado(tabla), ahora, ttl=0)
+
+
+def registrar_tablas(session, *tablas):
+    """Tablas escritas con Core en la sesión: se invalidan al confirmarla"""
+    session.info.setdefault(CLAVE_SESION, set()).update(tablas)
+
+
+def _registrar_flush(session, flush_context):
+    """Acumular las tablas tocadas por el flush hasta el commit"""
+    tablas = session.info.setdefault(CLAVE_SESION, set())
+    for instancia in list(session.new) + list(session.dirty) + list(session.deleted):
+        tabla = getattr(instancia, '__tablename__', None)
+        if tabla:
+            tablas.add(tabla)
+
+
+def _registrar_commit(session):
+    tablas = session.info.pop(CLAVE_SESION, None)
+    if tablas and has_app_context():
+        marcar_modificadas(*tablas)
+
+
+def _registrar_rollback(session, transaccion_anterior):
+    session.info.pop(CLAVE_SESION, None)
+
+
+def registrar_eventos():
+    """Escuchar los eventos de sesión de SQLAlchemy (una sola vez por proceso)"""
+    if not event.contains(Session, 'after_flush', _registrar_flush):
+        event.listen(Session, 'after_flush', _registrar_flush)
+        event.listen(Session, 'after_commit', _registrar_commit)
+        event.listen(Session, 'after_soft_rollback', _registrar_rollback)
+
+
+def calcular_validador(tablas, diario=False):
+    """
+    Calcular (etag, ultima_modificacion) para la petición actual.
+
+    Con diario=True el ETag incluye la fecha de hoy, para respuestas con
+    campos relativos al día (p. ej. días para vencer). Devuelve None si la
+    caché no está disponible.
+    """
+    versiones = []
+    for tabla in tablas:
+        version = obtener_version(tabla)
+        if version is None:
+            return None
+        versiones.append(f'{tabla}={version}')
+
+    parametros = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    partes = [request.path, parametros] + versiones
+    if diario:
+        partes.append(date.today().isoformat())
+    etag = hashlib.sha1('|'.join(partes).encode('utf-8')).hexdigest()
+
+    marcas = [cache.get(_clave_modificado(tabla)) for tabla in tablas]
+    marcas = [marca for marca in marcas if marca is not None]
+    ultima_modificacion = None
+    if marcas and len(marcas) == len(tablas):
+        ultima_modificacion = datetime.fromtimestamp(max(marcas), tz=timezone.utc)
+        if diario:
+            inicio_dia = datetime.combine(date.today(), datetime.min.time()).astimezone(timezone.utc)
+            ultima_modificacion = max(ultima_modificacion, inicio_dia)
+
+    return etag, ultima_modificacion
+
+
+def _no_modificado(etag, ultima_modificacion):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and ultima_modificacion:
+        return ultima_modificacion.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def _aplicar_cabeceras(respuesta, etag, ultima_modificacion):
+    respuesta.set_etag(etag, weak=True)
+    if ultima_modificacion:
+        respuesta.last_modified = ultima_modificacion
+    # El navegador debe revalidar siempre, pero puede reutilizar el cuerpo
+    respuesta.cache_control.private = True
+    respuesta.cache_control.no_cache = True
+    respuesta.vary.add('Authorization')
+    return respuesta
+
+
+def condicional(*tablas, diario=False):
+    """
+    Decorador para endpoints GET que responde 304 Not Modified cuando el
+    cliente ya tiene la versión vigente (If-None-Match / If-Modified-Since).
+
+    Se aplica después de @jwt_required() para no filtrar datos sin autenticar.
+    """
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            validador = calcular_validador(tablas, diario) if request.method == 'GET' else None
+            if validador is None:
+                return funcion(*args, **kwargs)
+
+            etag, ultima_modificacion = validador
+            if _no_modificado(etag, ultima_modificacion):
+                return _aplicar_cabeceras(current_app.response_class(status=304), etag, ultima_modificacion)
+
+            respuesta = make_response(funcion(*args, **kwargs))
+            if respuesta.status_code == 200:
+                _aplicar_cabeceras(respuesta, etag, ultima_modificacion)
+            return respuesta
+        return envoltura
+    return decorador
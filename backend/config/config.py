@@ -1,5 +1,42 @@
 import os
-from decouple import config
+from decouple import config, Csv
+
+# Colas de Celery por tipo de tarea y límite de tiempo blando (segundos) de
+# las tareas de cada cola; el límite duro es 60 s mayor
+LIMITES_COLAS_CELERY = {
+    'alertas': config('CELERY_LIMITE_ALERTAS', default=300, cast=int),
+    'email': config('CELERY_LIMITE_EMAIL', default=600, cast=int),
+    'reportes': config('CELERY_LIMITE_REPORTES', default=3600, cast=int),
+    'mantenimiento': config('CELERY_LIMITE_MANTENIMIENTO', default=1800, cast=int),
+}
+
+TAREAS_CELERY = {
+    'backend.app.tasks.alertas_tasks.generar_alertas_automaticas': 'alertas',
+    'backend.app.tasks.alertas_tasks.generar_alertas_rango': 'alertas',
+    'backend.app.tasks.alertas_tasks.resumir_alertas_generadas': 'alertas',
+    'backend.app.tasks.alertas_tasks.enviar_notificacion_email': 'email',
+    'backend.app.tasks.alertas_tasks.enviar_notificaciones_lote': 'email',
+    'backend.app.tasks.alertas_tasks.enviar_resumen_notificaciones': 'email',
+    'backend.app.tasks.alertas_tasks.limpiar_alertas_resueltas': 'mantenimiento',
+    'backend.app.tasks.pronostico_tasks.calcular_pronostico_demanda': 'reportes',
+    'backend.app.tasks.conciliacion_tasks.conciliar_libro_stock': 'reportes',
+}
+
+
+def _rutas_celery():
+    """Ruta (cola) de cada tarea"""
+    return {tarea: {'queue': cola} for tarea, cola in TAREAS_CELERY.items()}
+
+
+def _limites_celery():
+    """Límites de tiempo de cada tarea según su cola"""
+    return {
+        tarea: {
+            'soft_time_limit': LIMITES_COLAS_CELERY[cola],
+            'time_limit': LIMITES_COLAS_CELERY[cola] + 60
+        }
+        for tarea, cola in TAREAS_CELERY.items()
+    }
 
 class Config:
     """Configuración base"""
@@ -14,14 +51,99 @@ class Config:
     MAIL_USE_TLS = config('MAIL_USE_TLS', default=True, cast=bool)
     MAIL_USERNAME = config('MAIL_USERNAME', default='')
     MAIL_PASSWORD = config('MAIL_PASSWORD', default='')
+    MAIL_MAX_EMAILS = config('MAIL_MAX_EMAILS', default=100, cast=int)  # Mensajes por conexión SMTP
+    
+    # Envío de correos por lotes (una conexión por lote, con ritmo y reintentos)
+    CORREO_MAX_POR_SEGUNDO = config('CORREO_MAX_POR_SEGUNDO', default=5, cast=float)
+    CORREO_REINTENTOS = config('CORREO_REINTENTOS', default=3, cast=int)
+    CORREO_ESPERA_REINTENTO = config('CORREO_ESPERA_REINTENTO', default=2.0, cast=float)  # segundos, se duplica
+    
+    # Notificaciones de alertas: un aviso por (usuario, producto, tipo) en la
+    # ventana, entregado en resúmenes periódicos por SMTP (python) o email_service (node)
+    NOTIFICACION_CANAL = config('NOTIFICACION_CANAL', default='python')
+    NOTIFICACION_VENTANA_HORAS = config('NOTIFICACION_VENTANA_HORAS', default=24, cast=int)
+    NOTIFICACION_ROLES = config('NOTIFICACION_ROLES', default='admin,manager', cast=Csv())
+    NOTIFICACION_MAX_INTENTOS = config('NOTIFICACION_MAX_INTENTOS', default=3, cast=int)
+    EMAIL_SERVICE_URL = config('EMAIL_SERVICE_URL', default='http://localhost:3001')
+    EMAIL_SERVICE_TIMEOUT = config('EMAIL_SERVICE_TIMEOUT', default=30, cast=int)  # segundos
+    # Ritmo de envío del email_service (su SMTP_RATE_LIMIT): cada petición
+    # /send-bulk lleva los mensajes que alcanza a enviar dentro del timeout
+    EMAIL_SERVICE_MAX_POR_SEGUNDO = config('EMAIL_SERVICE_MAX_POR_SEGUNDO', default=5, cast=int)
+    
+    # Configuración de Celery (nombres de configuración en minúsculas de Celery)
+    # Colas dedicadas: una tarea lenta (p. ej. SMTP) no demora a las demás.
+    # Concurrencia, pool y prefetch se eligen por worker (ver docker-compose.yml)
+    CELERY = {
+        'broker_url': config('REDIS_URL', default='redis://localhost:6379/0'),
+        'result_backend': config('REDIS_URL', default='redis://localhost:6379/0'),
+        'task_default_queue': 'mantenimiento',
+        'task_routes': _rutas_celery(),
+        'task_annotations': _limites_celery(),
+        'worker_prefetch_multiplier': 1,  # Tareas largas: no reservar más de una por proceso
+        'timezone': 'UTC',
+    }
+    
+    # Tareas programadas: una ejecución a la vez (arrendamiento renovado por latido)
+    TAREAS_BLOQUEO_TTL = config('TAREAS_BLOQUEO_TTL', default=300, cast=int)  # segundos
+    TAREAS_HISTORIAL = config('TAREAS_HISTORIAL', default=20, cast=int)  # Ejecuciones guardadas por tarea
     
-    # Configuración de Celery
-    CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
-    CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
+    # Configuración de caché (redis o memory)
+    CACHE_TYPE = config('CACHE_TYPE', default='redis')
+    CACHE_REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
+    CACHE_KEY_PREFIX = 'inventario:'
+    CACHE_DEFAULT_TIMEOUT = 300
+    
+    # Claves de idempotencia (Idempotency-Key) en escrituras
+    IDEMPOTENCIA_TTL = config('IDEMPOTENCIA_TTL', default=86400, cast=int)  # 24 horas
+    IDEMPOTENCIA_BLOQUEO_TTL = 60  # segundos máximos de una petición en curso
+    
+    # Eventos en tiempo real (SSE) sobre Redis pub/sub o memoria
+    EVENTOS_BROKER = config('EVENTOS_BROKER', default='redis')
+    EVENTOS_REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
+    EVENTOS_CANAL = 'inventario:eventos'
+    EVENTOS_KEEPALIVE = 15  # segundos entre comentarios de keepalive
+    EVENTOS_DURACION_MAXIMA = config('EVENTOS_DURACION_MAXIMA', default=300, cast=int)
+    
+    # Serialización y compresión de respuestas
+    JSON_PROVIDER = config('JSON_PROVIDER', default='orjson')  # orjson o default
+    COMPRESION_HABILITADA = config('COMPRESION_HABILITADA', default=True, cast=bool)
+    COMPRESION_MINIMO = config('COMPRESION_MINIMO', default=1024, cast=int)  # bytes
+    COMPRESION_NIVEL = config('COMPRESION_NIVEL', default=6, cast=int)
     
     # Configuración de alertas
     STOCK_MINIMO_DEFAULT = config('STOCK_MINIMO_DEFAULT', default=10, cast=int)
     DIAS_VENCIMIENTO_ALERTA = config('DIAS_VENCIMIENTO_ALERTA', default=30, cast=int)
+    ALERTAS_CONTADOR_TTL = config('ALERTAS_CONTADOR_TTL', default=300, cast=int)  # segundos hasta recalcular no leídas
+    ALERTAS_TAMANO_RANGO = config('ALERTAS_TAMANO_RANGO', default=5000, cast=int)  # Productos por tarea de generación
+    
+    # Almacenes: código del almacén usado cuando un movimiento no indica uno
+    ALMACEN_PREDETERMINADO = config('ALMACEN_PREDETERMINADO', default='PRINCIPAL')
+    
+    # Análisis ABC / rotación
+    ABC_UMBRAL_A = 0.80  # % acumulado del valor de consumo para clase A
+    ABC_UMBRAL_B = 0.95  # % acumulado del valor de consumo para clase B
+    ROTACION_CACHE_TTL = config('ROTACION_CACHE_TTL', default=900, cast=int)
+    
+    # Resumen del dashboard (segundos en caché)
+    DASHBOARD_CACHE_TTL = config('DASHBOARD_CACHE_TTL', default=30, cast=int)
+    
+    # Serie de movimientos por día (los días cerrados no cambian)
+    MOVIMIENTOS_DIA_CACHE_TTL = config('MOVIMIENTOS_DIA_CACHE_TTL', default=604800, cast=int)
+    MOVIMIENTOS_SERIE_MAX_DIAS = config('MOVIMIENTOS_SERIE_MAX_DIAS', default=366, cast=int)
+    
+    # Pronóstico de demanda y punto de reorden
+    PRONOSTICO_DIAS_HISTORIA = config('PRONOSTICO_DIAS_HISTORIA', default=90, cast=int)
+    PRONOSTICO_ALPHA = config('PRONOSTICO_ALPHA', default=0.3, cast=float)
+    PRONOSTICO_LEAD_TIME_DIAS = config('PRONOSTICO_LEAD_TIME_DIAS', default=7, cast=int)
+    PRONOSTICO_Z = config('PRONOSTICO_Z', default=1.65, cast=float)  # ~95% nivel de servicio
+    PRONOSTICO_DIAS_MINIMOS = config('PRONOSTICO_DIAS_MINIMOS', default=7, cast=int)
+    PRONOSTICO_TAMANO_LOTE = config('PRONOSTICO_TAMANO_LOTE', default=5000, cast=int)
+    PRONOSTICO_WORKERS = config('PRONOSTICO_WORKERS', default=1, cast=int)
+    
+    # Conciliación del libro de movimientos con el stock
+    CONCILIACION_TAMANO_RANGO = config('CONCILIACION_TAMANO_RANGO', default=10000, cast=int)  # Productos por rango
+    CONCILIACION_WORKERS = config('CONCILIACION_WORKERS', default=1, cast=int)
+    CONCILIACION_TAMANO_LOTE = config('CONCILIACION_TAMANO_LOTE', default=500, cast=int)  # Ajustes por commit
 
 class DevelopmentConfig(Config):
     """Configuración para desarrollo"""
@@ -49,9 +171,17 @@ class TestingConfig(Config):
     """Configuración para testing"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    CACHE_TYPE = 'memory'
+    EVENTOS_BROKER = 'memory'
+
+class BenchmarkConfig(Config):
+    """Configuración para benchmarks de rendimiento"""
+    DEBUG = False
+    SQLALCHEMY_DATABASE_URI = config('BENCHMARK_DATABASE_URL', default='sqlite:///benchmark.db')
 
 config_dict = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
-    'testing': TestingConfig
+    'testing': TestingConfig,
+    'benchmark': BenchmarkConfig
 }
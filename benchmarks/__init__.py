@@ -0,0 +1 @@
+# Suite de benchmarks y generador de datos sintéticos
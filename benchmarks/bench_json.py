@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de serialización JSON y compresión de respuestas
+
+Construye un payload con la forma de /api/reportes/inventario?formato=json
+para N productos y mide, para cada proveedor JSON disponible, el tiempo de
+codificación y el tamaño en bytes sin comprimir, con gzip y con brotli (si
+está instalado).
+
+Uso:
+    python -m benchmarks.bench_json --productos 50000
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+
+def generar_payload(productos, semilla=42):
+    """Payload sintético con la forma del reporte de inventario"""
+    rng = random.Random(semilla)
+    hoy = date.today()
+    ahora = datetime.now()
+    filas = []
+    for i in range(productos):
+        stock = rng.randint(0, 500)
+        precio_compra = Decimal(rng.randint(100, 100000)) / 100
+        vencimiento = hoy + timedelta(days=rng.randint(-30, 365)) if rng.random() < 0.4 else None
+        filas.append({
+            'id': i + 1,
+            'codigo': f'BENCH-{i:07d}',
+            'nombre': f'Producto benchmark {i}',
+            'descripcion': 'Producto sintético para medir la serialización',
+            'categoria_id': rng.randint(1, 50),
+            'categoria_nombre': f'Categoría {rng.randint(1, 50)}',
+            'stock_actual': stock,
+            'stock_minimo': 10,
+            'punto_reorden': rng.randint(5, 80),
+            'stock_seguridad': rng.randint(0, 20),
+            'demanda_diaria': round(rng.random() * 10, 4),
+            'precio_compra': precio_compra,
+            'precio_venta': precio_compra * Decimal('1.30'),
+            'unidad_medida': 'unidad',
+            'ubicacion': f'Estante {rng.randint(1, 200)}',
+            'fecha_vencimiento': vencimiento.isoformat() if vencimiento else None,
+            'lote': f'L{rng.randint(1000, 9999)}',
+            'activo': True,
+            'fecha_creacion': ahora.isoformat(),
+            'fecha_actualizacion': ahora.isoformat(),
+            'necesita_restock': stock <= 10,
+            'dias_para_vencer': (vencimiento - hoy).days if vencimiento else None,
+            'esta_vencido': bool(vencimiento and vencimiento < hoy),
+            'valor_inventario': float(precio_compra) * stock
+        })
+
+    return {
+        'fecha_generacion': ahora.isoformat(),
+        'resumen': {
+            'total_productos': productos,
+            'valor_total_inventario': sum(fila['valor_inventario'] for fila in filas),
+            'productos_stock_bajo': sum(1 for fila in filas if fila['necesita_restock']),
+            'productos_sin_stock': sum(1 for fila in filas if fila['stock_actual'] == 0)
+        },
+        'productos': filas
+    }
+
+
+def medir(funcion, repeticiones):
+    """Mediana del tiempo de ejecución en milisegundos y último resultado"""
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return round(statistics.median(tiempos), 2), resultado
+
+
+def ejecutar(app, productos, repeticiones, nivel):
+    """Medir codificación y compresión para cada proveedor disponible"""
+    from flask.json.provider import DefaultJSONProvider
+    from backend.app.utils import json_rapido
+    from backend.app.utils.compresion import comprimir, brotli
+
+    payload = generar_payload(productos)
+    proveedores = [('default', DefaultJSONProvider(app))]
+    if json_rapido.orjson is not None:
+        proveedores.append(('orjson', json_rapido.OrjsonProvider(app)))
+
+    codificaciones = ['gzip'] + (['br'] if brotli is not None else [])
+    resultados = []
+    with app.test_request_context():
+        for nombre, proveedor in proveedores:
+            # Salida compacta, como en producción (DEBUG=False)
+            proveedor.compact = True
+            ms, respuesta = medir(lambda: proveedor.response(payload), repeticiones)
+            cuerpo = respuesta.get_data()
+            fila = {'proveedor': nombre, 'encode_ms': ms, 'bytes': len(cuerpo)}
+            for codificacion in codificaciones:
+                ms_comp, comprimido = medir(lambda: comprimir(cuerpo, codificacion, nivel), repeticiones)
+                fila[f'{codificacion}_ms'] = ms_comp
+                fila[f'{codificacion}_bytes'] = len(comprimido)
+            resultados.append(fila)
+
+    return resultados, codificaciones
+
+
+def imprimir(resultados, codificaciones, productos):
+    print(f'\n📦 Reporte de inventario sintético: {productos} productos')
+    base = resultados[0]
+    for fila in resultados:
+        print(f"\n  {fila['proveedor']:<8} encode {fila['encode_ms']:>9.2f} ms "
+              f"({base['encode_ms'] / fila['encode_ms']:.1f}x)  {fila['bytes'] / 1024:>9.1f} KiB")
+        for codificacion in codificaciones:
+            print(f"    + {codificacion:<5} {fila[f'{codificacion}_ms']:>9.2f} ms  "
+                  f"{fila[f'{codificacion}_bytes'] / 1024:>9.1f} KiB "
+                  f"({fila[f'{codificacion}_bytes'] / fila['bytes'] * 100:.1f}% del original)")
+
+
+def main(argv=None):
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Micro-benchmark de JSON y compresión')
+    parser.add_argument('--productos', type=int, default=50000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--nivel', type=int, default=6, help='Nivel de compresión (1-9)')
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app
+
+    app = create_app('testing')
+    resultados, codificaciones = ejecutar(app, args.productos, args.repeticiones, args.nivel)
+    imprimir(resultados, codificaciones, args.productos)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de lecturas: instancias del ORM vs filas de Core
+
+Lee N productos de la base de benchmarks y los serializa de dos formas:
+
+- orm:  Producto.query.all() + to_dict() (identity map, estado por instancia
+        y carga perezosa de la categoría)
+- core: select() con filas inmutables + lecturas.producto_a_dict()
+
+Mide tiempo total (mediana) y el pico de memoria asignada con tracemalloc.
+
+Uso:
+    python -m benchmarks.seed --productos 100000 --movimientos 0 --alertas 0
+    python -m benchmarks.bench_lecturas --limite 100000
+"""
+
+import argparse
+import gc
+import statistics
+import sys
+import time
+import tracemalloc
+
+
+def medir(funcion, repeticiones):
+    """Mediana de tiempo (ms), pico de memoria (bytes) y cantidad de filas"""
+    tiempos = []
+    filas = 0
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        filas = len(funcion())
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(statistics.median(tiempos), 2), pico, filas
+
+
+def ejecutar(limite, repeticiones):
+    """Comparar ambas rutas de lectura (requiere contexto de aplicación)"""
+    from backend.app import db
+    from backend.app.models import Producto
+    from backend.app.services import lecturas
+
+    def por_orm():
+        productos = Producto.query.filter_by(activo=True).order_by(Producto.id).limit(limite).all()
+        registros = [producto.to_dict() for producto in productos]
+        db.session.expunge_all()
+        return registros
+
+    def por_core():
+        filas = db.session.execute(lecturas.consulta_productos().limit(limite)).all()
+        return lecturas.productos_a_registros(filas)
+
+    return {
+        'orm': medir(por_orm, repeticiones),
+        'core': medir(por_core, repeticiones),
+    }
+
+
+def imprimir(resultados):
+    ms_orm, pico_orm, filas = resultados['orm']
+    ms_core, pico_core, _ = resultados['core']
+    print(f'\n📦 Lectura y serialización de {filas} productos')
+    for nombre, (ms, pico, _) in resultados.items():
+        print(f'  {nombre:<5} {ms:>10.2f} ms   pico {pico / 1024 / 1024:>8.1f} MiB   '
+              f'{pico / max(filas, 1):>7.0f} B/fila')
+    if ms_core:
+        print(f'\n  CPU {ms_orm / ms_core:.1f}x más rápido, '
+              f'memoria {pico_orm / max(pico_core, 1):.1f}x menor con filas de Core')
+
+
+def main(argv=None):
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Benchmark de lecturas ORM vs Core')
+    parser.add_argument('--config', default='benchmark', help='Configuración de Flask a usar')
+    parser.add_argument('--limite', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app
+
+    app = create_app(args.config)
+    with app.app_context():
+        resultados = ejecutar(args.limite, args.repeticiones)
+    imprimir(resultados)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
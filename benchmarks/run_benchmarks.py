@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks de los endpoints críticos del Sistema de Inventario
+
+Mide percentiles de latencia y throughput ejecutando las peticiones en
+proceso (cliente de pruebas de Flask), de modo que el resultado refleja el
+costo de la aplicación y la base de datos sin ruido de red. Los resultados
+se guardan en JSON etiquetados con el commit actual y pueden compararse
+contra una ejecución anterior para detectar regresiones.
+
+Uso:
+    python -m benchmarks.seed --productos 100000 --movimientos 5000000
+    python -m benchmarks.run_benchmarks --comparar benchmarks/results/<commit>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+RESULTADOS_DIR = Path(__file__).parent / 'results'
+
+# (nombre, método, ruta, parámetros, repeticiones relativas)
+ESCENARIOS = [
+    ('productos_listado', 'GET', '/api/productos', {'page': 1, 'per_page': 20}, 1.0),
+    ('productos_busqueda', 'GET', '/api/productos', {'per_page': 50, 'search': 'benchmark 12'}, 1.0),
+    ('productos_stock_bajo', 'GET', '/api/productos', {'stock_bajo': 'true', 'per_page': 50}, 1.0),
+    ('movimientos_listado', 'GET', '/api/movimientos', {'page': 1, 'per_page': 20}, 1.0),
+    ('movimientos_estadisticas', 'GET', '/api/movimientos/estadisticas', {}, 1.0),
+    ('alertas_estadisticas', 'GET', '/api/alertas/estadisticas', {}, 1.0),
+    ('reporte_inventario', 'GET', '/api/reportes/inventario', {'formato': 'json'}, 0.1),
+    ('reporte_movimientos', 'GET', '/api/reportes/movimientos', {'formato': 'json'}, 0.1),
+    ('actualizar_stock', 'POST', '/api/productos/{producto_id}/stock', None, 1.0),
+]
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por interpolación lineal sobre valores ordenados"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * (p / 100.0)
+    inferior = int(k)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (k - inferior)
+
+
+def resumir(latencias, duracion_total, errores):
+    """Resumir latencias (en segundos) a métricas en milisegundos"""
+    n = len(latencias)
+    return {
+        'n': n,
+        'errores': errores,
+        'min_ms': round(min(latencias) * 1000, 3) if n else 0.0,
+        'media_ms': round(sum(latencias) / n * 1000, 3) if n else 0.0,
+        'p50_ms': round(percentil(latencias, 50) * 1000, 3),
+        'p90_ms': round(percentil(latencias, 90) * 1000, 3),
+        'p95_ms': round(percentil(latencias, 95) * 1000, 3),
+        'p99_ms': round(percentil(latencias, 99) * 1000, 3),
+        'max_ms': round(max(latencias) * 1000, 3) if n else 0.0,
+        'throughput_rps': round(n / duracion_total, 2) if duracion_total > 0 else 0.0
+    }
+
+
+def comparar(actual, base, umbral=0.15, metrica='p95_ms'):
+    """
+    Comparar dos ejecuciones y devolver la lista de regresiones.
+
+    Se considera regresión cuando la métrica del escenario empeora más que
+    el umbral relativo respecto a la ejecución base.
+    """
+    regresiones = []
+    for nombre, resultado in actual['resultados'].items():
+        previo = base.get('resultados', {}).get(nombre)
+        if not previo or not previo.get(metrica):
+            continue
+        variacion = (resultado[metrica] - previo[metrica]) / previo[metrica]
+        if variacion > umbral:
+            regresiones.append({
+                'escenario': nombre,
+                'metrica': metrica,
+                'base': previo[metrica],
+                'actual': resultado[metrica],
+                'variacion': round(variacion, 4)
+            })
+    return regresiones
+
+
+def commit_actual():
+    """Obtener el hash del commit actual (o 'desconocido')"""
+    try:
+        resultado = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            check=True, capture_output=True, text=True
+        )
+        return resultado.stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return 'desconocido'
+
+
+def ejecutar_escenario(client, headers, metodo, ruta, params, repeticiones, calentamiento, producto_ids, rng):
+    """Ejecutar un escenario y devolver (latencias, duración total, errores)"""
+    def peticion():
+        if metodo == 'GET':
+            return client.get(ruta, query_string=params, headers=headers)
+        ruta_final = ruta.format(producto_id=rng.choice(producto_ids))
+        return client.post(ruta_final, json={
+            'tipo': 'entrada',
+            'cantidad': 1,
+            'motivo': 'Benchmark'
+        }, headers=headers)
+
+    for _ in range(calentamiento):
+        peticion()
+
+    latencias = []
+    errores = 0
+    inicio_total = time.perf_counter()
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        respuesta = peticion()
+        respuesta.get_data()
+        latencias.append(time.perf_counter() - inicio)
+        if respuesta.status_code >= 400:
+            errores += 1
+    return latencias, time.perf_counter() - inicio_total, errores
+
+
+def ejecutar_suite(app, repeticiones=50, calentamiento=5, escenarios=None, semilla=42):
+    """Ejecutar la suite de benchmarks contra la aplicación dada"""
+    from flask_jwt_extended import create_access_token
+    from backend.app import db
+    from backend.app.models import Producto, Movimiento, Alerta
+    from benchmarks.seed import crear_usuario_benchmark
+
+    rng = random.Random(semilla)
+
+    with app.app_context():
+        usuario = crear_usuario_benchmark()
+        token = create_access_token(identity=str(usuario.id))
+        producto_ids = [fila.id for fila in db.session.query(Producto.id).limit(1000).all()]
+        volumenes = {
+            'productos': Producto.query.count(),
+            'movimientos': Movimiento.query.count(),
+            'alertas': Alerta.query.count()
+        }
+        dialecto = db.engine.dialect.name
+
+    headers = {'Authorization': f'Bearer {token}'}
+    client = app.test_client()
+    resultados = {}
+
+    for nombre, metodo, ruta, params, factor in ESCENARIOS:
+        if escenarios and nombre not in escenarios:
+            continue
+        if metodo == 'POST' and not producto_ids:
+            continue
+        n = max(1, int(repeticiones * factor))
+        latencias, duracion, errores = ejecutar_escenario(
+            client, headers, metodo, ruta, params, n,
+            min(calentamiento, n), producto_ids, rng
+        )
+        resultados[nombre] = resumir(latencias, duracion, errores)
+
+    return {
+        'commit': commit_actual(),
+        'fecha': datetime.now().isoformat(),
+        'entorno': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'base_datos': dialecto,
+            'volumenes': volumenes
+        },
+        'parametros': {
+            'repeticiones': repeticiones,
+            'calentamiento': calentamiento
+        },
+        'resultados': resultados
+    }
+
+
+def imprimir_resultados(reporte):
+    """Mostrar la tabla de resultados"""
+    print(f"\n📊 Resultados (commit {reporte['commit']}, volúmenes {reporte['entorno']['volumenes']})")
+    print(f"{'Escenario':<28}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'rps':>10}{'err':>6}")
+    for nombre, r in reporte['resultados'].items():
+        print(f"{nombre:<28}{r['n']:>6}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+              f"{r['p99_ms']:>10.2f}{r['throughput_rps']:>10.1f}{r['errores']:>6}")
+
+
+def main(argv=None):
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Benchmarks de endpoints del Sistema de Inventario')
+    parser.add_argument('--config', default='benchmark', help='Configuración de Flask a usar')
+    parser.add_argument('--repeticiones', type=int, default=50)
+    parser.add_argument('--calentamiento', type=int, default=5)
+    parser.add_argument('--escenario', action='append', help='Ejecutar solo este escenario (repetible)')
+    parser.add_argument('--salida', default=str(RESULTADOS_DIR), help='Directorio de resultados')
+    parser.add_argument('--comparar', help='JSON de una ejecución anterior para detectar regresiones')
+    parser.add_argument('--umbral', type=float, default=0.15, help='Regresión relativa tolerada (p95)')
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app
+
+    app = create_app(args.config)
+
+    print('=' * 60)
+    print('⏱️  SISTEMA DE INVENTARIO - BENCHMARKS')
+    print(f'   Base de datos: {app.config["SQLALCHEMY_DATABASE_URI"]}')
+    print('=' * 60)
+
+    reporte = ejecutar_suite(app, args.repeticiones, args.calentamiento, args.escenario)
+    imprimir_resultados(reporte)
+
+    os.makedirs(args.salida, exist_ok=True)
+    archivo = Path(args.salida) / f"{reporte['commit']}.json"
+    with open(archivo, 'w') as f:
+        json.dump(reporte, f, indent=2)
+    print(f'\n✅ Resultados guardados en {archivo}')
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = json.load(f)
+        regresiones = comparar(reporte, base, args.umbral)
+        if regresiones:
+            print(f"\n❌ Regresiones respecto a {base.get('commit')}:")
+            for r in regresiones:
+                print(f"   {r['escenario']}: {r['base']:.2f}ms -> {r['actual']:.2f}ms (+{r['variacion']:.0%})")
+            return 1
+        print(f"\n✅ Sin regresiones respecto a {base.get('commit')}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Generador de datos sintéticos para benchmarks del Sistema de Inventario
+
+Crea volúmenes configurables de categorías, productos, movimientos y alertas
+mediante inserciones masivas (executemany) en lotes. La generación es
+determinista para una misma semilla, de modo que los resultados de los
+benchmarks son comparables entre commits.
+
+Uso:
+    python -m benchmarks.seed --productos 100000 --movimientos 5000000 --alertas 200000
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import insert, update, bindparam
+
+BENCH_USERNAME = 'bench'
+BENCH_PASSWORD = 'bench123'
+
+TIPOS_ALERTA = ['stock_bajo', 'vencimiento', 'vencido', 'sin_stock']
+PRIORIDADES = ['baja', 'media', 'alta', 'critica']
+MOTIVOS = {
+    'entrada': ['Compra', 'Devolución de cliente', 'Producción'],
+    'salida': ['Venta', 'Consumo interno', 'Merma'],
+    'ajuste': ['Inventario físico']
+}
+
+
+def _insertar_en_lotes(tabla, filas, tamano_lote):
+    """Insertar filas en la tabla usando executemany por lotes"""
+    from backend.app import db
+
+    for inicio in range(0, len(filas), tamano_lote):
+        db.session.execute(insert(tabla), filas[inicio:inicio + tamano_lote])
+    db.session.commit()
+
+
+def crear_usuario_benchmark():
+    """Crear (o recuperar) el usuario administrador usado por los benchmarks"""
+    from backend.app import db
+    from backend.app.models.usuario import Usuario
+
+    usuario = Usuario.query.filter_by(username=BENCH_USERNAME).first()
+    if not usuario:
+        usuario = Usuario(
+            username=BENCH_USERNAME,
+            email='bench@inventario.com',
+            password=BENCH_PASSWORD,
+            nombre='Benchmark',
+            apellido='Sistema',
+            rol='admin'
+        )
+        db.session.add(usuario)
+        db.session.commit()
+    return usuario
+
+
+def generar_datos(categorias=50, productos=1000, movimientos=10000, alertas=1000,
+                  dias=365, semilla=42, tamano_lote=10000, verbose=False):
+    """
+    Generar datos sintéticos en la base de datos de la aplicación activa.
+
+    Debe ejecutarse dentro de un contexto de aplicación. Devuelve un
+    diccionario con la cantidad de filas creadas por tabla.
+    """
+    from backend.app import db
+    from backend.app.models import Categoria, Producto, Movimiento, Alerta
+    from backend.app.utils.versiones import marcar_modificadas
+    from backend.app.utils.contadores import invalidar_no_leidas
+    from backend.app.services.vencimientos import reconstruir_lotes
+    from backend.app.services.almacenes import reconstruir_stock_almacenes
+    from backend.app.services.movimientos_diarios import reconstruir_movimientos_diarios
+
+    rng = random.Random(semilla)
+    hoy = date.today()
+    inicio_periodo = datetime.combine(hoy - timedelta(days=dias), datetime.min.time())
+    ahora = datetime.utcnow()
+
+    def log(mensaje):
+        if verbose:
+            print(mensaje)
+
+    usuario = crear_usuario_benchmark()
+
+    # Prefijo por ejecución para no chocar con datos existentes (códigos únicos)
+    prefijo = f'B{semilla}-{int(time.time())}'
+
+    # Categorías
+    filas_categorias = [
+        {
+            'nombre': f'{prefijo} Categoría {i:04d}',
+            'descripcion': 'Categoría generada para benchmarks',
+            'activa': True,
+            'fecha_creacion': ahora
+        }
+        for i in range(categorias)
+    ]
+    _insertar_en_lotes(Categoria.__table__, filas_categorias, tamano_lote)
+    categoria_ids = [
+        fila.id for fila in db.session.query(Categoria.id)
+        .filter(Categoria.nombre.like(f'{prefijo} %')).all()
+    ]
+    log(f'✅ {len(categoria_ids)} categorías')
+
+    # Productos
+    filas_productos = []
+    for i in range(productos):
+        precio_compra = round(rng.uniform(1, 500), 2)
+        vence = rng.random() < 0.3
+        filas_productos.append({
+            'codigo': f'{prefijo}-{i:07d}',
+            'nombre': f'Producto benchmark {i}',
+            'descripcion': f'Descripción del producto sintético número {i}',
+            'categoria_id': rng.choice(categoria_ids),
+            'stock_actual': 0,
+            'stock_minimo': rng.randint(5, 50),
+            'precio_compra': precio_compra,
+            'precio_venta': round(precio_compra * rng.uniform(1.1, 1.8), 2),
+            'unidad_medida': 'unidad',
+            'ubicacion': f'Pasillo {rng.randint(1, 40)}',
+            'fecha_vencimiento': hoy + timedelta(days=rng.randint(-60, 365)) if vence else None,
+            'lote': f'L{rng.randint(1, 9999):04d}' if vence else None,
+            'activo': True,
+            'fecha_creacion': ahora,
+            'fecha_actualizacion': ahora
+        })
+    _insertar_en_lotes(Producto.__table__, filas_productos, tamano_lote)
+    productos_db = db.session.query(Producto.id, Producto.precio_compra)\
+        .filter(Producto.codigo.like(f'{prefijo}-%')).order_by(Producto.id).all()
+    producto_ids = [fila.id for fila in productos_db]
+    precios = {fila.id: fila.precio_compra for fila in productos_db}
+    del filas_productos
+    log(f'✅ {len(producto_ids)} productos')
+
+    # Movimientos: cadena de stock consistente por producto y fechas crecientes
+    stock = dict.fromkeys(producto_ids, 0)
+    paso = (dias * 86400) / max(movimientos, 1)
+    creados = 0
+    lote = []
+    for i in range(movimientos):
+        producto_id = rng.choice(producto_ids)
+        anterior = stock[producto_id]
+        azar = rng.random()
+        if azar < 0.02:
+            tipo = 'ajuste'
+            cantidad = max(0, anterior + rng.randint(-5, 5))
+            posterior = cantidad
+        elif azar < 0.5 or anterior == 0:
+            tipo = 'entrada'
+            cantidad = rng.randint(1, 100)
+            posterior = anterior + cantidad
+        else:
+            tipo = 'salida'
+            cantidad = rng.randint(1, anterior)
+            posterior = anterior - cantidad
+        stock[producto_id] = posterior
+
+        lote.append({
+            'producto_id': producto_id,
+            'usuario_id': usuario.id,
+            'tipo': tipo,
+            'cantidad': cantidad,
+            'precio_unitario': precios[producto_id] if tipo != 'ajuste' else None,
+            'motivo': rng.choice(MOTIVOS[tipo]),
+            'referencia': f'REF-{i:08d}',
+            'observaciones': None,
+            'stock_anterior': anterior,
+            'stock_posterior': posterior,
+            'fecha_movimiento': inicio_periodo + timedelta(seconds=i * paso)
+        })
+
+        if len(lote) >= tamano_lote:
+            db.session.execute(insert(Movimiento.__table__), lote)
+            db.session.commit()
+            creados += len(lote)
+            lote = []
+            log(f'   ... {creados} movimientos')
+    if lote:
+        db.session.execute(insert(Movimiento.__table__), lote)
+        db.session.commit()
+        creados += len(lote)
+    log(f'✅ {creados} movimientos')
+
+    # Stock final de cada producto según su cadena de movimientos
+    tabla_productos = Producto.__table__
+    stmt = update(tabla_productos)\
+        .where(tabla_productos.c.id == bindparam('b_id'))\
+        .values(stock_actual=bindparam('b_stock'))
+    filas_stock = [{'b_id': pid, 'b_stock': valor} for pid, valor in stock.items() if valor]
+    for inicio in range(0, len(filas_stock), tamano_lote):
+        db.session.connection().execute(stmt, filas_stock[inicio:inicio + tamano_lote])
+    db.session.commit()
+
+    # Lote principal de cada producto con su stock final
+    lotes_creados = reconstruir_lotes()
+    log(f'✅ {lotes_creados} lotes')
+
+    # Todo el stock en el almacén predeterminado
+    log(f'✅ {reconstruir_stock_almacenes()} filas de stock por almacén')
+
+    # Totales diarios de los movimientos insertados en bloque
+    log(f'✅ {reconstruir_movimientos_diarios()} totales diarios de movimientos')
+
+    # Alertas
+    filas_alertas = []
+    for i in range(alertas):
+        tipo = rng.choice(TIPOS_ALERTA)
+        resuelta = rng.random() < 0.3
+        leida = resuelta or rng.random() < 0.5
+        fecha = inicio_periodo + timedelta(seconds=rng.randint(0, dias * 86400))
+        filas_alertas.append({
+            'producto_id': rng.choice(producto_ids),
+            'usuario_id': usuario.id,
+            'tipo': tipo,
+            'titulo': f'Alerta benchmark {i}',
+            'mensaje': f'Alerta sintética de tipo {tipo}',
+            'activa': not resuelta,
+            'leida': leida,
+            'resuelta': resuelta,
+            'fecha_creacion': fecha,
+            'fecha_lectura': fecha if leida else None,
+            'fecha_resolucion': fecha if resuelta else None,
+            'prioridad': rng.choice(PRIORIDADES)
+        })
+    _insertar_en_lotes(Alerta.__table__, filas_alertas, tamano_lote)
+    log(f'✅ {len(filas_alertas)} alertas')
+
+    # Las inserciones masivas no pasan por los eventos de la sesión
+    marcar_modificadas('categorias', 'productos', 'movimientos', 'alertas')
+    invalidar_no_leidas()
+
+    return {
+        'categorias': len(categoria_ids),
+        'productos': len(producto_ids),
+        'movimientos': creados,
+        'alertas': len(filas_alertas)
+    }
+
+
+def main(argv=None):
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Generar datos sintéticos para benchmarks')
+    parser.add_argument('--config', default='benchmark', help='Configuración de Flask a usar')
+    parser.add_argument('--categorias', type=int, default=50)
+    parser.add_argument('--productos', type=int, default=100000)
+    parser.add_argument('--movimientos', type=int, default=5000000)
+    parser.add_argument('--alertas', type=int, default=200000)
+    parser.add_argument('--dias', type=int, default=365, help='Días de historia de movimientos')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--tamano-lote', type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app, db
+
+    app = create_app(args.config)
+
+    print('=' * 60)
+    print('🌱 GENERADOR DE DATOS PARA BENCHMARKS')
+    print(f'   Base de datos: {app.config["SQLALCHEMY_DATABASE_URI"]}')
+    print('=' * 60)
+
+    inicio = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        totales = generar_datos(
+            categorias=args.categorias,
+            productos=args.productos,
+            movimientos=args.movimientos,
+            alertas=args.alertas,
+            dias=args.dias,
+            semilla=args.semilla,
+            tamano_lote=args.tamano_lote,
+            verbose=True
+        )
+
+    print(f'\n🎉 Datos generados en {time.perf_counter() - inicio:.1f}s: {totales}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,20 +4,12 @@ Worker de Celery para el Sistema de Inventario
 """
 
 import os
-from backend.app import create_app, make_celery
+from backend.app import create_app
 
-# Crear aplicación Flask
+# Crear aplicación Flask; create_app crea también la única instancia de
+# Celery, que importa los módulos de tareas al arrancar el worker
 app = create_app(os.getenv('FLASK_ENV', 'development'))
-
-# Crear instancia de Celery
-celery = make_celery(app)
-
-# Importar tareas
-from backend.app.tasks.alertas_tasks import (
-    generar_alertas_automaticas,
-    enviar_notificacion_email,
-    limpiar_alertas_resueltas
-)
+celery = app.extensions['celery']
 
 # Configurar tareas periódicas
 from celery.schedules import crontab
@@ -28,14 +20,27 @@ celery.conf.beat_schedule = {
         'task': 'backend.app.tasks.alertas_tasks.generar_alertas_automaticas',
         'schedule': crontab(minute=0),  # Cada hora en punto
     },
+    # Enviar los resúmenes de notificaciones de alertas cada 15 minutos
+    'enviar-resumen-notificaciones': {
+        'task': 'backend.app.tasks.alertas_tasks.enviar_resumen_notificaciones',
+        'schedule': crontab(minute='*/15'),
+    },
+    # Recalcular pronóstico de demanda y puntos de reorden cada día a la 1 AM
+    'calcular-pronostico-demanda': {
+        'task': 'backend.app.tasks.pronostico_tasks.calcular_pronostico_demanda',
+        'schedule': crontab(hour=1, minute=0),  # Todos los días a la 1:00 AM
+    },
     # Limpiar alertas resueltas cada día a las 2 AM
     'limpiar-alertas-resueltas': {
         'task': 'backend.app.tasks.alertas_tasks.limpiar_alertas_resueltas',
         'schedule': crontab(hour=2, minute=0),  # Todos los días a las 2:00 AM
     },
+    # Verificar el libro de movimientos (solo reporte) cada día a las 3 AM
+    'conciliar-libro-stock': {
+        'task': 'backend.app.tasks.conciliacion_tasks.conciliar_libro_stock',
+        'schedule': crontab(hour=3, minute=0),  # Todos los días a las 3:00 AM
+    },
 }
 
-celery.conf.timezone = 'UTC'
-
 if __name__ == '__main__':
     celery.start()
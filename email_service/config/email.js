@@ -1,6 +1,10 @@
 const nodemailer = require('nodemailer');
 const logger = require('../utils/logger');
 
+// Transporter compartido: un pool de conexiones SMTP reutilizadas entre
+// requests en lugar de una conexión (y un handshake TLS) por email
+let transporter = null;
+
 // Configuración del transporter de nodemailer
 const createTransporter = () => {
   const config = {
@@ -11,12 +15,17 @@ const createTransporter = () => {
       user: process.env.SMTP_USER,
       pass: process.env.SMTP_PASS,
     },
+    pool: true,
+    maxConnections: parseInt(process.env.SMTP_MAX_CONNECTIONS) || 5,
+    maxMessages: parseInt(process.env.SMTP_MAX_MESSAGES) || 100, // Mensajes por conexión antes de reabrirla
+    rateDelta: 1000,
+    rateLimit: parseInt(process.env.SMTP_RATE_LIMIT) || 5, // Mensajes por segundo en todo el pool
   };
 
-  const transporter = nodemailer.createTransporter(config);
+  const pool = nodemailer.createTransport(config);
 
   // Verificar la configuración
-  transporter.verify((error, success) => {
+  pool.verify((error, success) => {
     if (error) {
       logger.error('Error en configuración SMTP:', error);
     } else {
@@ -24,9 +33,25 @@ const createTransporter = () => {
     }
   });
 
+  return pool;
+};
+
+// Obtener el transporter compartido (se crea en el primer uso)
+const getTransporter = () => {
+  if (!transporter) {
+    transporter = createTransporter();
+  }
   return transporter;
 };
 
+// Cerrar las conexiones del pool (al detener el servicio)
+const closeTransporter = () => {
+  if (transporter) {
+    transporter.close();
+    transporter = null;
+  }
+};
+
 // Plantillas de email
 const emailTemplates = {
   stockBajo: (producto, stockActual, stockMinimo) => ({
@@ -167,6 +192,7 @@ const emailTemplates = {
 };
 
 module.exports = {
-  createTransporter,
+  getTransporter,
+  closeTransporter,
   emailTemplates
 };
@@ -1,6 +1,6 @@
 const express = require('express');
 const Joi = require('joi');
-const { createTransporter, emailTemplates } = require('../config/email');
+const { getTransporter, emailTemplates } = require('../config/email');
 const logger = require('../utils/logger');
 
 const router = express.Router();
@@ -18,6 +18,43 @@ const sendEmailSchema = Joi.object({
   templateData: Joi.object()
 }).or('text', 'html', 'template');
 
+// Envío masivo: cada mensaje con el mismo formato que /send
+const sendBulkSchema = Joi.object({
+  messages: Joi.array()
+    .items(sendEmailSchema)
+    .min(1)
+    .max(parseInt(process.env.BULK_MAX_MESSAGES) || 500)
+    .required()
+});
+
+// Contenido del email: la plantilla indicada o el asunto y cuerpo recibidos
+const renderEmail = ({ subject, text, html, template, templateData }) => {
+  if (!(template && templateData)) {
+    return { subject, text, html };
+  }
+  switch (template) {
+    case 'stockBajo':
+      return emailTemplates.stockBajo(
+        templateData.producto,
+        templateData.stockActual,
+        templateData.stockMinimo
+      );
+    case 'vencimiento':
+      return emailTemplates.vencimiento(
+        templateData.producto,
+        templateData.diasRestantes,
+        templateData.fechaVencimiento
+      );
+    case 'reporteInventario':
+      return emailTemplates.reporteInventario(
+        templateData.resumen,
+        templateData.fechaGeneracion
+      );
+    default:
+      return null;
+  }
+};
+
 // Endpoint para enviar email personalizado
 router.post('/send', async (req, res) => {
   try {
@@ -30,39 +67,15 @@ router.post('/send', async (req, res) => {
       });
     }
 
-    const { to, subject, text, html, template, templateData } = value;
-    const transporter = createTransporter();
-
-    let emailContent = { subject, text, html };
+    const { to } = value;
+    const transporter = getTransporter();
 
     // Si se especifica una plantilla, usarla
-    if (template && templateData) {
-      switch (template) {
-        case 'stockBajo':
-          emailContent = emailTemplates.stockBajo(
-            templateData.producto,
-            templateData.stockActual,
-            templateData.stockMinimo
-          );
-          break;
-        case 'vencimiento':
-          emailContent = emailTemplates.vencimiento(
-            templateData.producto,
-            templateData.diasRestantes,
-            templateData.fechaVencimiento
-          );
-          break;
-        case 'reporteInventario':
-          emailContent = emailTemplates.reporteInventario(
-            templateData.resumen,
-            templateData.fechaGeneracion
-          );
-          break;
-        default:
-          return res.status(400).json({
-            error: 'Plantilla no válida'
-          });
-      }
+    const emailContent = renderEmail(value);
+    if (!emailContent) {
+      return res.status(400).json({
+        error: 'Plantilla no válida'
+      });
     }
 
     // Configurar el email
@@ -99,6 +112,67 @@ router.post('/send', async (req, res) => {
   }
 });
 
+// Endpoint para enviar muchos emails en una sola request: todos pasan por
+// el pool de conexiones, que limita el ritmo de envío
+router.post('/send-bulk', async (req, res) => {
+  try {
+    const { error, value } = sendBulkSchema.validate(req.body);
+    if (error) {
+      return res.status(400).json({
+        error: 'Datos inválidos',
+        details: error.details.map(d => d.message)
+      });
+    }
+
+    const transporter = getTransporter();
+
+    const results = await Promise.all(value.messages.map(async (message, index) => {
+      const to = Array.isArray(message.to) ? message.to.join(', ') : message.to;
+      const emailContent = renderEmail(message);
+      if (!emailContent) {
+        return { index, to, success: false, error: 'Plantilla no válida' };
+      }
+
+      try {
+        const info = await transporter.sendMail({
+          from: process.env.SMTP_USER,
+          to,
+          subject: emailContent.subject,
+          text: emailContent.text,
+          html: emailContent.html
+        });
+        return { index, to, success: true, messageId: info.messageId };
+      } catch (sendError) {
+        logger.error('Error enviando email del lote:', { to, error: sendError.message });
+        return { index, to, success: false, error: sendError.message };
+      }
+    }));
+
+    const sent = results.filter(r => r.success).length;
+
+    logger.info('Lote de emails procesado', {
+      total: results.length,
+      sent,
+      failed: results.length - sent
+    });
+
+    res.json({
+      success: sent === results.length,
+      message: `${sent} de ${results.length} emails enviados`,
+      sent,
+      failed: results.length - sent,
+      results
+    });
+
+  } catch (error) {
+    logger.error('Error enviando lote de emails:', error);
+    res.status(500).json({
+      error: 'Error enviando lote de emails',
+      message: error.message
+    });
+  }
+});
+
 // Endpoint para enviar alerta de stock bajo
 router.post('/alert/stock-bajo', async (req, res) => {
   try {
@@ -125,7 +199,7 @@ router.post('/alert/stock-bajo', async (req, res) => {
     }
 
     const { to, producto, stockActual, stockMinimo } = value;
-    const transporter = createTransporter();
+    const transporter = getTransporter();
 
     const emailContent = emailTemplates.stockBajo(producto, stockActual, stockMinimo);
 
@@ -187,7 +261,7 @@ router.post('/alert/vencimiento', async (req, res) => {
     }
 
     const { to, producto, diasRestantes, fechaVencimiento } = value;
-    const transporter = createTransporter();
+    const transporter = getTransporter();
 
     const emailContent = emailTemplates.vencimiento(producto, diasRestantes, fechaVencimiento);
 
@@ -226,7 +300,7 @@ router.post('/alert/vencimiento', async (req, res) => {
 // Endpoint para verificar configuración SMTP
 router.get('/test', async (req, res) => {
   try {
-    const transporter = createTransporter();
+    const transporter = getTransporter();
     await transporter.verify();
     
     res.json({
@@ -7,6 +7,7 @@ require('dotenv').config();
 
 const emailRoutes = require('./routes/email');
 const accountRoutes = require('./routes/accounts');
+const { closeTransporter } = require('./config/email');
 const logger = require('./utils/logger');
 
 const app = express();
@@ -78,9 +79,17 @@ app.use('*', (req, res) => {
 });
 
 // Iniciar servidor
-app.listen(PORT, () => {
+const server = app.listen(PORT, () => {
   logger.info(`Servicio de email iniciado en puerto ${PORT}`);
   console.log(`🚀 Servicio de email corriendo en http://localhost:${PORT}`);
 });
 
+// Cerrar el pool de conexiones SMTP al detener el servicio
+process.on('SIGTERM', () => {
+  server.close(() => {
+    closeTransporter();
+    process.exit(0);
+  });
+});
+
 module.exports = app;
@@ -297,7 +297,8 @@ async function loadUserInfo() {
 // Cargar contador de alertas
 async function loadAlertsCount() {
     try {
-        const response = await API.get('/alertas/estadisticas');
+        // Contador liviano (una clave en caché) en lugar de las estadísticas completas
+        const response = await API.get('/alertas/no-leidas');
         const alertsCountElement = document.getElementById('alertas-count');
         if (alertsCountElement) {
             alertsCountElement.textContent = response.alertas_no_leidas || 0;
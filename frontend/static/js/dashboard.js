@@ -2,13 +2,56 @@
 
 let movimientosChart = null;
 let categoriasChart = null;
+let eventosSource = null;
+let resumenDashboard = null;
+const refrescosPendientes = {};
 
 // Inicializar dashboard
 document.addEventListener('DOMContentLoaded', function() {
     loadDashboardData();
     initializeCharts();
+    conectarEventos();
 });
 
+// Suscribirse al flujo de eventos en tiempo real (SSE) en lugar de sondear
+function conectarEventos() {
+    if (!authToken || !window.EventSource) return;
+    
+    eventosSource = new EventSource(`${API_BASE_URL}/alertas/stream?jwt=${encodeURIComponent(authToken)}`);
+    
+    eventosSource.addEventListener('alerta', function(event) {
+        const alerta = JSON.parse(event.data);
+        Utils.showAlert(alerta.titulo, alerta.prioridad === 'critica' ? 'danger' : 'warning');
+        programarRefresco('alertas', async () => {
+            await loadRecentAlerts();
+            await loadStats();
+            loadAlertsCount();
+        });
+    });
+    
+    eventosSource.addEventListener('stock', function() {
+        programarRefresco('stock', async () => {
+            await loadStats();
+            await loadRecentMovements();
+        });
+    });
+    
+    // EventSource reconecta automáticamente; si el token expiró se cierra
+    eventosSource.onerror = function() {
+        if (eventosSource.readyState === EventSource.CLOSED) {
+            eventosSource = null;
+        }
+    };
+    
+    window.addEventListener('beforeunload', () => eventosSource && eventosSource.close());
+}
+
+// Agrupar ráfagas de eventos en un solo refresco
+function programarRefresco(clave, funcion, espera = 1000) {
+    clearTimeout(refrescosPendientes[clave]);
+    refrescosPendientes[clave] = setTimeout(funcion, espera);
+}
+
 // Cargar datos del dashboard
 async function loadDashboardData() {
     try {
@@ -30,27 +73,22 @@ async function loadDashboardData() {
     }
 }
 
+// Obtener el resumen del dashboard (totales, categorías y alertas) en una sola petición
+async function loadResumen() {
+    resumenDashboard = await API.get('/dashboard/resumen');
+    return resumenDashboard;
+}
+
 // Cargar estadísticas principales
 async function loadStats() {
     try {
-        // Obtener productos con filtros para estadísticas
-        const productosResponse = await API.get('/productos', { per_page: 1000 });
-        const productos = productosResponse.productos || [];
-        
-        // Calcular estadísticas
-        const totalProductos = productos.length;
-        const valorInventario = productos.reduce((sum, p) => sum + (p.valor_inventario || 0), 0);
-        const stockBajo = productos.filter(p => p.necesita_restock).length;
-        
-        // Obtener alertas activas
-        const alertasResponse = await API.get('/alertas/estadisticas');
-        const alertasActivas = alertasResponse.alertas_activas || 0;
+        const resumen = await loadResumen();
         
         // Actualizar elementos del DOM
-        updateStatElement('total-productos', totalProductos);
-        updateStatElement('valor-inventario', Utils.formatCurrency(valorInventario));
-        updateStatElement('stock-bajo', stockBajo);
-        updateStatElement('alertas-activas', alertasActivas);
+        updateStatElement('total-productos', resumen.productos.total_productos);
+        updateStatElement('valor-inventario', Utils.formatCurrency(resumen.productos.valor_inventario));
+        updateStatElement('stock-bajo', resumen.productos.stock_bajo);
+        updateStatElement('alertas-activas', resumen.alertas.activas);
         
     } catch (error) {
         console.error('Error loading stats:', error);
@@ -184,30 +222,18 @@ async function loadChartData() {
 // Cargar gráfico de movimientos
 async function loadMovimientosChart() {
     try {
-        // Obtener datos de los últimos 7 días
-        const fechaHasta = new Date().toISOString().split('T')[0];
-        const fechaDesde = new Date(Date.now() - 7 * 24 * 60 * 60 * 1000).toISOString().split('T')[0];
-        
-        const response = await API.get('/movimientos/estadisticas', {
-            fecha_desde: fechaDesde,
-            fecha_hasta: fechaHasta
-        });
+        // Entradas y salidas de los últimos 7 días en una sola petición
+        const response = await API.get('/movimientos/serie', { intervalo: 1 });
+        const serie = response.serie || [];
         
         const ctx = document.getElementById('movimientosChart');
         if (!ctx) return;
         
-        // Datos de ejemplo (en una implementación real, necesitarías agrupar por día)
-        const labels = [];
-        const entradasData = [];
-        const salidasData = [];
-        
-        // Generar etiquetas para los últimos 7 días
-        for (let i = 6; i >= 0; i--) {
-            const fecha = new Date(Date.now() - i * 24 * 60 * 60 * 1000);
-            labels.push(fecha.toLocaleDateString('es-CO', { month: 'short', day: 'numeric' }));
-            entradasData.push(Math.floor(Math.random() * 20) + 5); // Datos de ejemplo
-            salidasData.push(Math.floor(Math.random() * 15) + 3); // Datos de ejemplo
-        }
+        const labels = serie.map(punto =>
+            new Date(`${punto.fecha_desde}T00:00:00`).toLocaleDateString('es-CO', { month: 'short', day: 'numeric' })
+        );
+        const entradasData = serie.map(punto => punto.entrada.cantidad);
+        const salidasData = serie.map(punto => punto.salida.cantidad);
         
         if (movimientosChart) {
             movimientosChart.destroy();
@@ -262,25 +288,15 @@ async function loadMovimientosChart() {
 // Cargar gráfico de categorías
 async function loadCategoriasChart() {
     try {
-        const response = await API.get('/categorias');
-        const categorias = response.categorias || [];
-        
         const ctx = document.getElementById('categoriasChart');
         if (!ctx) return;
         
-        // Obtener productos por categoría
-        const productosResponse = await API.get('/productos', { per_page: 1000 });
-        const productos = productosResponse.productos || [];
-        
-        // Contar productos por categoría
-        const categoriaCount = {};
-        productos.forEach(producto => {
-            const categoriaNombre = producto.categoria_nombre || 'Sin categoría';
-            categoriaCount[categoriaNombre] = (categoriaCount[categoriaNombre] || 0) + 1;
-        });
+        // Productos por categoría ya contados en el servidor (reutiliza el resumen de loadStats)
+        const resumen = resumenDashboard || await loadResumen();
+        const categorias = resumen.categorias || [];
         
-        const labels = Object.keys(categoriaCount);
-        const data = Object.values(categoriaCount);
+        const labels = categorias.map(c => c.categoria_nombre || 'Sin categoría');
+        const data = categorias.map(c => c.total);
         const colors = [
             '#007bff', '#28a745', '#ffc107', '#dc3545', '#17a2b8',
             '#6f42c1', '#e83e8c', '#fd7e14', '#20c997', '#6c757d'
@@ -46,6 +46,8 @@ def run_unit_tests():
     
     test_files = [
         "tests/test_api.py",
+        "tests/test_benchmarks.py",
+        "tests/test_servicios.py",
         # Agregar más archivos de prueba aquí
     ]
     
@@ -113,6 +113,32 @@ class TestProductos:
         data = json.loads(response.data)
         assert 'productos' in data
     
+    def test_get_productos_fields(self, app, client, auth_headers, sample_producto):
+        """Test proyección de campos con ?fields="""
+        from sqlalchemy import event
+        from backend.app import db
+        
+        sentencias = []
+        def capturar(conn, cursor, statement, *args):
+            sentencias.append(statement)
+        
+        event.listen(db.engine, 'before_cursor_execute', capturar)
+        try:
+            response = client.get('/api/productos?fields=id,codigo,categoria_nombre', headers=auth_headers)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capturar)
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert set(data['productos'][0]) == {'id', 'codigo', 'categoria_nombre'}
+        # Solo se leen las columnas pedidas, con la categoría en la misma consulta
+        consulta = next(s for s in sentencias if 'LIMIT' in s)
+        assert 'descripcion' not in consulta
+        assert 'categorias' in consulta
+        
+        response = client.get('/api/productos?fields=id,inexistente', headers=auth_headers)
+        assert response.status_code == 400
+    
     def test_update_stock(self, client, auth_headers, sample_producto):
         """Test actualizar stock"""
         # Actualizar stock
@@ -128,6 +154,81 @@ class TestProductos:
         data = json.loads(response.data)
         assert data['producto']['stock_actual'] == 50
 
+    def test_update_stock_idempotente(self, client, auth_headers, sample_producto):
+        """Test reintento con Idempotency-Key sin duplicar el movimiento"""
+        url = f'/api/productos/{sample_producto["id"]}/stock'
+        headers = {**auth_headers, 'Idempotency-Key': 'scanner-42-0001'}
+        cuerpo = {'tipo': 'entrada', 'cantidad': 7, 'motivo': 'Recepción'}
+        
+        primera = client.post(url, json=cuerpo, headers=headers)
+        reintento = client.post(url, json=cuerpo, headers=headers)
+        
+        assert primera.status_code == 200
+        assert reintento.status_code == 200
+        assert reintento.headers['Idempotent-Replayed'] == 'true'
+        assert json.loads(reintento.data) == json.loads(primera.data)
+        
+        # El stock se incrementó una sola vez
+        producto = json.loads(client.get(f'/api/productos/{sample_producto["id"]}', headers=auth_headers).data)
+        assert producto['stock_actual'] == json.loads(primera.data)['producto']['stock_actual']
+        
+        # Reutilizar la clave con otro cuerpo se rechaza
+        response = client.post(url, json={**cuerpo, 'cantidad': 8}, headers=headers)
+        assert response.status_code == 422
+
+    def test_idempotente_tras_tomar_bloqueo(self, client, auth_headers, sample_producto, monkeypatch):
+        """Test la respuesta guardada justo antes del bloqueo se reproduce"""
+        from backend.app import cache
+
+        url = f'/api/productos/{sample_producto["id"]}/stock'
+        headers = {**auth_headers, 'Idempotency-Key': 'scanner-42-0002'}
+        cuerpo = {'tipo': 'entrada', 'cantidad': 3, 'motivo': 'Recepción'}
+        primera = client.post(url, json=cuerpo, headers=headers)
+
+        # La primera lectura no ve la respuesta (la otra petición aún no terminaba)
+        get_original = cache.get
+        lecturas = []
+
+        def get_tardio(clave):
+            lecturas.append(clave)
+            return None if len(lecturas) == 1 else get_original(clave)
+        monkeypatch.setattr(cache, 'get', get_tardio)
+
+        reintento = client.post(url, json=cuerpo, headers=headers)
+        monkeypatch.undo()
+
+        assert reintento.status_code == 200
+        assert reintento.headers['Idempotent-Replayed'] == 'true'
+        producto = json.loads(client.get(f'/api/productos/{sample_producto["id"]}', headers=auth_headers).data)
+        assert producto['stock_actual'] == json.loads(primera.data)['producto']['stock_actual']
+
+    def test_get_productos_condicional(self, client, auth_headers, sample_producto):
+        """Test GET condicional con ETag (304 si no hubo cambios)"""
+        response = client.get('/api/productos', headers=auth_headers)
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        assert etag.startswith('W/')
+        assert 'no-cache' in response.headers['Cache-Control']
+
+        # Sin cambios: 304 sin cuerpo
+        response = client.get('/api/productos',
+            headers={**auth_headers, 'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+
+        # Otros parámetros producen otro ETag
+        response = client.get('/api/productos?per_page=5', headers=auth_headers)
+        assert response.headers['ETag'] != etag
+
+        # Una escritura invalida el ETag
+        client.post(f'/api/productos/{sample_producto["id"]}/stock',
+            json={'tipo': 'entrada', 'cantidad': 1, 'motivo': 'Test ETag'},
+            headers=auth_headers)
+        response = client.get('/api/productos',
+            headers={**auth_headers, 'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
 class TestMovimientos:
     """Tests de movimientos"""
     
@@ -139,6 +240,20 @@ class TestMovimientos:
         data = json.loads(response.data)
         assert 'movimientos' in data
     
+    def test_get_movimientos_fields(self, client, auth_headers, sample_producto):
+        """Test proyección de campos en movimientos"""
+        client.post(f'/api/productos/{sample_producto["id"]}/stock',
+            json={'tipo': 'entrada', 'cantidad': 2},
+            headers=auth_headers)
+        
+        response = client.get('/api/movimientos?fields=id,tipo,producto_nombre,usuario_nombre', headers=auth_headers)
+        
+        assert response.status_code == 200
+        movimiento = json.loads(response.data)['movimientos'][0]
+        assert set(movimiento) == {'id', 'tipo', 'producto_nombre', 'usuario_nombre'}
+        assert movimiento['producto_nombre']
+        assert movimiento['usuario_nombre']
+    
     def test_get_estadisticas_movimientos(self, client, auth_headers):
         """Test obtener estadísticas de movimientos"""
         response = client.get('/api/movimientos/estadisticas', headers=auth_headers)
@@ -148,6 +263,154 @@ class TestMovimientos:
         assert 'total_movimientos' in data
         assert 'entradas' in data
         assert 'salidas' in data
+    
+    def test_serie_movimientos(self, client, auth_headers, sample_producto):
+        """Test serie por día agrupada en intervalos"""
+        from datetime import datetime, timedelta
+        
+        url = f'/api/productos/{sample_producto["id"]}/stock'
+        client.post(url, json={'tipo': 'entrada', 'cantidad': 12, 'precio_unitario': 5}, headers=auth_headers)
+        client.post(url, json={'tipo': 'salida', 'cantidad': 4}, headers=auth_headers)
+        
+        hoy = datetime.utcnow().date()
+        desde = (hoy - timedelta(days=5)).isoformat()
+        params = f'fecha_desde={desde}&fecha_hasta={hoy.isoformat()}'
+        
+        response = client.get(f'/api/movimientos/serie?{params}&intervalo=4', headers=auth_headers)
+        
+        assert response.status_code == 200
+        serie = json.loads(response.data)['serie']
+        assert [punto['fecha_desde'] for punto in serie] == [desde, (hoy - timedelta(days=1)).isoformat()]
+        assert serie[-1]['fecha_hasta'] == hoy.isoformat()
+        
+        estadisticas = json.loads(client.get(f'/api/movimientos/estadisticas?{params}', headers=auth_headers).data)
+        assert sum(p['entrada']['cantidad'] for p in serie) == estadisticas['entradas']['cantidad']
+        assert sum(p['salida']['cantidad'] for p in serie) == estadisticas['salidas']['cantidad']
+        assert sum(p['entrada']['valor'] for p in serie) == pytest.approx(estadisticas['entradas']['valor'])
+        assert serie[-1]['entrada']['unidades'] >= 12
+        
+        response = client.get('/api/movimientos/serie?intervalo=0', headers=auth_headers)
+        assert response.status_code == 400
+
+class TestAlmacenes:
+    """Tests de stock por almacén y transferencias"""
+    
+    def test_transferencia(self, client, auth_headers, sample_producto):
+        """Test transferencia como par de movimientos con totales por almacén"""
+        import time
+        sufijo = str(int(time.time() * 1000))
+        almacenes = []
+        for codigo in ('N', 'S'):
+            response = client.post('/api/almacenes',
+                json={'codigo': f'{codigo}{sufijo}', 'nombre': f'Almacén {codigo}'},
+                headers=auth_headers)
+            assert response.status_code == 201
+            almacenes.append(json.loads(response.data)['almacen'])
+        norte, sur = almacenes
+        
+        client.post(f'/api/productos/{sample_producto["id"]}/stock',
+            json={'tipo': 'entrada', 'cantidad': 30, 'almacen_id': norte['id']},
+            headers=auth_headers)
+        
+        transferencia = {'producto_id': sample_producto['id'], 'origen_id': norte['id'],
+                         'destino_id': sur['id'], 'cantidad': 12}
+        headers = {**auth_headers, 'Idempotency-Key': f'trf-{sufijo}'}
+        response = client.post('/api/almacenes/transferencias', json=transferencia, headers=headers)
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert [(m['tipo'], m['almacen_id']) for m in data['movimientos']] == \
+            [('salida', norte['id']), ('entrada', sur['id'])]
+        assert data['origen']['total_unidades'] == 18
+        assert data['destino']['total_unidades'] == 12
+        assert data['destino']['productos_con_stock'] == 1
+        
+        # Reintento con la misma clave: no se duplica la transferencia
+        response = client.post('/api/almacenes/transferencias', json=transferencia, headers=headers)
+        assert response.headers.get('Idempotent-Replayed') == 'true'
+        
+        response = client.get(f'/api/productos?almacen_id={sur["id"]}', headers=auth_headers)
+        productos = json.loads(response.data)['productos']
+        assert [(p['id'], p['stock_almacen'], p['stock_actual']) for p in productos] == \
+            [(sample_producto['id'], 12, 30)]
+        
+        response = client.get(f'/api/reportes/inventario?almacen_id={norte["id"]}', headers=auth_headers)
+        resumen = json.loads(response.data)['resumen']
+        assert resumen['total_productos'] == 1
+        
+        # No se puede transferir más de lo que hay en el origen
+        response = client.post('/api/almacenes/transferencias',
+            json={**transferencia, 'cantidad': 13, 'origen_id': sur['id'], 'destino_id': norte['id']},
+            headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_ajuste_por_almacen(self, client, auth_headers, sample_producto):
+        """Test un ajuste es el conteo de un almacén cuando hay stock en varios"""
+        import time
+        sufijo = str(int(time.time() * 1000))
+        norte, sur = [
+            json.loads(client.post('/api/almacenes', json={'codigo': f'{codigo}{sufijo}', 'nombre': codigo},
+                                   headers=auth_headers).data)['almacen']
+            for codigo in ('N', 'S')
+        ]
+        url = f'/api/productos/{sample_producto["id"]}/stock'
+        for almacen, cantidad in ((norte, 20), (sur, 10)):
+            client.post(url, json={'tipo': 'entrada', 'cantidad': cantidad, 'almacen_id': almacen['id']},
+                        headers=auth_headers)
+        
+        # Sin almacén no se sabe qué se contó
+        response = client.post(url, json={'tipo': 'ajuste', 'cantidad': 25}, headers=auth_headers)
+        assert response.status_code == 400
+        
+        response = client.post(url, json={'tipo': 'ajuste', 'cantidad': 15, 'almacen_id': norte['id']},
+                               headers=auth_headers)
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['producto']['stock_actual'] == 25
+        assert (data['movimiento']['stock_anterior'], data['movimiento']['stock_posterior']) == (30, 25)
+        
+        stock = {}
+        for almacen in (norte, sur):
+            response = client.get(f'/api/productos?almacen_id={almacen["id"]}', headers=auth_headers)
+            stock[almacen['id']] = json.loads(response.data)['productos'][0]['stock_almacen']
+        assert stock == {norte['id']: 15, sur['id']: 10}
+
+    def test_transferencia_no_es_demanda(self, app, client, auth_headers, sample_producto):
+        """Test las transferencias no cuentan como salidas en estadísticas ni pronóstico"""
+        import time
+        from datetime import datetime
+        from backend.app.services.pronostico import cargar_demanda_diaria
+        from backend.app.services.movimientos_diarios import reconstruir_movimientos_diarios
+        
+        sufijo = str(int(time.time() * 1000))
+        origen, destino = [
+            json.loads(client.post('/api/almacenes', json={'codigo': f'{codigo}{sufijo}', 'nombre': codigo},
+                                   headers=auth_headers).data)['almacen']
+            for codigo in ('E', 'O')
+        ]
+        client.post(f'/api/productos/{sample_producto["id"]}/stock',
+            json={'tipo': 'entrada', 'cantidad': 20, 'almacen_id': origen['id']},
+            headers=auth_headers)
+        
+        hoy = datetime.utcnow().date()
+        url = f'/api/movimientos/estadisticas?fecha_desde={hoy.isoformat()}&fecha_hasta={hoy.isoformat()}'
+        antes = json.loads(client.get(url, headers=auth_headers).data)
+        demanda_antes = cargar_demanda_diaria(hoy, hoy)['unidades'].sum()
+        
+        response = client.post('/api/almacenes/transferencias',
+            json={'producto_id': sample_producto['id'], 'origen_id': origen['id'],
+                  'destino_id': destino['id'], 'cantidad': 5},
+            headers=auth_headers)
+        assert response.status_code == 201
+        assert all(m['transferencia'] for m in json.loads(response.data)['movimientos'])
+        
+        despues = json.loads(client.get(url, headers=auth_headers).data)
+        assert despues['salidas'] == antes['salidas']
+        assert despues['entradas'] == antes['entradas']
+        assert cargar_demanda_diaria(hoy, hoy)['unidades'].sum() == demanda_antes
+        
+        # Reconstruir los totales diarios da el mismo resultado
+        reconstruir_movimientos_diarios(hoy)
+        assert json.loads(client.get(url, headers=auth_headers).data)['salidas'] == antes['salidas']
 
 class TestAlertas:
     """Tests de alertas"""
@@ -176,6 +439,88 @@ class TestAlertas:
         data = json.loads(response.data)
         assert 'total_alertas' in data
         assert 'alertas_activas' in data
+    
+    def test_contador_no_leidas(self, client, auth_headers, sample_producto):
+        """Test contador en caché igual al conteo de las estadísticas"""
+        def contador():
+            return json.loads(client.get('/api/alertas/no-leidas', headers=auth_headers).data)['alertas_no_leidas']
+        
+        def estadisticas():
+            return json.loads(client.get('/api/alertas/estadisticas', headers=auth_headers).data)['alertas_no_leidas']
+        
+        inicial = contador()
+        assert inicial == estadisticas()
+        
+        # El producto de ejemplo no tiene stock: genera al menos una alerta
+        creadas = json.loads(client.post('/api/alertas/generar', headers=auth_headers).data)['alertas']
+        assert creadas
+        assert contador() == inicial + len(creadas) == estadisticas()
+        
+        client.post(f"/api/alertas/{creadas[0]['id']}/leer", headers=auth_headers)
+        client.post(f"/api/alertas/{creadas[0]['id']}/leer", headers=auth_headers)
+        assert contador() == inicial + len(creadas) - 1 == estadisticas()
+        
+        client.post(f"/api/alertas/{creadas[-1]['id']}/resolver", headers=auth_headers)
+        assert contador() == estadisticas()
+    
+    def test_stream_alertas(self, client, auth_headers, auth_token, sample_categoria):
+        """Test flujo SSE con eventos de stock y de alertas nuevas"""
+        producto = json.loads(client.post('/api/productos',
+            json={'codigo': 'SSE001', 'nombre': 'Producto SSE', 'categoria_id': sample_categoria['id'],
+                  'stock_minimo': 10, 'precio_compra': 10.00},
+            headers=auth_headers).data)['producto']
+        
+        # El token viaja en la query string porque EventSource no envía cabeceras
+        response = client.get(f'/api/alertas/stream?jwt={auth_token}', buffered=False)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        flujo = iter(response.response)
+        assert 'retry:' in next(flujo).decode()
+        
+        client.post(f'/api/productos/{producto["id"]}/stock',
+            json={'tipo': 'entrada', 'cantidad': 3, 'motivo': 'Test SSE'},
+            headers=auth_headers)
+        evento = next(flujo).decode()
+        assert 'event: stock' in evento
+        datos = json.loads(evento.split('data: ', 1)[1])
+        assert datos['producto_id'] == producto['id']
+        assert datos['stock_actual'] == 3
+        
+        client.post('/api/alertas/generar', headers=auth_headers)
+        eventos = [next(flujo).decode()]
+        while f'"producto_id":{producto["id"]}' not in eventos[-1].replace(' ', ''):
+            eventos.append(next(flujo).decode())
+        assert 'event: alerta' in eventos[-1]
+        response.close()
+        
+        # Sin token no se permite la suscripción
+        assert client.get('/api/alertas/stream').status_code == 401
+
+class TestDashboard:
+    """Tests del resumen del dashboard"""
+    
+    def test_resumen(self, client, auth_headers, sample_producto):
+        """Test totales agregados en SQL iguales a los del reporte de inventario"""
+        response = client.get('/api/dashboard/resumen', headers=auth_headers)
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        inventario = json.loads(client.get('/api/reportes/inventario', headers=auth_headers).data)
+        assert data['productos']['total_productos'] == inventario['resumen']['total_productos']
+        assert data['productos']['valor_inventario'] == pytest.approx(inventario['resumen']['valor_total_inventario'])
+        assert data['productos']['stock_bajo'] == inventario['resumen']['productos_stock_bajo']
+        assert data['productos']['sin_stock'] == inventario['resumen']['productos_sin_stock']
+        assert sum(c['total'] for c in data['categorias']) == data['productos']['total_productos']
+        assert set(data['alertas']) == {'activas', 'no_leidas', 'criticas', 'altas'}
+        
+        # Un movimiento invalida el resumen cacheado
+        total_anterior = data['productos']['valor_inventario']
+        client.post(f'/api/productos/{sample_producto["id"]}/stock',
+                    json={'tipo': 'entrada', 'cantidad': 10}, headers=auth_headers)
+        data = json.loads(client.get('/api/dashboard/resumen', headers=auth_headers).data)
+        assert data['productos']['valor_inventario'] == pytest.approx(
+            total_anterior + 10 * sample_producto['precio_compra']
+        )
 
 class TestReportes:
     """Tests de reportes"""
@@ -200,6 +545,84 @@ class TestReportes:
         assert 'periodo' in data
         assert 'resumen' in data
         assert 'movimientos' in data
+    
+    def test_reporte_movimientos_agregados(self, client, auth_headers, sample_producto):
+        """Test resumen, agregados por producto y ranking del reporte de movimientos"""
+        url = f'/api/productos/{sample_producto["id"]}/stock'
+        client.post(url, json={'tipo': 'entrada', 'cantidad': 20, 'precio_unitario': 10}, headers=auth_headers)
+        client.post(url, json={'tipo': 'salida', 'cantidad': 5, 'precio_unitario': 15}, headers=auth_headers)
+        
+        response = client.get(f'/api/reportes/movimientos?producto_id={sample_producto["id"]}',
+                              headers=auth_headers)
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['resumen']['total_movimientos'] == 2
+        assert data['resumen']['entradas'] == {'cantidad': 1, 'valor': 200.0}
+        assert data['resumen']['salidas'] == {'cantidad': 1, 'valor': 75.0}
+        assert data['por_producto'][0]['unidades_salida'] == 5
+        assert data['top_productos']['por_unidades_salida'][0]['producto_id'] == sample_producto['id']
+        assert data['movimientos'][0]['tipo'] == 'salida'
+        assert data['movimientos'][0]['valor_total'] == 75.0
+        
+        response = client.get(f'/api/reportes/movimientos?producto_id={sample_producto["id"]}&detalle=false',
+                              headers=auth_headers)
+        data = json.loads(response.data)
+        assert data['movimientos'] == []
+        assert data['resumen']['total_movimientos'] == 2
+    
+    def test_reporte_rotacion(self, client, auth_headers, sample_producto):
+        """Test análisis ABC / rotación y su caché por ventana de fechas"""
+        url = f'/api/productos/{sample_producto["id"]}/stock'
+        client.post(url, json={'tipo': 'entrada', 'cantidad': 30}, headers=auth_headers)
+        client.post(url, json={'tipo': 'salida', 'cantidad': 9}, headers=auth_headers)
+        
+        response = client.get('/api/reportes/rotacion?refrescar=true', headers=auth_headers)
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert set(data['resumen']) == {'A', 'B', 'C'}
+        producto = next(p for p in data['productos'] if p['producto_id'] == sample_producto['id'])
+        assert producto['clase_abc'] == 'A'
+        assert producto['unidades_salida'] == 9
+        # Valor de consumo usa el precio de compra cuando el movimiento no tiene precio
+        assert producto['valor_consumo'] == 900.0
+        assert producto['stock_actual'] == 21
+        assert producto['rotacion'] == round(9 / ((0 + 21) / 2), 4)
+        
+        # Segunda consulta con la misma ventana se sirve desde la caché
+        cacheado = json.loads(client.get('/api/reportes/rotacion', headers=auth_headers).data)
+        assert cacheado['fecha_generacion'] == data['fecha_generacion']
+
+class TestRespuestas:
+    """Tests de serialización y compresión de respuestas"""
+    
+    def test_respuesta_comprimida(self, client, auth_headers, sample_producto):
+        """Test compresión gzip negociada por Accept-Encoding"""
+        import gzip
+        
+        sin_comprimir = client.get('/api/reportes/inventario', headers=auth_headers)
+        assert 'Content-Encoding' not in sin_comprimir.headers
+        assert len(sin_comprimir.data) > 1024
+        
+        response = client.get('/api/reportes/inventario',
+            headers={**auth_headers, 'Accept-Encoding': 'gzip'})
+        
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        data = json.loads(gzip.decompress(response.data))
+        assert data['resumen'] == json.loads(sin_comprimir.data)['resumen']
+    
+    def test_json_decimal(self, app):
+        """Test serialización de Decimal y fechas con el proveedor JSON"""
+        from decimal import Decimal
+        from datetime import date
+        
+        data = json.loads(app.json.dumps({'precio': Decimal('10.50'), 'fecha': date(2024, 1, 31)}))
+        
+        assert data['precio'] == 10.5
+        assert data['fecha'] == '2024-01-31'
 
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests del generador de datos y la suite de benchmarks
+"""
+
+import pytest
+
+class TestBenchmarks:
+    """Tests de la infraestructura de benchmarks"""
+
+    def test_generar_datos(self, app):
+        """Test generar volumen pequeño de datos sintéticos"""
+        from backend.app.models import Producto, Movimiento
+        from benchmarks.seed import generar_datos
+
+        totales = generar_datos(categorias=2, productos=10, movimientos=200, alertas=5, semilla=7)
+
+        assert totales == {'categorias': 2, 'productos': 10, 'movimientos': 200, 'alertas': 5}
+
+        # El stock final debe coincidir con el final de la cadena de movimientos
+        for producto in Producto.query.filter(Producto.codigo.like('B7-%')).all():
+            ultimo = Movimiento.query.filter_by(producto_id=producto.id)\
+                .order_by(Movimiento.id.desc()).first()
+            assert producto.stock_actual == (ultimo.stock_posterior if ultimo else 0)
+
+    def test_ejecutar_suite(self, app):
+        """Test ejecutar la suite con pocas repeticiones"""
+        from benchmarks.run_benchmarks import ejecutar_suite
+
+        reporte = ejecutar_suite(app, repeticiones=2, calentamiento=0)
+
+        assert 'productos_listado' in reporte['resultados']
+        for resultado in reporte['resultados'].values():
+            assert resultado['errores'] == 0
+            assert resultado['p50_ms'] <= resultado['p99_ms']
+
+    def test_comparar_detecta_regresion(self):
+        """Test comparación de ejecuciones"""
+        from benchmarks.run_benchmarks import comparar, percentil
+
+        assert percentil([1, 2, 3, 4, 5], 50) == 3
+
+        base = {'resultados': {'a': {'p95_ms': 10.0}, 'b': {'p95_ms': 10.0}}}
+        actual = {'resultados': {'a': {'p95_ms': 10.5}, 'b': {'p95_ms': 20.0}}}
+        regresiones = comparar(actual, base, umbral=0.15)
+
+        assert [r['escenario'] for r in regresiones] == ['b']
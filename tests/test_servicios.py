@@ -0,0 +1,626 @@
+#!/usr/bin/env python3
+"""
+Tests de los servicios de dominio (cálculos en lote)
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime, date, timedelta
+
+class TestPronostico:
+    """Tests del pronóstico de demanda y punto de reorden"""
+
+    def test_pronosticar_lote(self):
+        """Test suavizado exponencial vectorizado por lote"""
+        from backend.app.services.pronostico import pronosticar_lote
+
+        matriz = np.array([
+            [5.0] * 30,   # Demanda constante
+            [0.0] * 30,   # Sin historia suficiente
+        ])
+        nivel, stock_seguridad, punto_reorden = pronosticar_lote(
+            matriz, alpha=0.3, lead_time=7, z=1.65, dias_minimos=7
+        )
+
+        assert nivel[0] == pytest.approx(5.0)
+        assert stock_seguridad[0] == 0
+        assert punto_reorden[0] == 35
+        assert np.isnan(punto_reorden[1])
+
+    def test_calcular_puntos_reorden(self, app, sample_producto):
+        """Test recalcular punto de reorden desde los movimientos de salida"""
+        from backend.app import db
+        from backend.app.models import Producto, Movimiento, Usuario
+        from backend.app.services.pronostico import calcular_puntos_reorden
+
+        usuario = Usuario.query.filter_by(username='testuser').first()
+        hoy = date.today()
+        # Salidas de 4 unidades diarias durante los últimos 14 días
+        for dias_atras in range(1, 15):
+            movimiento = Movimiento(
+                producto_id=sample_producto['id'],
+                usuario_id=usuario.id,
+                tipo='salida',
+                cantidad=4,
+                stock_anterior=100
+            )
+            movimiento.fecha_movimiento = datetime.combine(hoy - timedelta(days=dias_atras), datetime.min.time())
+            db.session.add(movimiento)
+        producto = db.session.get(Producto, sample_producto['id'])
+        producto.stock_actual = 20
+        db.session.commit()
+
+        resultado = calcular_puntos_reorden(dias_historia=14, alpha=0.5, lead_time=7, z=1.65, dias_minimos=7)
+
+        assert resultado['productos_procesados'] >= 1
+        db.session.refresh(producto)
+        assert producto.demanda_diaria == pytest.approx(4.0, abs=0.5)
+        assert producto.punto_reorden >= 28
+        # El punto de reorden dinámico reemplaza al stock mínimo manual (10)
+        assert producto.umbral_reorden == producto.punto_reorden
+        assert producto.necesita_restock
+
+class TestLecturas:
+    """Tests de las lecturas livianas con Core"""
+
+    def test_productos_igual_to_dict(self, app, sample_producto):
+        """Test serializador de filas equivalente a Producto.to_dict()"""
+        from backend.app import db
+        from backend.app.models import Producto
+        from backend.app.services.lecturas import leer_productos, productos_a_registros
+
+        producto = db.session.get(Producto, sample_producto['id'])
+        producto.fecha_vencimiento = date.today() + timedelta(days=3)
+        db.session.commit()
+
+        registros = {registro['id']: registro for registro in productos_a_registros(leer_productos())}
+        esperados = {p.id: p.to_dict() for p in Producto.query.filter_by(activo=True).all()}
+
+        assert registros == esperados
+        assert registros[sample_producto['id']]['dias_para_vencer'] == 3
+
+    def test_hoy_sin_cache_fuera_de_peticion(self, app, monkeypatch):
+        """Test hoy() no reutiliza la fecha fuera de una petición (workers, CLI)"""
+        from flask import g
+        from backend.app.utils import fechas
+
+        g.hoy = date.today() - timedelta(days=1)
+        assert fechas.hoy() == g.hoy
+
+        monkeypatch.setattr(fechas, 'has_request_context', lambda: False)
+        assert fechas.hoy() == date.today()
+        g.pop('hoy')
+
+class TestVencimientos:
+    """Tests del calendario de vencimientos por lote"""
+
+    def test_alertas_por_lote(self, app, client, auth_headers, sample_producto):
+        """Test lote principal sincronizado y alertas de vencimiento sin duplicados"""
+        from backend.app import db
+        from backend.app.models import Lote, Usuario
+        from backend.app.services.vencimientos import generar_alertas_vencimiento
+
+        vence = date.today() + timedelta(days=5)
+        client.put(f"/api/productos/{sample_producto['id']}",
+                   json={'fecha_vencimiento': vence.isoformat(), 'lote': 'L-VENC'},
+                   headers=auth_headers)
+        client.post(f"/api/productos/{sample_producto['id']}/stock",
+                    json={'tipo': 'entrada', 'cantidad': 20, 'lote': 'L-VENC'},
+                    headers=auth_headers)
+
+        lotes = Lote.query.filter_by(producto_id=sample_producto['id']).all()
+        assert [(l.codigo, l.fecha_vencimiento, l.cantidad) for l in lotes] == [('L-VENC', vence, 20)]
+
+        usuario = Usuario.query.filter_by(username='testuser').first()
+        alertas = [a for a in generar_alertas_vencimiento(usuario.id)
+                   if a.producto_id == sample_producto['id']]
+        db.session.commit()
+
+        assert len(alertas) == 1
+        assert alertas[0].tipo == 'vencimiento'
+        assert alertas[0].prioridad == 'critica'
+        assert 'lote L-VENC, 20 unidades' in alertas[0].mensaje
+
+        repetidas = [a for a in generar_alertas_vencimiento(usuario.id)
+                     if a.producto_id == sample_producto['id']]
+        assert repetidas == []
+
+    def test_filtro_vencidos(self, app, client, auth_headers, sample_producto):
+        """Test ?vencidos=true usa los lotes vencidos con stock"""
+        vencido = date.today() - timedelta(days=2)
+        client.put(f"/api/productos/{sample_producto['id']}",
+                   json={'fecha_vencimiento': vencido.isoformat()},
+                   headers=auth_headers)
+
+        response = client.get('/api/productos?vencidos=true&per_page=100', headers=auth_headers)
+        ids = [p['id'] for p in response.get_json()['productos']]
+        # Sin stock no hay unidades vencidas
+        assert sample_producto['id'] not in ids
+
+        client.post(f"/api/productos/{sample_producto['id']}/stock",
+                    json={'tipo': 'entrada', 'cantidad': 5},
+                    headers=auth_headers)
+        response = client.get('/api/productos?vencidos=true&per_page=100', headers=auth_headers)
+        ids = [p['id'] for p in response.get_json()['productos']]
+        assert sample_producto['id'] in ids
+
+class TestLotes:
+    """Tests del stock por lote con asignación FEFO"""
+
+    def test_salida_fefo(self, app, client, auth_headers, sample_producto):
+        """Test las salidas se toman primero de los lotes que vencen antes"""
+        hoy = date.today()
+        url = f"/api/productos/{sample_producto['id']}/stock"
+        for lote, dias, cantidad in [('A', 20, 10), ('B', 5, 8), ('C', None, 30)]:
+            client.post(url, json={
+                'tipo': 'entrada', 'cantidad': cantidad, 'lote': lote,
+                'fecha_vencimiento': (hoy + timedelta(days=dias)).isoformat() if dias else None
+            }, headers=auth_headers)
+
+        response = client.post(url, json={'tipo': 'salida', 'cantidad': 12}, headers=auth_headers)
+        data = response.get_json()
+
+        assert response.status_code == 200
+        assert [(l['lote'], l['cantidad']) for l in data['lotes']] == [('B', -8), ('A', -4)]
+        assert data['producto']['stock_actual'] == 36
+        assert data['producto']['lote'] == 'A'
+        assert data['producto']['fecha_vencimiento'] == (hoy + timedelta(days=20)).isoformat()
+
+        response = client.get(f"/api/productos/{sample_producto['id']}/lotes", headers=auth_headers)
+        lotes = response.get_json()['lotes']
+        assert [(l['codigo'], l['cantidad']) for l in lotes] == [('A', 6), ('C', 30)]
+        assert sum(l['cantidad'] for l in lotes) == 36
+
+        # Salida de un lote puntual sin stock suficiente
+        response = client.post(url, json={'tipo': 'salida', 'cantidad': 7, 'lote': 'A'},
+                               headers=auth_headers)
+        assert response.status_code == 400
+
+        # Los lotes sin vencimiento se usan después de agotar los demás
+        response = client.post(url, json={'tipo': 'salida', 'cantidad': 10}, headers=auth_headers)
+        assert [(l['lote'], l['cantidad']) for l in response.get_json()['lotes']] == [('A', -6), ('C', -4)]
+
+    def test_ingreso_sin_lote_no_va_al_lote_vigente(self, app, client, auth_headers, sample_producto):
+        """Test un ingreso sin código de lote no se suma al lote que vence primero"""
+        hoy = date.today()
+        url = f"/api/productos/{sample_producto['id']}/stock"
+        for lote, dias, cantidad in [('VIEJO', 3, 10), ('NUEVO', 300, 50)]:
+            client.post(url, json={
+                'tipo': 'entrada', 'cantidad': cantidad, 'lote': lote,
+                'fecha_vencimiento': (hoy + timedelta(days=dias)).isoformat()
+            }, headers=auth_headers)
+
+        response = client.post(url, json={'tipo': 'entrada', 'cantidad': 100}, headers=auth_headers)
+        assert [l['lote'] for l in response.get_json()['lotes']] == ['GENERAL']
+        assert response.get_json()['producto']['lote'] == 'VIEJO'
+
+        lotes = client.get(f"/api/productos/{sample_producto['id']}/lotes", headers=auth_headers).get_json()['lotes']
+        assert [(l['codigo'], l['cantidad']) for l in lotes] == [('VIEJO', 10), ('NUEVO', 50), ('GENERAL', 100)]
+
+class TestMovimientosDiarios:
+    """Tests de los totales diarios de movimientos"""
+
+    def test_incremental_igual_a_reconstruir(self, app, client, auth_headers, sample_producto):
+        """Test totales mantenidos en cada movimiento iguales a recalcularlos desde cero"""
+        from backend.app import db
+        from backend.app.models import MovimientoDiario
+        from backend.app.services.movimientos_diarios import reconstruir_movimientos_diarios
+
+        def totales():
+            filas = MovimientoDiario.query.order_by(
+                MovimientoDiario.fecha, MovimientoDiario.producto_id, MovimientoDiario.tipo
+            ).all()
+            return [(f.fecha, f.producto_id, f.tipo, f.movimientos, f.unidades, float(f.valor))
+                    for f in filas]
+
+        reconstruir_movimientos_diarios()
+
+        url = f"/api/productos/{sample_producto['id']}/stock"
+        client.post(url, json={'tipo': 'entrada', 'cantidad': 8, 'precio_unitario': 2.5}, headers=auth_headers)
+        client.post(url, json={'tipo': 'entrada', 'cantidad': 2}, headers=auth_headers)
+        client.post(url, json={'tipo': 'salida', 'cantidad': 3, 'precio_unitario': 4}, headers=auth_headers)
+
+        db.session.expire_all()
+        incrementales = totales()
+        hoy = [f for f in incrementales if f[1] == sample_producto['id']]
+        assert (hoy[0][2], hoy[0][3], hoy[0][4], hoy[0][5]) == ('entrada', 2, 10, 20.0)
+        assert (hoy[1][2], hoy[1][3], hoy[1][4], hoy[1][5]) == ('salida', 1, 3, 12.0)
+
+        reconstruir_movimientos_diarios()
+        db.session.expire_all()
+        assert totales() == incrementales
+
+    def test_reconstruir_invalida_dias_cerrados(self, app, sample_producto):
+        """Test la serie no devuelve días cerrados cacheados antes de reconstruir"""
+        from backend.app import db
+        from backend.app.models import Movimiento, Usuario
+        from backend.app.services.movimientos_diarios import reconstruir_movimientos_diarios
+        from backend.app.services.series import totales_por_dia
+
+        ayer = datetime.utcnow().date() - timedelta(days=1)
+        antes = totales_por_dia(ayer, ayer)[ayer]['entrada']['unidades']
+
+        # Inserción fuera de registrar_movimiento_diario (p. ej. una importación)
+        usuario = Usuario.query.filter_by(username='testuser').first()
+        movimiento = Movimiento(producto_id=sample_producto['id'], usuario_id=usuario.id,
+                                tipo='entrada', cantidad=6, stock_anterior=0)
+        movimiento.fecha_movimiento = datetime.combine(ayer, datetime.min.time())
+        db.session.add(movimiento)
+        db.session.commit()
+        assert totales_por_dia(ayer, ayer)[ayer]['entrada']['unidades'] == antes
+
+        reconstruir_movimientos_diarios(ayer)
+        assert totales_por_dia(ayer, ayer)[ayer]['entrada']['unidades'] == antes + 6
+
+class TestConciliacion:
+    """Tests de la conciliación del libro de movimientos"""
+
+    def test_detectar_y_corregir(self, app, client, auth_headers, sample_producto):
+        """Test salto de cadena por actualización perdida y ajuste correctivo"""
+        from backend.app import db
+        from backend.app.models import Producto, Movimiento, Usuario
+        from backend.app.services.conciliacion import conciliar_stock, aplicar_ajustes
+
+        url = f"/api/productos/{sample_producto['id']}/stock"
+        client.post(url, json={'tipo': 'entrada', 'cantidad': 10}, headers=auth_headers)
+        client.post(url, json={'tipo': 'salida', 'cantidad': 3}, headers=auth_headers)
+
+        # Salida concurrente que leyó el stock antes de la anterior (10 -> 8)
+        usuario = Usuario.query.filter_by(username='testuser').first()
+        perdida = Movimiento(producto_id=sample_producto['id'], usuario_id=usuario.id,
+                             tipo='salida', cantidad=2, stock_anterior=10)
+        db.session.add(perdida)
+        db.session.get(Producto, sample_producto['id']).stock_actual = 8
+        db.session.commit()
+
+        rango = {'desde': sample_producto['id'], 'hasta': sample_producto['id'] + 1}
+        reporte = conciliar_stock(**rango)
+        assert [(f['producto_id'], f['stock_actual'], f['stock_libro'])
+                for f in reporte['diferencias_saldo']] == [(sample_producto['id'], 8, 5)]
+        assert [f['movimiento_id'] for f in reporte['saltos_cadena']] == [perdida.id]
+
+        reporte = conciliar_stock(aplicar=True, usuario_id=usuario.id, **rango)
+        assert reporte['ajustes_aplicados'] == 1
+        assert db.session.get(Producto, sample_producto['id']).stock_actual == 5
+        assert conciliar_stock(**rango)['diferencias_saldo'] == []
+
+        # Una diferencia que ya no existe al aplicar (verificación desactualizada) se omite
+        vieja = {'producto_id': sample_producto['id'], 'stock_actual': 8, 'stock_libro': 5}
+        assert aplicar_ajustes([vieja], usuario.id) == (0, [])
+        assert Movimiento.query.filter_by(producto_id=sample_producto['id'], tipo='ajuste').count() == 1
+
+class TestColas:
+    """Tests del ruteo de tareas de Celery a colas dedicadas"""
+
+    def test_rutas_y_limites(self, app):
+        """Test cada tipo de tarea va a su cola con su límite de tiempo"""
+        from backend.app import make_celery
+
+        celery = make_celery(app)
+        rutas = {
+            'backend.app.tasks.alertas_tasks.generar_alertas_automaticas': 'alertas',
+            'backend.app.tasks.alertas_tasks.enviar_notificacion_email': 'email',
+            'backend.app.tasks.pronostico_tasks.calcular_pronostico_demanda': 'reportes',
+            'backend.app.tasks.alertas_tasks.limpiar_alertas_resueltas': 'mantenimiento',
+            'tarea.sin.ruta': 'mantenimiento',
+        }
+        for tarea, cola in rutas.items():
+            assert celery.amqp.router.route({}, tarea)['queue'].name == cola
+
+        limites = celery.conf.task_annotations['backend.app.tasks.alertas_tasks.enviar_notificacion_email']
+        assert limites['soft_time_limit'] < limites['time_limit']
+
+    def test_importar_celery_worker(self, app, monkeypatch):
+        """Test el módulo del worker carga la configuración de Celery sin errores"""
+        import importlib
+        import sys
+
+        monkeypatch.setenv('FLASK_ENV', 'testing')
+        monkeypatch.delitem(sys.modules, 'celery_worker', raising=False)
+        try:
+            celery_worker = importlib.import_module('celery_worker')
+            conf = celery_worker.celery.conf
+            assert conf.timezone == 'UTC'
+            assert conf.worker_prefetch_multiplier == 1
+            assert conf.task_routes['backend.app.tasks.conciliacion_tasks.conciliar_libro_stock'] == {'queue': 'reportes'}
+            assert 'conciliar-libro-stock' in conf.beat_schedule
+        finally:
+            # Volver a la instancia de Celery de la aplicación de los tests
+            app.extensions['celery'].set_current()
+            app.extensions['celery'].set_default()
+
+    def test_tareas_enlazadas_a_la_aplicacion(self, app):
+        """Test importar las tareas no crea otra aplicación; corren con la instancia de create_app"""
+        from backend.app.tasks import alertas_tasks
+
+        celery = app.extensions['celery']
+        assert not hasattr(alertas_tasks, 'app') and not hasattr(alertas_tasks, 'celery')
+        assert 'backend.app.tasks.alertas_tasks' in celery.conf.include
+
+        tarea = alertas_tasks.limpiar_alertas_resueltas
+        assert tarea.app is celery
+        assert tarea.apply().get()['success']
+
+class TestBloqueos:
+    """Tests del arrendamiento exclusivo de tareas programadas"""
+
+    def test_arrendamiento_por_token(self, app):
+        """Test solo el dueño del arrendamiento puede renovarlo o liberarlo"""
+        from backend.app.utils.bloqueos import Bloqueo
+
+        primero, segundo = Bloqueo('prueba_token', ttl=60), Bloqueo('prueba_token', ttl=60)
+        assert primero.adquirir()
+        assert not segundo.adquirir()
+        assert not segundo.renovar() and not segundo.liberar()
+        assert primero.renovar() and primero.liberar()
+        assert segundo.adquirir() and segundo.liberar()
+
+    def test_omitir_y_coalescer(self, app):
+        """Test ejecuciones superpuestas: se omiten, o se coalescen en una más al terminar"""
+        from backend.app.utils.bloqueos import Bloqueo, exclusiva, ejecuciones
+
+        llamadas = []
+
+        @exclusiva('prueba_omitir')
+        def omitir():
+            llamadas.append('omitir')
+            if llamadas.count('omitir') == 1:
+                assert omitir()['omitida']
+            return {'success': True}
+
+        @exclusiva('prueba_coalescer', coalescer=True)
+        def coalescer():
+            llamadas.append('coalescer')
+            if llamadas.count('coalescer') == 1:
+                # Dos disparos durante la ejecución: una sola ejecución más
+                assert coalescer()['omitida'] and coalescer()['omitida']
+            return {'success': True}
+
+        assert omitir() == {'success': True}
+        assert coalescer() == {'success': True}
+        assert llamadas.count('omitir') == 1
+        assert llamadas.count('coalescer') == 2
+        assert len(ejecuciones('prueba_coalescer')) == 2
+        assert ejecuciones('prueba_omitir')[0]['duracion'] >= 0
+        assert not Bloqueo('prueba_omitir').tomado() and not Bloqueo('prueba_coalescer').tomado()
+
+
+class TestCorreo:
+    """Tests del envío de correos por lotes"""
+
+    def test_resumen_por_destinatario_en_una_conexion(self, app, monkeypatch):
+        """Test notificaciones agrupadas por destinatario y enviadas por una sola conexión"""
+        from backend.app import mail
+        from backend.app.services import correo
+
+        conexiones = []
+        connect = mail.connect
+        monkeypatch.setattr(mail, 'connect', lambda: conexiones.append(1) or connect())
+        monkeypatch.setitem(app.config, 'CORREO_MAX_POR_SEGUNDO', 0)
+
+        notificaciones = [
+            {'destinatario': 'a@example.com', 'asunto': 'Stock bajo: A', 'mensaje': 'Quedan 2'},
+            {'destinatario': 'b@example.com', 'asunto': 'Sin stock: B', 'mensaje': 'Quedan 0'},
+            {'destinatario': 'a@example.com', 'asunto': 'Vencido: C', 'mensaje': 'Lote L1'},
+        ]
+        with app.app_context(), mail.record_messages() as enviados:
+            resultado = correo.enviar_notificaciones(notificaciones, remitente='inventario@example.com')
+
+        assert resultado['correos'] == 2
+        assert resultado['enviados'] == ['a@example.com', 'b@example.com']
+        assert len(conexiones) == 1
+        assert 'Stock bajo: A' in enviados[0].body and 'Vencido: C' in enviados[0].body
+        assert enviados[1].subject == 'Sin stock: B'
+
+    def test_reintento_tras_desconexion(self, app, monkeypatch):
+        """Test error transitorio: se reabre la conexión y se reintenta; los 5xx no se reintentan"""
+        import smtplib
+        from backend.app import mail
+        from backend.app.services import correo
+
+        class ConexionFalsa:
+            fallas = [smtplib.SMTPServerDisconnected('cortada'),
+                      smtplib.SMTPResponseException(550, b'buzon inexistente')]
+            abiertas = 0
+            enviados = []
+
+            def __enter__(self):
+                ConexionFalsa.abiertas += 1
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def send(self, mensaje):
+                if mensaje.recipients == ['x@example.com'] and self.fallas:
+                    raise self.fallas.pop(0)
+                ConexionFalsa.enviados.append(mensaje.recipients[0])
+
+        monkeypatch.setattr(mail, 'connect', ConexionFalsa)
+        monkeypatch.setitem(app.config, 'CORREO_MAX_POR_SEGUNDO', 0)
+        monkeypatch.setitem(app.config, 'CORREO_ESPERA_REINTENTO', 0)
+
+        correos = [{'destinatario': d, 'asunto': 'Aviso', 'mensaje': 'Texto'}
+                   for d in ('x@example.com', 'x@example.com', 'y@example.com')]
+        with app.app_context():
+            resultado = correo.enviar_lote(correos, remitente='inventario@example.com')
+
+        assert resultado['enviados'] == ['x@example.com', 'y@example.com']
+        assert [d for d, _ in resultado['fallidos']] == ['x@example.com']
+        assert ConexionFalsa.abiertas == 2
+
+
+
+class TestNotificaciones:
+    """Tests de la deduplicación y los resúmenes de notificaciones de alertas"""
+
+    def test_sin_duplicados_y_un_resumen_por_usuario(self, app, client, auth_headers, sample_producto, monkeypatch):
+        """Test alertas repetidas del mismo producto y tipo: un solo aviso en un resumen"""
+        from backend.app import mail
+        from backend.app.models.notificacion import Notificacion
+        from backend.app.services.notificaciones import enviar_resumenes
+
+        monkeypatch.setitem(app.config, 'CORREO_MAX_POR_SEGUNDO', 0)
+        monkeypatch.setitem(app.config, 'MAIL_USERNAME', 'inventario@example.com')
+
+        # sample_producto no tiene stock: la alerta sin_stock se resuelve y vuelve a generarse
+        for _ in range(2):
+            response = client.post('/api/alertas/generar', headers=auth_headers)
+            assert response.status_code == 200
+            alerta = next(a for a in response.get_json()['alertas']
+                          if a['producto_id'] == sample_producto['id'] and a['tipo'] == 'sin_stock')
+            client.post(f"/api/alertas/{alerta['id']}/resolver", headers=auth_headers)
+
+        with app.app_context():
+            avisos = Notificacion.query.filter_by(producto_id=sample_producto['id'], tipo='sin_stock').all()
+            assert len(avisos) == len({aviso.usuario_id for aviso in avisos}) >= 1
+
+            with mail.record_messages() as enviados:
+                resultado = enviar_resumenes(canal='python')
+
+            assert resultado['fallidas'] == 0
+            destinatarios = [mensaje.recipients[0] for mensaje in enviados]
+            assert len(destinatarios) == len(set(destinatarios))
+            assert 'test@test.com' in destinatarios
+            assert Notificacion.query.filter_by(estado='pendiente').count() == 0
+
+    def test_canal_node_una_peticion_por_ejecucion(self, app, client, auth_headers, sample_producto, monkeypatch):
+        """Test canal node: los resúmenes viajan en una sola petición /send-bulk, uno por destinatario"""
+        from backend.app.models.notificacion import Notificacion
+        from backend.app.services import notificaciones
+
+        peticiones = []
+
+        def servicio_falso(mensajes):
+            peticiones.append(mensajes)
+            return [{'index': i, 'success': True} for i in range(len(mensajes))]
+
+        monkeypatch.setattr(notificaciones, '_enviar_por_servicio', servicio_falso)
+
+        response = client.post('/api/alertas/generar', headers=auth_headers)
+        assert response.status_code == 200
+
+        with app.app_context():
+            resultado = notificaciones.enviar_resumenes(canal='node')
+
+            # Un mensaje por destinatario: nadie ve las direcciones de los demás
+            destinatarios = [mensaje['to'] for mensaje in peticiones[0]]
+            assert len(peticiones) == 1
+            assert len(destinatarios) == len(set(destinatarios)) >= resultado['resumenes']
+            assert 'test@test.com' in destinatarios
+            assert resultado['fallidas'] == 0
+            assert Notificacion.query.filter_by(estado='pendiente').count() == 0
+
+    def test_canal_node_lotes_dentro_del_timeout(self, app, monkeypatch):
+        """Test canal node: lotes que el servicio envía antes del timeout; un lote caído no afecta a otros"""
+        from types import SimpleNamespace
+        from backend.app.services import notificaciones
+
+        peticiones = []
+
+        def servicio_falso(mensajes):
+            peticiones.append([mensaje['to'] for mensaje in mensajes])
+            if len(peticiones) == 2:
+                raise TimeoutError('timed out')
+            return [{'index': i, 'success': True} for i in range(len(mensajes))]
+
+        monkeypatch.setattr(notificaciones, '_enviar_por_servicio', servicio_falso)
+        monkeypatch.setitem(app.config, 'EMAIL_SERVICE_MAX_POR_SEGUNDO', 1)
+        monkeypatch.setitem(app.config, 'EMAIL_SERVICE_TIMEOUT', 3)
+
+        usuarios = [SimpleNamespace(id=i, email=f'u{i}@example.com') for i in range(5)]
+        entregados = notificaciones.entregar_resumenes(
+            [(usuarios[:3], 'Resumen A', 'texto'), (usuarios[3:], 'Resumen B', 'texto')], 'node'
+        )
+
+        assert notificaciones.tamano_lote_servicio() == 2
+        assert peticiones == [['u0@example.com', 'u1@example.com'],
+                              ['u2@example.com', 'u3@example.com'],
+                              ['u4@example.com']]
+        assert entregados == {0, 1, 4}
+
+
+class TestGeneracionAlertas:
+    """Tests de la generación de alertas por rangos de productos"""
+
+    def test_rangos_igual_a_catalogo_completo(self, app, sample_producto):
+        """Test generación por rangos de un id: mismas alertas que una sola pasada, sin duplicados"""
+        from backend.app import db
+        from backend.app.models import Usuario
+        from backend.app.services.conciliacion import rangos_de_productos
+        from backend.app.services.generacion_alertas import generar_alertas, contar_por_tipo, sumar_resultados
+
+        usuario = Usuario.query.filter_by(username='testuser').first()
+        rangos = rangos_de_productos(1)
+        assert len(rangos) >= 2
+
+        resultados = []
+        for desde, hasta in rangos:
+            alertas = generar_alertas(usuario.id, desde=desde, hasta=hasta)
+            db.session.commit()
+            assert all(desde <= alerta.producto_id < hasta for alerta in alertas)
+            resultados.append({'success': True, 'rango': [desde, hasta],
+                               'alertas_creadas': len(alertas), 'por_tipo': contar_por_tipo(alertas)})
+        resultados.append({'success': False, 'rango': [0, 1], 'error': 'caído'})
+
+        total = sumar_resultados(resultados)
+        assert total['rangos'] == len(rangos) + 1
+        assert total['alertas_creadas'] == sum(total['por_tipo'].values()) >= 1
+        assert total['por_tipo']['sin_stock'] >= 1
+        assert total['errores'] == [{'rango': [0, 1], 'error': 'caído'}]
+
+        # Todo el catálogo de una vez: las alertas activas ya existen
+        assert generar_alertas(usuario.id) == []
+        db.session.rollback()
+
+
+class TestEventosSesion:
+    """Tests de los listeners de sesión (versiones, eventos, contadores)"""
+
+    def test_rollback_descarta_tablas_modificadas(self, app, sample_categoria):
+        """Test rollback tras un flush no marca las tablas como modificadas"""
+        from backend.app import db
+        from backend.app.models import Categoria
+        from backend.app.utils.versiones import CLAVE_SESION, obtener_version
+
+        version = obtener_version('categorias')
+        db.session.add(Categoria(nombre='Categoria Descartada'))
+        db.session.flush()
+        assert 'categorias' in db.session.info[CLAVE_SESION]
+
+        db.session.rollback()
+
+        assert CLAVE_SESION not in db.session.info
+        assert obtener_version('categorias') == version
+
+    def test_rollback_descarta_eventos_pendientes(self, app, sample_producto):
+        """Test rollback tras un flush no publica las alertas descartadas"""
+        from backend.app import db
+        from backend.app.models import Alerta, Usuario
+        from backend.app.utils.eventos import CLAVE_SESION
+
+        usuario = Usuario.query.filter_by(username='testuser').first()
+        db.session.add(Alerta(
+            producto_id=sample_producto['id'], usuario_id=usuario.id, tipo='stock_bajo',
+            titulo='Descartada', mensaje='Alerta descartada por rollback'
+        ))
+        db.session.flush()
+        assert len(db.session.info[CLAVE_SESION]) == 1
+
+        db.session.rollback()
+
+        assert CLAVE_SESION not in db.session.info
+
+    def test_ajustar_no_leidas_sin_clave(self, app):
+        """Test ajustar el contador no lo recrea si expiró (quedaría sin TTL)"""
+        from backend.app import cache
+        from backend.app.utils.contadores import CLAVE_CONTADOR, ajustar_no_leidas
+
+        cache.delete(CLAVE_CONTADOR)
+        ajustar_no_leidas(1)
+        assert cache.get(CLAVE_CONTADOR) is None
+
+        cache.set(CLAVE_CONTADOR, 4, ttl=60)
+        ajustar_no_leidas(-1)
+        assert cache.get(CLAVE_CONTADOR) == 3
+        cache.delete(CLAVE_CONTADOR)